@@ -0,0 +1,2 @@
+# Admin API package
+
@@ -0,0 +1,61 @@
+"""
+Admin API Routes
+
+Served outside /api/ so responses never go through the dataset-versioned
+response cache. Every endpoint requires the X-Admin-Token header to match
+PROFILING_TOKEN, and answers 404 while profiling is disabled.
+"""
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+from typing import Literal, Optional
+
+from backend.profiling import check_token, profile_store, profiling_token
+
+router = APIRouter()
+
+PROFILE_FILES = {
+    "pstats": (".pstats", "application/octet-stream"),
+    "collapsed": (".collapsed.txt", "text/plain"),
+}
+
+
+def _require_admin(token: Optional[str]):
+    if not profiling_token():
+        raise HTTPException(status_code=404, detail="Profiling is not enabled")
+    if not check_token(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/profiles")
+async def list_profiles(
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    List stored request profiles, newest first
+    """
+    _require_admin(x_admin_token)
+    profiles = profile_store.list()
+    for profile in profiles:
+        profile["files"] = {kind: f"/admin/profiles/{profile['id']}/{kind}" for kind in PROFILE_FILES}
+    return {
+        "keep": profile_store.keep,
+        "count": len(profiles),
+        "profiles": profiles
+    }
+
+
+@router.get("/profiles/{profile_id}/{kind}")
+async def download_profile(
+    profile_id: str,
+    kind: Literal["pstats", "collapsed"],
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Download a stored profile as .pstats or as collapsed stacks for flame graphs
+    """
+    _require_admin(x_admin_token)
+    suffix, media_type = PROFILE_FILES[kind]
+    path = profile_store.path(profile_id, suffix)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return FileResponse(str(path), media_type=media_type, filename=path.name)
@@ -2,68 +2,34 @@
 Attendance API Routes
 """
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Union
 from datetime import datetime
-import json
-from pathlib import Path
 import traceback
 
-router = APIRouter()
-
-# Get data directory path
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-DATA_DIR = BASE_DIR / "data"
-
-def load_json_file(filename: str):
-    """Load JSON data file"""
-    filepath = DATA_DIR / filename
-    if not filepath.exists():
-        raise HTTPException(status_code=404, detail=f"Data file {filename} not found")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def normalize_attendance_data(attendance_data):
-    """Support two shapes for attendance data:
-    1) { "date": "...", "attendance_records": [ ... ] }
-    2) [ {...}, {...} ]  (top-level array)
-    Returns a tuple: (date_or_none, attendance_records_list)
-    """
-    # If attendance_data is a list, treat it as the records array
-    if isinstance(attendance_data, list):
-        return (None, attendance_data)
-
-    # If it's a dict, try to extract fields with fallbacks
-    if isinstance(attendance_data, dict):
-        records = attendance_data.get("attendance_records")
-        if records is None and any(isinstance(v, list) for v in attendance_data.values()):
-            # defensive: find the first list value and use it
-            for v in attendance_data.values():
-                if isinstance(v, list):
-                    records = v
-                    break
-        return (attendance_data.get("date"), records or [])
-
-    # fallback
-    return (None, [])
-
-def calculate_hours(checkin: str, checkout: str) -> str:
-    """Calculate total work hours"""
-    try:
-        checkin_time = datetime.strptime(checkin, "%H:%M")
-        checkout_time = datetime.strptime(checkout, "%H:%M")
-        
-        # Handle overnight checkout
-        if checkout_time < checkin_time:
-            checkout_time = datetime.strptime(checkout, "%H:%M").replace(day=2)
-            checkin_time = datetime.strptime(checkin, "%H:%M").replace(day=1)
-        
-        diff = checkout_time - checkin_time
-        hours = diff.seconds // 3600
-        minutes = (diff.seconds % 3600) // 60
-        return f"{hours}h {minutes}m"
-    except Exception as e:
-        _log_exception(e, "calculate_hours")
-        return "0h 0m"
+from backend.data_store.cache import DATA_DIR
+from backend.data_store.columnar import format_minutes
+from backend.data_store.occupancy import PRESENT
+from backend.data_store.record_order import (
+    ASC, SORT_KEYS, decode_cursor, encode_cursor, filter_mask, match_count, page_rows, row_order
+)
+from backend.data_store.repository import get_repository, resolve_day, resolve_occupancy
+from backend.data_store.live_state import live_attendance
+from backend.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+class AttendanceEvent(BaseModel):
+    """Entry/exit event captured by the face recognition module"""
+    employee_id: str
+    event_type: Literal["entry", "exit"]
+    timestamp: datetime = Field(..., description="Local time of the gate event, ISO 8601")
+    building: Optional[str] = None
+    office: Optional[str] = None
+    camera_id: Optional[str] = None
+
+class AttendanceEventBatch(BaseModel):
+    events: List[AttendanceEvent] = Field(..., min_length=1, max_length=10000)
 
 def _log_exception(exc: Exception, name: str = "attendance"):
     """Log exceptions to a file for debugging"""
@@ -83,133 +49,178 @@ async def get_attendance_summary(
     """
     Get attendance summary for an employee
     """
-    employees_data = load_json_file("employees.json")
-    attendance_data = load_json_file("attendance.json")
-
-    # Normalize attendance data
-    file_date, attendance_records = normalize_attendance_data(attendance_data)
+    repository = get_repository()
 
     # Find employee
-    employee = next((e for e in employees_data.get("employees", []) if e.get("employee_id") == employee_id), None)
+    employee = repository.get_employee(employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail=f"Employee {employee_id} not found")
     
     # Find attendance record
-    target_date = date or file_date
-    attendance_record = next(
-        (r for r in attendance_records if r.get("employee_id") == employee_id),
-        None
-    )
+    day = resolve_day(date)
+    row = day.row_of_employee(employee_id)
     
-    if not attendance_record:
+    if row is None:
         raise HTTPException(status_code=404, detail=f"Attendance record not found for employee {employee_id}")
     
-    # Check for late arrival (assuming 9:00 AM is standard)
-    checkin_time = datetime.strptime(attendance_record["checkin_time"], "%H:%M")
-    late_arrival = checkin_time > datetime.strptime("09:00", "%H:%M")
-    
-    total_hours = calculate_hours(attendance_record["checkin_time"], attendance_record["checkout_time"])
+    attendance_record = day.records[row]
+    columns = day.columns
     
     return {
         "employee_id": employee_id,
         "name": employee["name"],
-        "date": target_date,
-        "checkin": attendance_record["checkin_time"],
-        "checkout": attendance_record["checkout_time"],
-        "total_hours": total_hours,
-        "late_arrival": late_arrival,
+        "date": day.date,
+        "checkin": attendance_record.get("checkin_time"),
+        "checkout": attendance_record.get("checkout_time"),
+        "total_hours": format_minutes(columns.duration[row]),
+        # Late arrival is a check-in after 9:00 AM
+        "late_arrival": bool(columns.late_arrival[row]),
         "building": attendance_record.get("building", ""),
         "office": attendance_record.get("office", "")
     }
 
+# Fields that can be selected with fields= on /records
+RECORD_FIELDS = (
+    "employee_id", "name", "gender", "project_id", "checkin_time",
+    "checkout_time", "total_hours", "building", "office"
+)
+
+def enrich_record(record: dict, minutes: int, employee_lookup: dict) -> dict:
+    """An attendance record with employee info and worked hours added"""
+    employee = employee_lookup.get(record.get("employee_id"), {})
+
+    return {
+        **record,
+        "name": employee.get("name", ""),
+        "gender": employee.get("gender", ""),
+        "project_id": employee.get("project_id", ""),
+        "total_hours": format_minutes(minutes)
+    }
+
+def iter_attendance_records(day, employee_lookup: dict):
+    """A day's attendance records enriched with employee info and worked hours"""
+    # Hours come from the precomputed duration column
+    for record, minutes in zip(day.records, day.columns.duration):
+        yield enrich_record(record, minutes, employee_lookup)
+
+def build_attendance_records(day, employee_lookup: dict) -> dict:
+    """Enrich a day's attendance records with employee info and worked hours"""
+    return {
+        "date": day.date,
+        "attendance_records": list(iter_attendance_records(day, employee_lookup))
+    }
+
 @router.get("/records")
 async def get_attendance_records(
-    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format")
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; enables cursor pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    sort: Optional[Literal[SORT_KEYS]] = Query(None, description="Sort key (default: employee_id)"),
+    order: Literal["asc", "desc"] = Query(ASC, description="Sort direction"),
+    fields: Optional[str] = Query(None, description=f"Comma-separated fields to return: {', '.join(RECORD_FIELDS)}"),
+    office: Optional[str] = Query(None, description="Only records at this office"),
+    project_id: Optional[str] = Query(None, description="Only employees of this project"),
+    gender: Optional[str] = Query(None, description="Only employees of this gender"),
+    late_only: bool = Query(False, description="Only late stays (checkout at or after 8:00 PM)")
 ):
     """
-    Get all attendance records for a date
+    Get attendance records for a date
     Supports both single-day attendance.json and multi-day attendance_multi_day.json
+
+    Without paging, sorting, projection or filter parameters every record is
+    returned in stored order. Otherwise records are filtered, sorted and paged
+    server-side from per-day sort indexes built once per day and sort key;
+    pass next_cursor back as cursor to get the following page.
     """
-    employees_data = load_json_file("employees.json")
-    
-    # Try to load multi-day data first, fallback to single-day
-    attendance_records = []
-    file_date = None
+    directory = get_repository().get_directory()
+    employee_lookup = directory.by_id
     
+    day = resolve_day(date)
+
+    options = (limit, cursor, sort, fields, office, project_id, gender)
+    if all(v is None for v in options) and not late_only and order == ASC:
+        return build_attendance_records(day, employee_lookup)
+
+    sort = sort or "employee_id"
+    selected = None
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in RECORD_FIELDS]
+        if unknown or not selected:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown) or fields}. Choose from {', '.join(RECORD_FIELDS)}")
     try:
-        multi_day_data = load_json_file("attendance_multi_day.json")
-        if isinstance(multi_day_data, dict) and "days" in multi_day_data:
-            # Multi-day format
-            target_date = date or multi_day_data.get("latest_date")
-            if target_date:
-                # Find the day data
-                day_data = next((d for d in multi_day_data["days"] if d.get("date") == target_date), None)
-                if day_data:
-                    attendance_records = day_data.get("attendance_records", [])
-                    file_date = day_data.get("date")
-        elif isinstance(multi_day_data, list):
-            # If it's a list of days
-            target_date = date
-            if target_date:
-                day_data = next((d for d in multi_day_data if d.get("date") == target_date), None)
-                if day_data:
-                    attendance_records = day_data.get("attendance_records", [])
-                    file_date = day_data.get("date")
-    except:
-        # Fallback to single-day file
-        try:
-            attendance_data = load_json_file("attendance.json")
-            file_date, attendance_records = normalize_attendance_data(attendance_data)
-        except:
-            attendance_records = []
-    
-    # If no date specified and we have multi-day data, use latest
-    if not date and not file_date:
-        try:
-            multi_day_data = load_json_file("attendance_multi_day.json")
-            if isinstance(multi_day_data, dict) and "days" in multi_day_data:
-                latest_day = multi_day_data["days"][-1] if multi_day_data["days"] else None
-                if latest_day:
-                    attendance_records = latest_day.get("attendance_records", [])
-                    file_date = latest_day.get("date")
-        except:
-            pass
-
-    # Create employee lookup
-    employee_lookup = {e["employee_id"]: e for e in employees_data.get("employees", [])}
-
-    # Enrich attendance records with employee info
-    enriched_records = []
-    for record in attendance_records:
-        employee = employee_lookup.get(record.get("employee_id"), {})
-        total_hours = calculate_hours(record.get("checkin_time", "00:00"), record.get("checkout_time", "00:00"))
-
-        enriched_records.append({
-            **record,
-            "name": employee.get("name", ""),
-            "gender": employee.get("gender", ""),
-            "project_id": employee.get("project_id", ""),
-            "total_hours": total_hours
-        })
+        after = decode_cursor(cursor, sort, order) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+    mask = filter_mask(day, directory, office, project_id, gender, late_only)
+    rows, resume = page_rows(row_order(day, sort, directory.employees, employee_lookup), mask, order, after, limit)
+
+    duration = day.columns.duration
+    records = []
+    for row in rows:
+        record = enrich_record(day.records[row], duration[row], employee_lookup)
+        records.append({f: record.get(f) for f in selected} if selected else record)
 
     return {
-        "date": date or file_date,
-        "attendance_records": enriched_records
+        "date": day.date,
+        "sort": sort,
+        "order": order,
+        "total": match_count(day, mask),
+        "count": len(records),
+        "next_cursor": encode_cursor(sort, order, resume) if resume else None,
+        "attendance_records": records
     }
 
 @router.get("/daily-count")
 async def get_daily_count(
-    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format")
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
+    mode: Literal["present", "inside"] = Query(PRESENT, description="present: everyone who came in that day; inside: checked in and not yet checked out")
 ):
     """
-    Get daily people count in office
+    Get daily people count in office, by office and building
+    Served from occupancy counters that ingested events keep up to date
     """
-    attendance_data = load_json_file("attendance.json")
-    file_date, attendance_records = normalize_attendance_data(attendance_data)
+    day_date, occupancy = resolve_occupancy(date)
 
     return {
-        "date": date or file_date,
-        "total_people": len(attendance_records),
-        "count_by_office": {}
+        "date": day_date,
+        "mode": mode,
+        **occupancy.counts(mode)
     }
 
+@router.post("/events")
+async def ingest_attendance_events(
+    payload: Union[AttendanceEventBatch, AttendanceEvent]
+):
+    """
+    Ingest one check-in/check-out event or a batch of them.
+    Events are durably appended to the write-ahead log (group commit) and then
+    folded into the in-memory day state served by the read endpoints.
+    """
+    events = payload.events if isinstance(payload, AttendanceEventBatch) else [payload]
+
+    employee_lookup = get_repository().get_directory().by_id
+    unknown = sorted({e.employee_id for e in events if e.employee_id not in employee_lookup})
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Employee {', '.join(unknown)} not found")
+
+    encoded = []
+    for event in events:
+        entry = event.model_dump(mode="json")
+        # Default the location to the employee's home office
+        entry["office"] = entry["office"] or employee_lookup[event.employee_id].get("office_location", "")
+        encoded.append(entry)
+
+    try:
+        # Folded into the live state in write-ahead log order once committed
+        await live_attendance.ingest(encoded)
+    except (OSError, RuntimeError) as e:
+        # RuntimeError: the log writer has stopped
+        _log_exception(e, "event_log")
+        raise HTTPException(status_code=503, detail="Attendance events could not be persisted")
+
+    return {
+        "accepted": len(encoded),
+        "dates": sorted({e["timestamp"][:10] for e in encoded})
+    }
@@ -0,0 +1,2 @@
+# Dashboard API package
+
@@ -0,0 +1,68 @@
+"""
+Dashboard API Routes
+"""
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+
+from backend.attendance_api.routes import build_attendance_records
+from backend.data_store.repository import get_repository, resolve_day
+from backend.late_stay_api.routes import build_late_stay, build_women_late_stay
+from backend.reports.routes import build_projects_work_balance, build_wfo_compliance
+from backend.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+DASHBOARD_SECTIONS = ("records", "late_stay", "women_late_stay", "wfo_compliance", "work_balance")
+
+def parse_csv_param(value: Optional[str]) -> list:
+    """Split a comma-separated query parameter into a list of non-empty items"""
+    if not value:
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+@router.get("")
+async def get_dashboard(
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
+    sections: Optional[str] = Query(None, description="Comma-separated sections to include (default: all): " + ", ".join(DASHBOARD_SECTIONS)),
+    projects: Optional[str] = Query(None, description="Comma-separated project IDs for work_balance (default: all projects)")
+):
+    """
+    Get all dashboard sections for a date in one response.
+    The date is resolved once and every section is built from the same day partition.
+    """
+    requested = parse_csv_param(sections) or list(DASHBOARD_SECTIONS)
+    unknown = [s for s in requested if s not in DASHBOARD_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown dashboard sections: {', '.join(unknown)}")
+    
+    repository = get_repository()
+    directory = repository.get_directory()
+    employee_lookup = directory.by_id
+    
+    day = resolve_day(date)
+    
+    response = {"date": day.date}
+    
+    if "records" in requested:
+        response["records"] = build_attendance_records(day, employee_lookup)
+    
+    if "late_stay" in requested or "women_late_stay" in requested:
+        late_stay_data = build_late_stay(day, employee_lookup)
+        if "late_stay" in requested:
+            response["late_stay"] = late_stay_data
+        if "women_late_stay" in requested:
+            response["women_late_stay"] = build_women_late_stay(late_stay_data)
+    
+    if "wfo_compliance" in requested:
+        response["wfo_compliance"] = build_wfo_compliance(day, directory)
+    
+    if "work_balance" in requested:
+        project_ids = parse_csv_param(projects)
+        all_projects = repository.get_projects()
+        selected = [p for p in all_projects if not project_ids or p["project_id"] in project_ids]
+        missing = set(project_ids) - {p["project_id"] for p in selected}
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Project {', '.join(sorted(missing))} not found")
+        response["work_balance"] = build_projects_work_balance(selected, day, directory.employees)
+    
+    return response
@@ -0,0 +1,2 @@
+# Data store package
+
@@ -0,0 +1,357 @@
+"""
+Binary, memory-mapped attendance history (attendance.bin).
+
+Layout, little-endian:
+- HEADER: magic, format version, record size, first date (ordinal), number of
+  date slots, latest date (ordinal), string and record counts, and the
+  offsets of the sections below;
+- records: fixed-width RECORD structs (employee, office and building string
+  codes, check-in / check-out minutes), sorted by (date, employee id);
+- date table: one DAY_SLOT (first record, record count) per calendar day from
+  the first date on, so a date resolves to its records with arithmetic;
+- string dictionary: uint32 end offsets, then the UTF-8 bytes;
+- employees and projects as JSON.
+
+Opening the file reads only the header. A day reads its slot and its own
+records, so cold start and per-day access do not grow with the history.
+Times are stored as minutes: records come back as "HH:MM" strings (or None),
+with the same six fields as the SQLite backend. Build the file with:
+
+    python -m backend.data_store.binary_history [--data-dir data] [--output data/attendance.bin]
+"""
+from array import array
+from collections import OrderedDict
+from datetime import date as date_cls
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import argparse
+import asyncio
+import json
+import mmap
+import os
+import struct
+import threading
+
+from backend.data_store.cache import DATA_DIR, DatasetCache
+from backend.data_store.columnar import (
+    DayColumns, Interner, MISSING, building_codes, employee_codes, office_codes, parse_minutes,
+)
+from backend.data_store.day_index import AttendanceDay, DayIndex, MULTI_DAY_FILE, SINGLE_DAY_FILE
+from backend.data_store.repository import AttendanceRepository, EMPLOYEES_FILE, PROJECTS_FILE
+
+MAGIC = b"ATTHIST\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIIIII8Q")
+# employee, office, building (string codes), check-in, check-out (minutes or MISSING).
+# Times are uint16: parse_minutes returns 0..1439 or MISSING (0xFFFF), so a real
+# time can never be read back as missing.
+RECORD = struct.Struct("<IIIHH")
+# index of the day's first record, number of records
+DAY_SLOT = struct.Struct("<QI")
+# String code of a missing value
+NULL = 0xFFFFFFFF
+
+BINARY_FILE = "attendance.bin"
+
+
+def _ordinal(day: str) -> int:
+    return date_cls.fromisoformat(day).toordinal()
+
+
+def _hhmm(minutes: int) -> Optional[str]:
+    return None if minutes == MISSING else f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def pack_rows(records: Iterable[dict]) -> List[tuple]:
+    """(employee_id, office, building, check-in, check-out minutes) rows in file order"""
+    rows = [
+        (r.get("employee_id"), r.get("office"), r.get("building"),
+         parse_minutes(r.get("checkin_time")), parse_minutes(r.get("checkout_time")))
+        for r in records
+    ]
+    rows.sort(key=lambda row: row[0] or "")
+    return rows
+
+
+class HistoryWriter:
+    """Writes attendance.bin one day at a time, then the date table and dictionaries on close"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.file = open(self.tmp_path, "wb")
+        self.file.write(bytes(HEADER.size))
+        self.strings = Interner()
+        self.slots: Dict[int, Tuple[int, int]] = {}
+        self.count = 0
+
+    def _code(self, value) -> int:
+        return NULL if value is None else self.strings.intern(str(value))
+
+    def add_day(self, day: str, rows: Sequence[tuple]):
+        """Append one date's rows (from pack_rows)"""
+        ordinal = _ordinal(day)
+        if ordinal in self.slots:
+            raise ValueError(f"Date {day} was already written")
+        code = self._code
+        self.file.write(b"".join(
+            RECORD.pack(code(employee_id), code(office), code(building), checkin, checkout)
+            for employee_id, office, building, checkin, checkout in rows
+        ))
+        self.slots[ordinal] = (self.count, len(rows))
+        self.count += len(rows)
+
+    def close(self, employees: Optional[List[dict]], projects: Optional[List[dict]],
+              latest_date: Optional[str] = None):
+        first = min(self.slots) if self.slots else 0
+        slot_count = max(self.slots) - first + 1 if self.slots else 0
+        latest = _ordinal(latest_date) if latest_date else (max(self.slots) if self.slots else 0)
+        if latest not in self.slots:
+            latest = max(self.slots) if self.slots else 0
+
+        offsets = {"days": self.file.tell()}
+        self.file.write(b"".join(DAY_SLOT.pack(*self.slots.get(first + i, (0, 0))) for i in range(slot_count)))
+
+        offsets["strings"] = self.file.tell()
+        encoded = [value.encode("utf-8") for value in self.strings.values]
+        ends, end = array("I"), 0
+        for value in encoded:
+            end += len(value)
+            ends.append(end)
+        self.file.write(ends.tobytes())
+        self.file.write(b"".join(encoded))
+
+        master = []
+        for rows in (employees, projects):
+            if rows is None:
+                master += [0, 0]
+                continue
+            blob = json.dumps(rows, ensure_ascii=False).encode("utf-8")
+            master += [self.file.tell(), len(blob)]
+            self.file.write(blob)
+
+        self.file.seek(0)
+        self.file.write(HEADER.pack(
+            MAGIC, FORMAT_VERSION, RECORD.size, first, slot_count, latest, len(encoded),
+            self.count, HEADER.size, offsets["days"], offsets["strings"], *master,
+        ))
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+
+class HistoryFile:
+    """A memory-mapped attendance.bin"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, record_size, self.first, self.slot_count, latest, self.string_count,
+         self.record_count, self._records, self._days, self._strings,
+         employees_offset, employees_size, projects_offset, projects_size) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD.size:
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} attendance history file")
+        self.latest = date_cls.fromordinal(latest).isoformat() if self.slot_count else None
+        self._master = {"employees": (employees_offset, employees_size), "projects": (projects_offset, projects_size)}
+
+        buffer = memoryview(self._map)
+        self._ends = buffer[self._strings:self._strings + 4 * self.string_count].cast("I")
+        self._text = self._strings + 4 * self.string_count
+        self._buffer = buffer
+        self._decoded: Dict[int, str] = {}
+        # File string code -> process-wide code, per interner, so days don't re-intern
+        self._remapped: Dict[Interner, Dict[int, int]] = {}
+
+    def string(self, code: int) -> Optional[str]:
+        if code == NULL:
+            return None
+        value = self._decoded.get(code)
+        if value is None:
+            start = self._ends[code - 1] if code else 0
+            value = self._decoded[code] = self._map[self._text + start:self._text + self._ends[code]].decode("utf-8")
+        return value
+
+    def process_codes(self, interner: Interner, codes: Sequence[int]) -> List[int]:
+        """Process-wide codes (from interner) for file string codes"""
+        known = self._remapped.setdefault(interner, {})
+        for code in set(codes).difference(known):
+            known[code] = interner.intern(self.string(code))
+        return list(map(known.__getitem__, codes))
+
+    def slot(self, day: str) -> Optional[Tuple[int, int]]:
+        """(first record, count) for a date, or None if there is no data for it"""
+        try:
+            index = _ordinal(day) - self.first
+        except ValueError:
+            return None
+        if not 0 <= index < self.slot_count:
+            return None
+        start, count = DAY_SLOT.unpack_from(self._map, self._days + index * DAY_SLOT.size)
+        return (start, count) if count else None
+
+    def dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        lo = max(_ordinal(start) - self.first, 0) if start else 0
+        hi = min(_ordinal(end) - self.first + 1, self.slot_count) if end else self.slot_count
+        dates = []
+        for index in range(lo, hi):
+            if DAY_SLOT.unpack_from(self._map, self._days + index * DAY_SLOT.size)[1]:
+                dates.append(date_cls.fromordinal(self.first + index).isoformat())
+        return dates
+
+    def day(self, day: str) -> Optional[AttendanceDay]:
+        slot = self.slot(day)
+        if slot is None:
+            return None
+        start, count = slot
+        rows = self._buffer[self._records + start * RECORD.size:self._records + (start + count) * RECORD.size]
+        words, halves = rows.cast("I"), rows.cast("H")
+        # Strided views over the packed records, one per field
+        employee, office, building = words[0::4], words[1::4], words[2::4]
+        checkin, checkout = halves[6::8], halves[7::8]
+
+        string = self.string
+        employee_ids = list(map(string, employee))
+        offices, buildings = list(map(string, office)), list(map(string, building))
+        records = [
+            {"date": day, "employee_id": employee_id, "checkin_time": _hhmm(minutes_in),
+             "checkout_time": _hhmm(minutes_out), "building": building_name, "office": office_name}
+            for employee_id, minutes_in, minutes_out, building_name, office_name
+            in zip(employee_ids, checkin, checkout, buildings, offices)
+        ]
+        columns = DayColumns.from_arrays(
+            array("I", self.process_codes(employee_codes, employee)),
+            checkin,
+            checkout,
+            array("H", self.process_codes(office_codes, office)),
+            array("H", self.process_codes(building_codes, building)),
+        )
+        return AttendanceDay(day, records, columns)
+
+    def master(self, name: str) -> Optional[list]:
+        offset, size = self._master[name]
+        if not offset:
+            return None
+        return json.loads(self._map[offset:offset + size])
+
+
+class BinaryAttendanceRepository(AttendanceRepository):
+    """attendance.bin, memory-mapped; days are decoded on demand"""
+
+    name = "binary"
+
+    def __init__(self, path: str, day_cache_size: int = 64):
+        self.path = Path(path)
+        self.day_cache_size = day_cache_size
+        self._lock = threading.Lock()
+        self._file: Optional[HistoryFile] = None
+        self._version = None
+        self._days: "OrderedDict[str, Optional[AttendanceDay]]" = OrderedDict()
+        self._employees = None
+        self._projects = None
+
+    def version(self) -> str:
+        try:
+            st = os.stat(self.path)
+            return f"binary:{st.st_mtime_ns}:{st.st_size}"
+        except OSError:
+            return "binary:-"
+
+    def _history(self) -> HistoryFile:
+        # Remap and drop cached days and master data when the file is replaced
+        version = self.version()
+        if version != self._version or self._file is None:
+            with self._lock:
+                if version != self._version or self._file is None:
+                    if not self.path.exists():
+                        raise FileNotFoundError(f"Attendance history {self.path} not found; run backend.data_store.binary_history first")
+                    self._file = HistoryFile(self.path)
+                    self._days.clear()
+                    self._employees = None
+                    self._projects = None
+                    self._version = version
+        return self._file
+
+    async def prepare(self, date: Optional[str] = None):
+        # Only master data is parsed up front; days are decoded when requested
+        if self._employees is None or self._projects is None or self.version() != self._version:
+            await asyncio.get_running_loop().run_in_executor(None, self._load_master_data)
+
+    def _load_master_data(self):
+        self.get_employees()
+        self.get_projects()
+
+    def get_employees(self) -> List[dict]:
+        history = self._history()
+        if self._employees is None:
+            self._employees = history.master("employees") or []
+        return self._employees
+
+    def get_projects(self) -> List[dict]:
+        history = self._history()
+        if self._projects is None:
+            self._projects = history.master("projects") or []
+        return self._projects
+
+    def get_day(self, date: str) -> Optional[AttendanceDay]:
+        history = self._history()
+        with self._lock:
+            if date in self._days:
+                self._days.move_to_end(date)
+                return self._days[date]
+        day = history.day(date)
+        with self._lock:
+            self._days[date] = day
+            while len(self._days) > self.day_cache_size:
+                self._days.popitem(last=False)
+        return day
+
+    def get_dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        return self._history().dates(start, end)
+
+    def latest_date(self) -> Optional[str]:
+        return self._history().latest
+
+
+def convert_json(data_dir: Path, path: Path) -> dict:
+    """Write path from the JSON files in data_dir and return counts"""
+    files = DatasetCache(data_dir)
+    if files.exists(MULTI_DAY_FILE):
+        index = DayIndex.from_multi_day(files.get(MULTI_DAY_FILE))
+    elif files.exists(SINGLE_DAY_FILE):
+        index = DayIndex.from_single_day(files.get(SINGLE_DAY_FILE))
+    else:
+        index = DayIndex([])
+    if index.undated is not None and index.undated.records:
+        # Days are stored by date; refuse rather than write an empty history
+        raise ValueError(f"{SINGLE_DAY_FILE} has no \"date\"; add one before converting")
+
+    writer = HistoryWriter(path)
+    records = 0
+    for day in index.range():
+        rows = pack_rows(day.records)
+        writer.add_day(day.date, rows)
+        records += len(rows)
+    master = {
+        filename: files.get(filename).get(key, []) if files.exists(filename) else None
+        for filename, key in ((EMPLOYEES_FILE, "employees"), (PROJECTS_FILE, "projects"))
+    }
+    writer.close(master[EMPLOYEES_FILE], master[PROJECTS_FILE], index.latest_date)
+    return {"days": len(index), "records": records, "bytes": path.stat().st_size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the JSON data files into a memory-mapped attendance history")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Directory with the JSON data files")
+    parser.add_argument("--output", default=str(DATA_DIR / BINARY_FILE), help="History file to (re)create")
+    args = parser.parse_args()
+
+    try:
+        counts = convert_json(Path(args.data_dir), Path(args.output))
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(f"Wrote {counts['records']} attendance records over {counts['days']} days "
+          f"({counts['bytes']} bytes) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Shared in-process dataset cache.
+
+Every router reads the same JSON files from DATA_DIR. Instead of re-opening and
+re-parsing them on each request, the parsed form is kept in memory and only
+reloaded when the file's mtime or size changes.
+
+Async handlers load through aget / aget_derived, which parse in a worker thread
+so a slow json.load never blocks the event loop. Concurrent callers that need
+the same file version await one shared parse (single-flight) instead of each
+starting their own.
+"""
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import asyncio
+import json
+import os
+import threading
+
+# Get data directory path (ATTENDANCE_DATA_DIR points the whole app at another dataset)
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+DATA_DIR = Path(os.environ.get("ATTENDANCE_DATA_DIR") or BASE_DIR / "data")
+
+# Files whose contents make up the served dataset
+DATASET_FILES = ("employees.json", "projects.json", "attendance.json", "attendance_multi_day.json")
+
+
+class _CacheEntry:
+    """Parsed file contents plus the stat signature they were parsed from"""
+
+    __slots__ = ("signature", "data", "version", "derived")
+
+    def __init__(self, signature: Tuple[int, int], data: Any, version: int):
+        self.signature = signature
+        self.data = data
+        self.version = version
+        # Structures built from data (indexes etc.), dropped together with it on reload
+        self.derived: Dict[str, Any] = {}
+
+
+class DatasetCache:
+    """
+    Parse-once cache for the JSON files in a data directory.
+
+    Entries are validated against (mtime_ns, size) on every access, which costs a
+    single stat() call. Parsed data is shared between requests and must be
+    treated as read-only by callers.
+    """
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._lock = threading.Lock()
+        self._file_locks: Dict[str, threading.Lock] = {}
+        # (filename, derived key, signature) -> future of the load running in a worker thread
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.coalesced = 0
+
+    def _file_lock(self, filename: str) -> threading.Lock:
+        with self._lock:
+            lock = self._file_locks.get(filename)
+            if lock is None:
+                lock = self._file_locks[filename] = threading.Lock()
+            return lock
+
+    def _stat(self, filename: str) -> Tuple[int, int]:
+        st = os.stat(self.data_dir / filename)
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, filename: str) -> Any:
+        """Return the parsed contents of filename, reloading it if it changed on disk"""
+        signature = self._stat(filename)
+        entry = self._entries.get(filename)
+        if entry is not None and entry.signature == signature:
+            self.hits += 1
+            return entry.data
+
+        # Only one thread parses a given file; the others wait and reuse its result
+        with self._file_lock(filename):
+            signature = self._stat(filename)
+            entry = self._entries.get(filename)
+            if entry is not None and entry.signature == signature:
+                self.hits += 1
+                return entry.data
+
+            with open(self.data_dir / filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            if entry is None:
+                self.misses += 1
+                version = 1
+            else:
+                self.reloads += 1
+                version = entry.version + 1
+            self._entries[filename] = _CacheEntry(signature, data, version)
+            return data
+
+    def get_derived(self, filename: str, key: str, builder: Callable[[Any], Any]) -> Any:
+        """
+        Return builder(data) for the current version of filename.
+
+        The result is built once per file version and discarded when the file
+        is reloaded, so indexes never outlive the data they were built from.
+        """
+        data = self.get(filename)
+        entry = self._entries[filename]
+        if entry.data is data and key in entry.derived:
+            return entry.derived[key]
+        with self._file_lock(filename):
+            entry = self._entries[filename]
+            if key not in entry.derived:
+                entry.derived[key] = builder(entry.data)
+            return entry.derived[key]
+
+    def _is_current(self, filename: str, key: str = None) -> bool:
+        try:
+            signature = self._stat(filename)
+        except OSError:
+            return False
+        entry = self._entries.get(filename)
+        return entry is not None and entry.signature == signature and (key is None or key in entry.derived)
+
+    def _single_flight(self, flight: tuple, load: Callable[[], Any]) -> Awaitable[Any]:
+        """Run load in the default executor, sharing the pending result with concurrent callers"""
+        future = self._inflight.get(flight)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.get_running_loop().run_in_executor(None, load)
+            self._inflight[flight] = future
+            future.add_done_callback(lambda _: self._inflight.pop(flight, None))
+        # A cancelled waiter must not cancel the load the others are waiting for
+        return asyncio.shield(future)
+
+    async def aget(self, filename: str) -> Any:
+        """Like get, but a (re)load runs in a worker thread instead of on the event loop"""
+        if self._is_current(filename):
+            return self.get(filename)
+        return await self._single_flight((filename, None, self._stat(filename)), lambda: self.get(filename))
+
+    async def aget_derived(self, filename: str, key: str, builder: Callable[[Any], Any]) -> Any:
+        """Like get_derived, but loading and building run in a worker thread"""
+        if self._is_current(filename, key):
+            return self.get_derived(filename, key, builder)
+        return await self._single_flight((filename, key, self._stat(filename)),
+                                         lambda: self.get_derived(filename, key, builder))
+
+    def version(self, filename: str) -> int:
+        """Version counter of a loaded file (0 if it has not been loaded yet)"""
+        entry = self._entries.get(filename)
+        return entry.version if entry is not None else 0
+
+    def fingerprint(self, filenames=DATASET_FILES) -> str:
+        """
+        Cheap version string for the dataset built from the stat signatures of
+        the given files. Changes whenever any of them does.
+        """
+        parts = []
+        for filename in filenames:
+            try:
+                mtime_ns, size = self._stat(filename)
+                parts.append(f"{filename}:{mtime_ns}:{size}")
+            except OSError:
+                parts.append(f"{filename}:-")
+        return "|".join(parts)
+
+    def exists(self, filename: str) -> bool:
+        return (self.data_dir / filename).exists()
+
+    def invalidate(self, filename: str = None):
+        """Drop one cached file (or all of them) so the next access re-reads from disk"""
+        with self._lock:
+            if filename is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(filename, None)
+
+    def stats(self) -> dict:
+        """Hit/miss/reload counters and the currently cached files"""
+        lookups = self.hits + self.misses + self.reloads
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "files": {name: entry.version for name, entry in self._entries.items()},
+        }
+
+
+dataset_cache = DatasetCache(DATA_DIR)
+
@@ -0,0 +1,174 @@
+"""
+Columnar, integer-encoded view of a day's attendance records.
+
+Records arrive as dicts with "HH:MM" strings. Each day partition is converted
+once into parallel typed arrays (employee code, check-in/check-out minutes,
+office/building codes) together with derived columns (worked minutes with
+overnight handling, late-stay and late-arrival flags). Endpoints then filter and
+aggregate whole columns with compress/map/sum instead of parsing times per
+record per request.
+"""
+from array import array
+from itertools import compress
+from operator import and_, indexOf
+from typing import Iterable, List, Optional
+import threading
+
+# Sentinel for a missing or unparseable time
+MISSING = 0xFFFF
+MINUTES_PER_DAY = 24 * 60
+# Check-out at or after 20:00 counts as a late stay
+LATE_STAY_MINUTE = 20 * 60
+# Check-in after 09:00 counts as a late arrival
+SHIFT_START_MINUTE = 9 * 60
+
+
+def parse_minutes(value) -> int:
+    """Convert "HH:MM" to minutes since midnight, or MISSING"""
+    if not isinstance(value, str):
+        return MISSING
+    hours, sep, minutes = value.partition(":")
+    if not sep or not hours.isdigit() or not minutes.isdigit() or len(hours) > 2 or len(minutes) > 2:
+        return MISSING
+    h, m = int(hours), int(minutes)
+    if h > 23 or m > 59:
+        return MISSING
+    return h * 60 + m
+
+
+def format_minutes(minutes: int) -> str:
+    """Format a duration in minutes as "Xh Ym" """
+    return f"{minutes // 60}h {minutes % 60}m"
+
+
+class Interner:
+    """Maps strings to small dense integer codes (and back)"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self.codes.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(value)
+                    self.codes[value] = code
+        return code
+
+    def lookup(self, value) -> Optional[int]:
+        """Code of value if it has been interned, else None"""
+        return self.codes.get(value)
+
+    def table(self, values: Iterable) -> bytearray:
+        """Membership table indexed by code: 1 for codes of the given values"""
+        table = bytearray(len(self.values))
+        for value in values:
+            code = self.codes.get(value)
+            if code is not None:
+                table[code] = 1
+        return table
+
+
+# Process-wide dictionaries; codes are stable for the lifetime of the process
+employee_codes = Interner()
+office_codes = Interner()
+building_codes = Interner()
+
+
+class DayColumns:
+    """Parallel column arrays for one day of attendance records"""
+
+    __slots__ = (
+        "size", "employee", "checkin", "checkout", "office", "building",
+        "duration", "late_stay", "late_arrival", "late_rows",
+    )
+
+    def __init__(self, records: List[dict]):
+        self.size = len(records)
+        self.employee = array("I", [employee_codes.intern(r.get("employee_id")) for r in records])
+        self.checkin = array("H", [parse_minutes(r.get("checkin_time")) for r in records])
+        self.checkout = array("H", [parse_minutes(r.get("checkout_time")) for r in records])
+        self.office = array("H", [office_codes.intern(r.get("office", "")) for r in records])
+        self.building = array("H", [building_codes.intern(r.get("building", "")) for r in records])
+
+        # Derived columns, computed once for the whole day
+        self.duration = array("H", map(_duration, self.checkin, self.checkout))
+        self.late_stay = bytes(map(_is_late_stay, self.checkout))
+        self.late_arrival = bytes(map(_is_late_arrival, self.checkin))
+        self.late_rows = array("I", compress(range(self.size), self.late_stay))
+
+    @classmethod
+    def from_arrays(cls, employee, checkin, checkout, office, building, duration=None,
+                    late_stay=None, late_arrival=None) -> "DayColumns":
+        """
+        Wrap prebuilt columns (e.g. views into a mapped file) without copying
+        them; derived columns that are not given are computed.
+        """
+        columns = cls.__new__(cls)
+        columns.size = len(employee)
+        columns.employee = employee
+        columns.checkin = checkin
+        columns.checkout = checkout
+        columns.office = office
+        columns.building = building
+        columns.duration = duration if duration is not None else array("H", map(_duration, checkin, checkout))
+        columns.late_stay = late_stay if late_stay is not None else bytes(map(_is_late_stay, checkout))
+        columns.late_arrival = late_arrival if late_arrival is not None else bytes(map(_is_late_arrival, checkin))
+        columns.late_rows = array("I", compress(range(columns.size), columns.late_stay))
+        return columns
+
+    def mask_for(self, table: bytearray) -> bytes:
+        """Row mask for employees whose code is set in a membership table"""
+        if len(table) < len(employee_codes):
+            table = table + bytes(len(employee_codes) - len(table))
+        return bytes(map(table.__getitem__, self.employee))
+
+    def rows(self, mask: bytes) -> List[int]:
+        return list(compress(range(self.size), mask))
+
+    def total_minutes(self, mask: Optional[bytes] = None) -> int:
+        return sum(self.duration if mask is None else compress(self.duration, mask))
+
+    def late_stay_count(self, mask: Optional[bytes] = None) -> int:
+        return sum(self.late_stay if mask is None else compress(self.late_stay, mask))
+
+    def checked_out(self, mask: Optional[bytes] = None) -> bytes:
+        """Row mask of the records with a check-out time (open sessions have none yet), within mask if given"""
+        closed = bytes(checkout != MISSING for checkout in self.checkout)
+        return closed if mask is None else bytes(map(and_, closed, mask))
+
+    def row_of(self, employee_code: Optional[int]) -> Optional[int]:
+        """First row for an employee code, or None"""
+        if employee_code is None:
+            return None
+        try:
+            if isinstance(self.employee, array):
+                return self.employee.index(employee_code)
+            # Snapshot columns are memoryviews, which have no index()
+            return indexOf(self.employee, employee_code)
+        except ValueError:
+            return None
+
+
+def _duration(checkin: int, checkout: int) -> int:
+    # Unknown times count as zero hours worked
+    if checkin == MISSING or checkout == MISSING:
+        return 0
+    # Overnight checkout wraps past midnight
+    return (checkout - checkin) % MINUTES_PER_DAY
+
+
+def _is_late_stay(checkout: int) -> int:
+    return 1 if LATE_STAY_MINUTE <= checkout < MINUTES_PER_DAY else 0
+
+
+def _is_late_arrival(checkin: int) -> int:
+    return 1 if SHIFT_START_MINUTE < checkin < MINUTES_PER_DAY else 0
@@ -0,0 +1,132 @@
+"""
+Day partitions and the date-keyed index over the attendance files.
+
+attendance_multi_day.json is indexed once per file version into a
+date -> day partition map plus a sorted date array, so a day resolves with a
+dict lookup and date ranges / "latest" with a bisect instead of scanning the
+list of days on every request.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional
+
+from backend.data_store.columnar import DayColumns, employee_codes
+from backend.data_store.occupancy import Occupancy
+
+MULTI_DAY_FILE = "attendance_multi_day.json"
+SINGLE_DAY_FILE = "attendance.json"
+
+
+def normalize_attendance_data(attendance_data):
+    """Support two shapes for attendance data:
+    1) { "date": "...", "attendance_records": [ ... ] }
+    2) [ {...}, {...} ]  (top-level array)
+    Returns a tuple: (date_or_none, attendance_records_list)
+    """
+    # If attendance_data is a list, treat it as the records array
+    if isinstance(attendance_data, list):
+        return (None, attendance_data)
+
+    # If it's a dict, try to extract fields with fallbacks
+    if isinstance(attendance_data, dict):
+        records = attendance_data.get("attendance_records")
+        if records is None and any(isinstance(v, list) for v in attendance_data.values()):
+            # defensive: find the first list value and use it
+            for v in attendance_data.values():
+                if isinstance(v, list):
+                    records = v
+                    break
+        return (attendance_data.get("date"), records or [])
+
+    # fallback
+    return (None, [])
+
+
+class AttendanceDay:
+    """One day partition: the date, its attendance records and their columnar form"""
+
+    __slots__ = ("date", "records", "_columns", "_occupancy", "orders")
+
+    def __init__(self, date: Optional[str], records: List[dict], columns: Optional[DayColumns] = None):
+        self.date = date
+        self.records = records
+        self._columns = columns
+        self._occupancy = None
+        # Sorted row orders for paging, built on first use (see record_order.py)
+        self.orders = {}
+
+    @property
+    def columns(self) -> DayColumns:
+        """Columnar encoding of the records, built on first use"""
+        if self._columns is None:
+            self._columns = DayColumns(self.records)
+        return self._columns
+
+    @property
+    def occupancy(self) -> Occupancy:
+        """Present / inside counters for the day, built on first use"""
+        if self._occupancy is None:
+            self._occupancy = Occupancy.from_records(self.records)
+        return self._occupancy
+
+    def row_of_employee(self, employee_id: str) -> Optional[int]:
+        """Row index of an employee's record on this day, or None"""
+        return self.columns.row_of(employee_codes.lookup(employee_id))
+
+
+class DayIndex:
+    """date -> AttendanceDay map with a sorted date array for range and latest lookups"""
+
+    def __init__(self, days: Iterable[AttendanceDay], latest_date: Optional[str] = None):
+        self.by_date: Dict[str, AttendanceDay] = {}
+        undated = None
+        for day in days:
+            if day.date is None:
+                undated = day
+            else:
+                self.by_date[day.date] = day
+        self.dates: List[str] = sorted(self.by_date)
+        # An undated single-day file can only be served as "latest"
+        self._undated = undated
+        self.latest_date = latest_date if latest_date in self.by_date else (self.dates[-1] if self.dates else None)
+
+    @classmethod
+    def from_multi_day(cls, data) -> "DayIndex":
+        """Build from {"days": [...], "latest_date": ...} or a top-level list of days"""
+        if isinstance(data, dict):
+            days, latest_date = data.get("days") or [], data.get("latest_date")
+        elif isinstance(data, list):
+            days, latest_date = data, None
+        else:
+            days, latest_date = [], None
+        return cls(
+            (AttendanceDay(d.get("date"), d.get("attendance_records") or []) for d in days if d.get("date")),
+            latest_date,
+        )
+
+    @classmethod
+    def from_single_day(cls, data) -> "DayIndex":
+        """Build from attendance.json"""
+        file_date, records = normalize_attendance_data(data)
+        return cls([AttendanceDay(file_date, records)])
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def undated(self) -> Optional[AttendanceDay]:
+        """The day of an undated single-day file, if any"""
+        return self._undated
+
+    def get(self, date: str) -> Optional[AttendanceDay]:
+        return self.by_date.get(date)
+
+    def latest(self) -> Optional[AttendanceDay]:
+        if self.latest_date is not None:
+            return self.by_date[self.latest_date]
+        return self._undated
+
+    def range(self, start: Optional[str] = None, end: Optional[str] = None) -> List[AttendanceDay]:
+        """Days with start <= date <= end (inclusive, ISO dates compare as strings)"""
+        lo = bisect_left(self.dates, start) if start else 0
+        hi = bisect_right(self.dates, end) if end else len(self.dates)
+        return [self.by_date[d] for d in self.dates[lo:hi]]
@@ -0,0 +1,151 @@
+"""
+Indexes over employee master data.
+
+An EmployeeDirectory is built once per version of the employee list (the
+list a repository's get_employees() returns is replaced whenever the master
+data changes) and shared by every request until then:
+- by_id maps employee_id to the employee, replacing the per-request lookups;
+- each employee's Mode_of_work is normalized once;
+- inverted indexes map project_id, gender, work mode and office_location to a
+  bitmap (an int) of master-data positions. Combining filters is an AND of
+  bitmaps and counting is a popcount, so no request scans the employees.
+"""
+from typing import Dict, List, Optional
+import threading
+
+from backend.data_store.columnar import employee_codes
+
+if hasattr(int, "bit_count"):
+    def popcount(bits: int) -> int:
+        return bits.bit_count()
+else:  # Python < 3.10
+    def popcount(bits: int) -> int:
+        return bin(bits).count("1")
+
+INDEXED_FIELDS = ("project_id", "gender", "mode", "office_location")
+
+
+def bitmap(positions: List[int], size: int) -> int:
+    """Int bitmap with the given positions set"""
+    flags = bytearray((size + 7) // 8)
+    for position in positions:
+        flags[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(flags, "little")
+
+
+def work_mode(employee: dict) -> str:
+    """Normalized Mode_of_work: "WFH", or "WFO" for anything else (including missing)"""
+    mode = employee.get("Mode_of_work", "WFO")
+    if isinstance(mode, str) and mode.upper().strip() == "WFH":
+        return "WFH"
+    return "WFO"
+
+
+class EmployeeDirectory:
+    """Lookup and inverted indexes for one version of the employee list"""
+
+    def __init__(self, employees: List[dict]):
+        self.employees = employees
+        self.by_id: Dict[str, dict] = {}
+        self.modes: Dict[str, str] = {}
+        self.all = (1 << len(employees)) - 1
+        # Derived per bitmap on first use
+        self._codes: Dict[int, List[int]] = {}
+        self._tables: Dict[int, bytearray] = {}
+        self._fields: Dict[str, Dict[int, object]] = {}
+        self._lock = threading.Lock()
+
+        identified = []
+        groups: Dict[str, Dict[str, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+        for position, employee in enumerate(employees):
+            employee_id = employee.get("employee_id")
+            mode = work_mode(employee)
+            if employee_id:
+                identified.append(position)
+                self.by_id[employee_id] = employee
+                self.modes[employee_id] = mode
+                employee_codes.intern(employee_id)
+            values = (employee.get("project_id"), employee.get("gender"), mode, employee.get("office_location"))
+            for field, value in zip(INDEXED_FIELDS, values):
+                if value is not None:
+                    groups[field].setdefault(value, []).append(position)
+
+        size = len(employees)
+        # Positions of employees that have an employee_id
+        self.identified = bitmap(identified, size)
+        self.index: Dict[str, Dict[str, int]] = {
+            field: {value: bitmap(positions, size) for value, positions in values.items()}
+            for field, values in groups.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.employees)
+
+    def get(self, employee_id: str) -> Optional[dict]:
+        return self.by_id.get(employee_id)
+
+    def select(self, **filters) -> int:
+        """Bitmap of the employees matching every field=value filter (None values are ignored)"""
+        bits = self.all
+        for field, value in filters.items():
+            if value is not None:
+                bits &= self.index[field].get(value, 0)
+        return bits
+
+    def count(self, bits: int) -> int:
+        return popcount(bits)
+
+    def positions(self, bits: int) -> List[int]:
+        """Set positions of a bitmap, in master-data order"""
+        return [i for i, bit in enumerate(reversed(bin(bits)[2:])) if bit == "1"]
+
+    def members(self, bits: int) -> List[dict]:
+        employees = self.employees
+        return [employees[i] for i in self.positions(bits)]
+
+    def ids(self, bits: int) -> List[str]:
+        """Employee ids of a bitmap's identified employees, in master-data order"""
+        return [e["employee_id"] for e in self.members(bits & self.identified)]
+
+    def codes(self, bits: int) -> List[int]:
+        """Interned employee codes of a bitmap's identified employees (one per position), built once per bitmap"""
+        codes = self._codes.get(bits)
+        if codes is None:
+            codes = [employee_codes.lookup(employee_id) for employee_id in self.ids(bits)]
+            with self._lock:
+                self._codes[bits] = codes
+        return codes
+
+    def by_code(self, field: str) -> Dict[int, object]:
+        """Employee code -> the employee's value of a field, built once per field"""
+        values = self._fields.get(field)
+        if values is None:
+            values = {employee_codes.lookup(employee_id): employee.get(field) for employee_id, employee in self.by_id.items()}
+            with self._lock:
+                self._fields[field] = values
+        return values
+
+    def code_table(self, bits: int) -> bytearray:
+        """Membership table by employee code for a bitmap (see DayColumns.mask_for), built once per bitmap"""
+        table = self._tables.get(bits)
+        if table is None:
+            table = employee_codes.table(self.ids(bits))
+            with self._lock:
+                self._tables[bits] = table
+        return table
+
+
+_directory: Optional[EmployeeDirectory] = None
+_directory_lock = threading.Lock()
+
+
+def employee_directory(employees: List[dict]) -> EmployeeDirectory:
+    """The directory for an employee list, rebuilt only when a different list is passed"""
+    global _directory
+    directory = _directory
+    if directory is not None and directory.employees is employees:
+        return directory
+    with _directory_lock:
+        if _directory is None or _directory.employees is not employees:
+            _directory = EmployeeDirectory(employees)
+        return _directory
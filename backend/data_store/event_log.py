@@ -0,0 +1,199 @@
+"""
+Append-only write-ahead log for attendance events.
+
+Events are encoded as one JSON object per line. A single writer thread drains
+every append that is queued while the previous fsync is in flight and commits
+them with one write + one fsync (group commit), so durable ingest costs one
+disk flush per batch instead of one per event, and never rewrites the data files.
+
+A batch whose write or fsync fails is cut off the file again before its
+futures fail, so nothing a client was told failed is replayed, and the next
+batch never starts on a torn line. A torn tail left by a crash is cut off when
+the log is opened. If the rollback itself fails, the writer stops for good.
+"""
+from concurrent.futures import Future
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional
+import json
+import os
+import queue
+import threading
+
+from backend.data_store.cache import DATA_DIR
+
+EVENTS_DIR = DATA_DIR / "events"
+WAL_FILE = EVENTS_DIR / "attendance_events.wal"
+
+_STOP = object()
+
+
+class EventLog:
+    """Durable NDJSON event log with group-commit fsync batching"""
+
+    def __init__(self, path: Path, max_batch: int = 4096, fsync: bool = True):
+        self.path = Path(path)
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.commits = 0
+        self.events_written = 0
+        self.failures = 0
+        # Set when a failed batch could not be rolled back; no further appends are accepted
+        self.broken: Optional[BaseException] = None
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            # (Re)start the writer if it is not running
+            if self._thread is None or not self._thread.is_alive():
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+                self._thread.start()
+
+    def append(self, events: List[dict]) -> Future:
+        """
+        Queue events for the next group commit.
+        The returned future resolves once they are written and fsynced.
+        """
+        future = Future()
+        if self.broken is not None:
+            future.set_exception(RuntimeError("Event log writer stopped"))
+            return future
+        self._ensure_started()
+        payload = b"".join(
+            json.dumps(event, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+            for event in events
+        )
+        self._queue.put((payload, len(events), future))
+        return future
+
+    def _run(self):
+        f = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    return
+                # Everything that queued up behind the previous fsync goes into this commit
+                batch = [item]
+                stop = False
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+
+                try:
+                    if f is None:
+                        f = self._open()
+                    self._commit(f, b"".join(payload for payload, _, _ in batch))
+                except Exception as exc:
+                    # Fail this batch and reopen the log for the next one
+                    self.failures += 1
+                    for _, _, future in batch:
+                        future.set_exception(exc)
+                    if f is not None:
+                        try:
+                            f.close()
+                        except OSError:
+                            pass
+                        f = None
+                    if self.broken is not None:
+                        return
+                else:
+                    self.commits += 1
+                    self.events_written += sum(count for _, count, _ in batch)
+                    for _, _, future in batch:
+                        future.set_result(None)
+                if stop:
+                    return
+        finally:
+            if f is not None:
+                f.close()
+            # Nothing may be left waiting on a writer that is gone
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    item[2].set_exception(RuntimeError("Event log writer stopped"))
+
+    def _open(self) -> BinaryIO:
+        # Unbuffered, so a failed write leaves nothing behind to be flushed later
+        f = open(self.path, "ab", buffering=0)
+        try:
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                with open(self.path, "rb") as tail:
+                    tail.seek(max(end - 65536, 0))
+                    data = tail.read()
+                if not data.endswith(b"\n"):
+                    # Torn line from a crash: cut it off so the next batch starts on a fresh line
+                    newline = data.rfind(b"\n")
+                    if newline < 0 and end > len(data):
+                        raise OSError(f"Event log {self.path} ends in an over-long torn line")
+                    f.truncate(end - len(data) + newline + 1)
+        except BaseException:
+            f.close()
+            raise
+        return f
+
+    def _commit(self, f: BinaryIO, data: bytes):
+        """Write and fsync one batch, or cut whatever part of it reached the file and raise"""
+        start = f.seek(0, os.SEEK_END)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[f.write(view):]
+            if self.fsync:
+                os.fsync(f.fileno())
+        except BaseException:
+            try:
+                f.truncate(start)
+                if self.fsync:
+                    os.fsync(f.fileno())
+            except OSError as exc:
+                # Part of a failed batch may stay on disk: appending after it would replay it
+                self.broken = exc
+            raise
+
+    def replay(self) -> Iterator[dict]:
+        """Yield committed events in log order, skipping a torn trailing line"""
+        if not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def close(self):
+        """Flush pending appends and stop the writer thread"""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "commits": self.commits,
+            "events": self.events_written,
+            "avg_batch": round(self.events_written / self.commits, 2) if self.commits else 0.0,
+            "pending": self._queue.qsize(),
+            "failed_commits": self.failures,
+            "stopped": self.broken is not None,
+        }
+
+
+event_log = EventLog(WAL_FILE)
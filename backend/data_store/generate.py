@@ -0,0 +1,413 @@
+"""
+Deterministic synthetic attendance data for load testing.
+
+Usage:
+    python -m backend.data_store.generate --seed 7 --employees 50000 \\
+        --start 2024-01-01 --end 2025-12-31 --workers 8 --output-dir /tmp/load
+
+Everything is drawn from random.Random instances seeded from (seed, what), so a
+given seed and set of parameters always produces the same bytes. This holds
+for any --workers: master data is seeded once, and every day has its own
+generator seeded by its date. Worker processes generate days in parallel, and
+the parent writes them in date order to each requested output format as they
+arrive, so memory use does not grow with the date range.
+
+Without --employees the existing employees.json / projects.json in --data-dir
+are used and only attendance is generated. Master data in data/ is never
+replaced unless --force is given.
+"""
+from datetime import date as date_cls, timedelta
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import argparse
+import json
+import os
+import random
+import sqlite3
+
+from backend.data_store.binary_history import BINARY_FILE, HistoryWriter, pack_rows
+from backend.data_store.cache import DATA_DIR
+from backend.data_store.day_index import MULTI_DAY_FILE
+from backend.data_store.partitions import PARTITIONS_DIR, PartitionWriter, encode_day
+from backend.data_store.sqlite_repository import INSERT_RECORD_SQL, create_schema, insert_employees, insert_projects
+
+FIRST_NAMES = (
+    "Aarav", "Aditi", "Amit", "Ananya", "Arjun", "Deepa", "Divya", "Karan", "Kavita", "Lakshmi",
+    "Manoj", "Meera", "Neeraj", "Nisha", "Pooja", "Priya", "Rahul", "Ravi", "Rohan", "Sanjay",
+    "Shreya", "Sneha", "Suresh", "Tanvi", "Varun", "Vikram",
+)
+FEMALE_NAMES = {"Aditi", "Ananya", "Deepa", "Divya", "Kavita", "Lakshmi", "Meera", "Nisha", "Pooja",
+                "Priya", "Shreya", "Sneha", "Tanvi"}
+LAST_NAMES = (
+    "Bansal", "Gupta", "Iyer", "Joshi", "Kulkarni", "Mehta", "Menon", "Nair", "Patel", "Rao",
+    "Reddy", "Sharma", "Singh", "Verma",
+)
+PROJECT_AREAS = ("Pharma", "Retail", "Banking", "Insurance", "Logistics", "Telecom", "Energy", "Media")
+PROJECT_KINDS = ("Analytics", "Platform Upgrade", "Data Migration", "Portal", "Automation", "Modernization")
+
+# Checkout minute at which a stay counts as late (20:00), and the latest
+# checkout that is still on the same day
+LATE_START = 20 * 60
+DAY_END = 24 * 60 - 1
+
+
+class GeneratorConfig:
+    """Parameters of one generation run (everything that affects the output)"""
+
+    def __init__(self, seed: int, start: str, end: str, wfo_presence: float = 0.90,
+                 wfh_presence: float = 0.86, presence_jitter: float = 0.06,
+                 weekend_presence: float = 1.0, late_stay: float = 0.39,
+                 late_mean_minutes: float = 75.0, overnight: float = 0.03):
+        self.seed = seed
+        self.start = start
+        self.end = end
+        self.wfo_presence = wfo_presence
+        self.wfh_presence = wfh_presence
+        self.presence_jitter = presence_jitter
+        self.weekend_presence = weekend_presence
+        self.late_stay = late_stay
+        self.late_mean_minutes = late_mean_minutes
+        self.overnight = overnight
+
+    def dates(self) -> List[str]:
+        first = date_cls.fromisoformat(self.start)
+        last = date_cls.fromisoformat(self.end)
+        return [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+    def rng(self, *scope) -> random.Random:
+        # String seeds are hashed with SHA-512, so they do not depend on PYTHONHASHSEED
+        return random.Random(":".join(str(part) for part in (self.seed, *scope)))
+
+
+def generate_projects(config: GeneratorConfig, count: int) -> List[dict]:
+    rng = config.rng("projects")
+    projects = []
+    for i in range(count):
+        client = rng.random() < 0.6
+        projects.append({
+            "project_id": f"P{101 + i}",
+            "project_name": f"{rng.choice(PROJECT_AREAS)} {rng.choice(PROJECT_KINDS)}",
+            "project_manager": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "delivery_lead": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "project_type": "Client" if client else "Internal",
+            "requires_night_shift": client and rng.random() < 0.5
+        })
+    return projects
+
+
+def generate_employees(config: GeneratorConfig, count: int, projects: Sequence[dict],
+                       offices: Sequence[str], wfh_share: float) -> List[dict]:
+    rng = config.rng("employees")
+    first_day = date_cls.fromisoformat(config.start)
+    employees = []
+    for i in range(count):
+        first_name = rng.choice(FIRST_NAMES)
+        joined = first_day - timedelta(days=rng.randint(30, 8 * 365))
+        employees.append({
+            "employee_id": f"E{1001 + i}",
+            "name": f"{first_name} {rng.choice(LAST_NAMES)}",
+            "gender": "Female" if first_name in FEMALE_NAMES else "Male",
+            "date_of_joining": joined.isoformat(),
+            "project_id": projects[i % len(projects)]["project_id"] if projects else "",
+            "office_location": rng.choice(offices),
+            "Mode_of_work": "WFH" if rng.random() < wfh_share else "WFO"
+        })
+    return employees
+
+
+def roster(config: GeneratorConfig, employees: Sequence[dict], offices: Sequence[str]) -> List[tuple]:
+    """Per-employee generation inputs: (employee_id, office, building, is_wfh, late_factor)"""
+    rng = config.rng("roster")
+    buildings = {office: f"Tower {chr(ord('A') + i % 26)}" for i, office in enumerate(offices)}
+    rows = []
+    for employee in employees:
+        office = employee.get("office_location") or offices[0]
+        building = buildings.get(office) or f"Tower {chr(ord('A') + len(buildings) % 26)}"
+        is_wfh = str(employee.get("Mode_of_work", "WFO")).upper().strip() == "WFH"
+        # Some people stay late far more often than others
+        late_factor = min(rng.lognormvariate(0.0, 0.5), 2.5)
+        rows.append((employee["employee_id"], office, building, is_wfh, late_factor))
+    return rows
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def generate_day(config: GeneratorConfig, day: str, people: Sequence[tuple]) -> List[dict]:
+    """Attendance records for one date; depends only on the config, the date and the roster"""
+    rng = config.rng("day", day)
+    weekend = date_cls.fromisoformat(day).weekday() >= 5
+    scale = config.weekend_presence if weekend else 1.0
+    jitter = config.presence_jitter
+    wfo_ratio = min(max(config.wfo_presence + rng.uniform(-jitter, jitter), 0.0), 1.0) * scale
+    wfh_ratio = min(max(config.wfh_presence + rng.uniform(-jitter, jitter), 0.0), 1.0) * scale
+    late_ratio = min(max(config.late_stay + rng.uniform(-jitter, jitter), 0.0), 1.0)
+
+    records = []
+    for employee_id, office, building, is_wfh, late_factor in people:
+        if rng.random() >= (wfh_ratio if is_wfh else wfo_ratio):
+            continue
+        # Check-in between 08:30 and 09:59
+        checkin = 8 * 60 + 30 + rng.randrange(90)
+        if rng.random() < min(late_ratio * late_factor, 0.95):
+            if rng.random() < config.overnight:
+                # Overnight: checks out after midnight (00:00 - 02:59)
+                checkout = rng.randrange(3 * 60)
+            else:
+                checkout = min(LATE_START + int(rng.expovariate(1.0 / config.late_mean_minutes)), DAY_END)
+        else:
+            # Normal checkout between 17:00 and 18:59
+            checkout = 17 * 60 + rng.randrange(120)
+        records.append({
+            "date": day,
+            "employee_id": employee_id,
+            "checkin_time": _hhmm(checkin),
+            "checkout_time": _hhmm(checkout),
+            "building": building,
+            "office": office
+        })
+    return records
+
+
+class JsonWriter:
+    """attendance_multi_day.json, written one day at a time"""
+
+    def __init__(self, output_dir: Path, employees: List[dict], projects: List[dict]):
+        self.path = output_dir / MULTI_DAY_FILE
+        self.tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.file = open(self.tmp_path, "w", encoding="utf-8")
+        self.file.write('{"days": [')
+        self.latest = None
+
+    @staticmethod
+    def encode(day: str, records: List[dict]) -> str:
+        return json.dumps({"date": day, "attendance_records": records}, ensure_ascii=False)
+
+    def write(self, day: str, encoded: str):
+        self.file.write(",\n" if self.latest else "\n")
+        self.file.write(encoded)
+        self.latest = day
+
+    def close(self):
+        self.file.write(f'\n], "latest_date": {json.dumps(self.latest)}}}\n')
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+
+class SqliteWriter:
+    """attendance.db in the schema served by ATTENDANCE_STORAGE=sqlite"""
+
+    def __init__(self, output_dir: Path, employees: List[dict], projects: List[dict]):
+        self.path = output_dir / "attendance.db"
+        self.tmp_path = self.path.with_name(self.path.name + ".tmp")
+        if self.tmp_path.exists():
+            self.tmp_path.unlink()
+        self.conn = sqlite3.connect(self.tmp_path)
+        create_schema(self.conn)
+        insert_employees(self.conn, employees)
+        insert_projects(self.conn, projects)
+
+    @staticmethod
+    def encode(day: str, records: List[dict]) -> List[tuple]:
+        return [(day, r["employee_id"], r["checkin_time"], r["checkout_time"], r["building"], r["office"])
+                for r in records]
+
+    def write(self, day: str, rows: List[tuple]):
+        self.conn.executemany(INSERT_RECORD_SQL, rows)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.execute("ANALYZE")
+        self.conn.close()
+        os.replace(self.tmp_path, self.path)
+
+
+class BinaryWriter:
+    """attendance.bin in the format served by ATTENDANCE_STORAGE=binary"""
+
+    def __init__(self, output_dir: Path, employees: List[dict], projects: List[dict]):
+        self.history = HistoryWriter(output_dir / BINARY_FILE)
+        self.employees = employees
+        self.projects = projects
+        self.latest = None
+
+    @staticmethod
+    def encode(day: str, records: List[dict]) -> List[tuple]:
+        return pack_rows(records)
+
+    def write(self, day: str, rows: List[tuple]):
+        self.history.add_day(day, rows)
+        self.latest = day
+
+    def close(self):
+        self.history.close(self.employees, self.projects, self.latest)
+
+
+class PartitionedWriter:
+    """attendance/<date>.json partitions plus manifest.json, as served by ATTENDANCE_STORAGE=partitioned"""
+
+    def __init__(self, output_dir: Path, employees: List[dict], projects: List[dict]):
+        self.partitions = PartitionWriter(output_dir / PARTITIONS_DIR)
+        self.latest = None
+
+    @staticmethod
+    def encode(day: str, records: List[dict]) -> Tuple[str, int]:
+        return encode_day(day, records), len(records)
+
+    def write(self, day: str, encoded: Tuple[str, int]):
+        self.partitions.write_day(day, *encoded)
+        self.latest = day
+
+    def close(self):
+        self.partitions.close(self.latest)
+
+
+# Output format -> writer. encode() runs in the worker processes, write() in the parent, in date order
+WRITERS = {
+    "json": JsonWriter,
+    "sqlite": SqliteWriter,
+    "binary": BinaryWriter,
+    "partitioned": PartitionedWriter,
+}
+FORMATS = tuple(WRITERS)
+
+
+# Worker process state, set once by the pool initializer
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(config: GeneratorConfig, people: List[tuple], formats: Sequence[str]):
+    _worker["config"] = config
+    _worker["people"] = people
+    _worker["formats"] = formats
+
+
+def _generate(day: str) -> tuple:
+    """(date, record count, late stays, {format: encoded day}) for one date"""
+    records = generate_day(_worker["config"], day, _worker["people"])
+    late = sum(1 for r in records if r["checkout_time"] >= "20:00")
+    return day, len(records), late, {f: WRITERS[f].encode(day, records) for f in _worker["formats"]}
+
+
+def generate_days(config: GeneratorConfig, people: List[tuple], formats: Sequence[str],
+                  workers: int = 1) -> Iterator[tuple]:
+    """Generated and encoded days in date order, across worker processes when workers > 1"""
+    dates = config.dates()
+    if workers <= 1:
+        _init_worker(config, people, formats)
+        for day in dates:
+            yield _generate(day)
+        return
+    with Pool(workers, initializer=_init_worker, initargs=(config, people, formats)) as pool:
+        # imap keeps date order; a few days per task amortizes the IPC
+        yield from pool.imap(_generate, dates, chunksize=4)
+
+
+def write_master_data(output_dir: Path, employees: List[dict], projects: List[dict]):
+    for filename, key, rows in (("employees.json", "employees", employees), ("projects.json", "projects", projects)):
+        tmp_path = output_dir / f"{filename}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({key: rows}, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        os.replace(tmp_path, output_dir / filename)
+
+
+def run(config: GeneratorConfig, output_dir: Path, formats: Sequence[str], workers: int,
+        employees: List[dict], projects: List[dict], offices: Sequence[str]) -> dict:
+    """Generate every day of the config into the requested formats; returns counts"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    writers = {f: WRITERS[f](output_dir, employees, projects) for f in formats}
+
+    people = roster(config, employees, offices)
+    days = records = late = 0
+    for day, count, late_count, encoded in generate_days(config, people, formats, workers):
+        for name, writer in writers.items():
+            writer.write(day, encoded[name])
+        days += 1
+        records += count
+        late += late_count
+    for writer in writers.values():
+        writer.close()
+    return {"days": days, "records": records, "late_stays": late}
+
+
+def _load_master_data(data_dir: Path) -> Tuple[List[dict], List[dict]]:
+    with open(data_dir / "employees.json", "r", encoding="utf-8") as f:
+        employees = json.load(f).get("employees", [])
+    projects_path = data_dir / "projects.json"
+    projects = []
+    if projects_path.exists():
+        with open(projects_path, "r", encoding="utf-8") as f:
+            projects = json.load(f).get("projects", [])
+    return employees, projects
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate deterministic synthetic attendance data")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; the same seed gives the same bytes")
+    parser.add_argument("--start", default="2025-11-20", help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", default="2025-12-31", help="Last date (YYYY-MM-DD)")
+    parser.add_argument("--employees", type=int, help="Generate this many employees (default: use employees.json)")
+    parser.add_argument("--projects", type=int, default=2, help="Projects to generate with --employees")
+    parser.add_argument("--offices", default="Bengaluru,Hyderabad", help="Comma-separated office locations")
+    parser.add_argument("--wfh-share", type=float, default=0.3, help="Share of generated employees working from home")
+    parser.add_argument("--wfo-presence", type=float, default=0.90, help="Mean daily presence of WFO employees")
+    parser.add_argument("--wfh-presence", type=float, default=0.86, help="Mean daily presence of WFH employees")
+    parser.add_argument("--presence-jitter", type=float, default=0.06, help="Day-to-day variation of the ratios")
+    parser.add_argument("--weekend-presence", type=float, default=1.0, help="Presence multiplier on Saturdays and Sundays")
+    parser.add_argument("--late-stay", type=float, default=0.39, help="Mean share of present employees checking out after 20:00")
+    parser.add_argument("--late-mean-minutes", type=float, default=75.0, help="Mean minutes past 20:00 of a late checkout")
+    parser.add_argument("--overnight", type=float, default=0.03, help="Share of late stays that check out after midnight")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["json"], dest="formats", help="Output formats")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes generating days in parallel")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Where to read employees.json without --employees")
+    parser.add_argument("--output-dir", default=str(DATA_DIR), help="Where to write the generated files")
+    parser.add_argument("--force", action="store_true", help="Allow replacing employees.json / projects.json in data/")
+    args = parser.parse_args(argv)
+
+    try:
+        config = GeneratorConfig(
+            args.seed, date_cls.fromisoformat(args.start).isoformat(), date_cls.fromisoformat(args.end).isoformat(),
+            args.wfo_presence, args.wfh_presence, args.presence_jitter, args.weekend_presence,
+            args.late_stay, args.late_mean_minutes, args.overnight
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    if config.start > config.end:
+        parser.error(f"--start {config.start} is after --end {config.end}")
+    offices = [o.strip() for o in args.offices.split(",") if o.strip()]
+    if not offices:
+        parser.error("--offices must name at least one office")
+
+    output_dir = Path(args.output_dir)
+    writes_master_data = args.employees is not None or output_dir.resolve() != Path(args.data_dir).resolve()
+    if writes_master_data and output_dir.resolve() == DATA_DIR.resolve() and not args.force:
+        existing = [name for name in ("employees.json", "projects.json") if (output_dir / name).exists()]
+        if existing:
+            parser.error(f"refusing to overwrite {', '.join(existing)} in {output_dir}; "
+                         "pass another --output-dir, or --force to replace the bundled master data")
+
+    if args.employees is not None:
+        projects = generate_projects(config, args.projects)
+        employees = generate_employees(config, args.employees, projects, offices, args.wfh_share)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        write_master_data(output_dir, employees, projects)
+    else:
+        employees, projects = _load_master_data(Path(args.data_dir))
+        if output_dir.resolve() != Path(args.data_dir).resolve():
+            output_dir.mkdir(parents=True, exist_ok=True)
+            write_master_data(output_dir, employees, projects)
+        # The --offices values come first so their buildings keep their letters; offices
+        # only found in master data are appended after them
+        offices = list(dict.fromkeys([*offices, *(e.get("office_location") for e in employees if e.get("office_location"))]))
+
+    counts = run(config, output_dir, args.formats, max(args.workers, 1), employees, projects, offices)
+    print(f"Generated {counts['records']} records ({counts['late_stays']} late stays) for "
+          f"{len(employees)} employees over {counts['days']} days ({config.start} to {config.end}) "
+          f"into {output_dir} as {', '.join(args.formats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+One-shot importer from the JSON files in data/ into a SQLite database.
+
+Usage:
+    python -m backend.data_store.import_json [--data-dir data] [--db data/attendance.db]
+
+Then start the API with ATTENDANCE_STORAGE=sqlite (and ATTENDANCE_DB if the
+database is not at data/attendance.db).
+"""
+from pathlib import Path
+import argparse
+import os
+import sqlite3
+
+from backend.data_store.cache import DATA_DIR, DatasetCache
+from backend.data_store.day_index import DayIndex, MULTI_DAY_FILE, SINGLE_DAY_FILE
+from backend.data_store.sqlite_repository import create_schema, insert_employees, insert_projects, insert_records
+
+
+def import_json(data_dir: Path, db_path: Path) -> dict:
+    """Rebuild db_path from the JSON files in data_dir and return row counts"""
+    files = DatasetCache(data_dir)
+    if files.exists(MULTI_DAY_FILE):
+        index = DayIndex.from_multi_day(files.get(MULTI_DAY_FILE))
+    elif files.exists(SINGLE_DAY_FILE):
+        index = DayIndex.from_single_day(files.get(SINGLE_DAY_FILE))
+    else:
+        index = DayIndex([])
+    if index.undated is not None and index.undated.records:
+        # Rows are stored by date; refuse rather than import an empty database
+        raise ValueError(f"{SINGLE_DAY_FILE} has no \"date\"; add one before importing")
+
+    # Build into a temporary file and swap it in, so readers never see a half-written database
+    tmp_path = db_path.with_name(db_path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    conn = sqlite3.connect(tmp_path)
+    try:
+        create_schema(conn)
+        with conn:
+            insert_employees(conn, files.get("employees.json").get("employees", []))
+            insert_projects(conn, files.get("projects.json").get("projects", []))
+            for day in index.range():
+                insert_records(conn, day.date, day.records)
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("employees", "projects", "attendance")
+        }
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    counts["days"] = len(index)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import the JSON data files into a SQLite database")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Directory with the JSON data files")
+    parser.add_argument("--db", default=str(DATA_DIR / "attendance.db"), help="SQLite database to (re)create")
+    args = parser.parse_args()
+
+    try:
+        counts = import_json(Path(args.data_dir), Path(args.db))
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(f"Imported {counts['employees']} employees, {counts['projects']} projects, "
+          f"{counts['attendance']} attendance records over {counts['days']} days into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
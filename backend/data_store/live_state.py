@@ -0,0 +1,200 @@
+"""
+In-memory attendance state built from ingested check-in/check-out events.
+
+Each event is folded into a per-date, per-employee record in the same shape as
+the records in attendance_multi_day.json, so ingested days can be served by the
+existing endpoints. The state is rebuilt from the write-ahead log on startup.
+Ingested batches are folded in the order the log commits them, so the live
+state always matches what a replay rebuilds. Folding happens on the event
+loop while readers run in worker threads (exports, rollups, /metrics), so
+both sides hold a lock, and readers only ever get copies.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+import asyncio
+import threading
+
+from backend.data_store.event_log import EventLog, event_log
+from backend.data_store.occupancy import Occupancy, is_inside
+
+ENTRY = "entry"
+EXIT = "exit"
+
+
+class LiveAttendance:
+    """Per-day attendance records folded from entry/exit events"""
+
+    def __init__(self, log: EventLog):
+        self.log = log
+        self._days: Dict[str, Dict[str, dict]] = {}
+        # Occupancy of the live records, kept in step with every fold
+        self._occupancy: Dict[str, Occupancy] = {}
+        # Per-date change counters, and a global one for "anything changed"
+        self._day_versions: Dict[str, int] = {}
+        self.version = 0
+        self._replayed = False
+        self._replay_lock = threading.Lock()
+        # Guards _days, _occupancy and _day_versions between folds and readers
+        self._lock = threading.Lock()
+        # Called with the (date, record) pairs touched by each applied batch
+        self._listeners: List[Callable[[List[Tuple[str, dict]]], None]] = []
+
+    @property
+    def replayed(self) -> bool:
+        return self._replayed
+
+    def ensure_replayed(self):
+        """Rebuild state from the write-ahead log once per process"""
+        if self._replayed:
+            return
+        with self._replay_lock:
+            if self._replayed:
+                return
+            with self._lock:
+                for event in self.log.replay():
+                    self._fold(event)
+            self._replayed = True
+
+    def add_listener(self, listener: Callable[[List[Tuple[str, dict]]], None]):
+        """Register a callback for records changed by applied (not replayed) events (given as copies)"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[List[Tuple[str, dict]]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    async def ingest(self, events: List[dict]):
+        """
+        Durably append events to the log, then fold them in. Raises what the
+        append raised (the events are then not applied).
+        """
+        loop = asyncio.get_running_loop()
+        future = self.log.append(events)
+
+        def committed(done):
+            # Runs on the writer thread in commit order (or here, if already done);
+            # call_soon_threadsafe keeps that order on the loop
+            if done.exception() is None:
+                loop.call_soon_threadsafe(self.apply, events)
+
+        # Registered before wrap_future's callback, so the events are applied before the await returns
+        future.add_done_callback(committed)
+        await asyncio.wrap_future(future)
+
+    def apply(self, events: List[dict]):
+        """Fold already-committed events into the in-memory day state"""
+        self.ensure_replayed()
+        changed = {}
+        with self._lock:
+            for event in events:
+                day, record = self._fold(event)
+                # One entry per touched record, in its final state
+                changed[id(record)] = (day, dict(record))
+        changed = list(changed.values())
+        for listener in self._listeners:
+            listener(changed)
+
+    def _fold(self, event: dict) -> Tuple[str, dict]:
+        timestamp = datetime.fromisoformat(event["timestamp"])
+        day = timestamp.date().isoformat()
+        time_str = timestamp.strftime("%H:%M")
+        employee_id = event["employee_id"]
+
+        if event["event_type"] == EXIT:
+            record = self._days.get(day, {}).get(employee_id)
+            if record is None:
+                # Overnight stay: the exit closes yesterday's open record
+                previous = (timestamp.date() - timedelta(days=1)).isoformat()
+                open_record = self._days.get(previous, {}).get(employee_id)
+                if open_record is not None and open_record.get("checkout_time") is None:
+                    record, day = open_record, previous
+            if record is None:
+                # Exit without a matching entry: record it with an unknown check-in
+                record = self._new_record(day, employee_id, event)
+            else:
+                self._occupancy[day].remove(record)
+            record["checkout_time"] = time_str
+        else:
+            record = self._days.get(day, {}).get(employee_id)
+            if record is None:
+                record = self._new_record(day, employee_id, event)
+                record["checkin_time"] = time_str
+            else:
+                self._occupancy[day].remove(record)
+                if record.get("checkin_time") is None or time_str < record["checkin_time"]:
+                    record["checkin_time"] = time_str
+                # Re-entry after an exit: the employee is inside again. An entry from
+                # before the exit (retried or reordered delivery) keeps the checkout.
+                checkout = record.get("checkout_time")
+                if checkout is not None and time_str > checkout:
+                    record["checkout_time"] = None
+
+        self._occupancy.setdefault(day, Occupancy()).add(record)
+
+        self._day_versions[day] = self._day_versions.get(day, 0) + 1
+        self.version += 1
+        return day, record
+
+    def _new_record(self, day: str, employee_id: str, event: dict) -> dict:
+        record = {
+            "date": day,
+            "employee_id": employee_id,
+            "checkin_time": None,
+            "checkout_time": None,
+            "building": event.get("building") or "",
+            "office": event.get("office") or "",
+        }
+        self._days.setdefault(day, {})[employee_id] = record
+        return record
+
+    def dates(self) -> List[str]:
+        self.ensure_replayed()
+        with self._lock:
+            return sorted(self._days)
+
+    def day_version(self, date: str) -> int:
+        return self._day_versions.get(date, 0)
+
+    def open_records(self) -> List[Tuple[str, dict]]:
+        """(date, record copy) for every live record with a check-in and no check-out"""
+        self.ensure_replayed()
+        with self._lock:
+            return [
+                (date, dict(record))
+                for date, records in self._days.items()
+                for record in records.values()
+                if is_inside(record)
+            ]
+
+    def records(self, date: str) -> List[dict]:
+        """Copies of the live records for a date (safe to hand out to readers)"""
+        self.ensure_replayed()
+        with self._lock:
+            return [dict(r) for r in self._days.get(date, {}).values()]
+
+    def employee_ids(self, date: str) -> List[str]:
+        self.ensure_replayed()
+        with self._lock:
+            return list(self._days.get(date, {}))
+
+    def occupancy(self, date: str) -> Occupancy:
+        """Copy of the occupancy counters of the live records for a date"""
+        self.ensure_replayed()
+        with self._lock:
+            occupancy = self._occupancy.get(date)
+            return occupancy.copy() if occupancy is not None else Occupancy()
+
+    def stats(self) -> dict:
+        with self._lock:
+            days = len(self._days)
+            records = sum(len(records) for records in self._days.values())
+        return {
+            "days": days,
+            "records": records,
+            "version": self.version,
+            "log": self.log.stats(),
+        }
+
+
+live_attendance = LiveAttendance(event_log)
@@ -0,0 +1,79 @@
+"""
+Occupancy counters for a day: who was present, and who is currently inside.
+
+Counts are kept per (office, building) and updated with add/remove as records
+change, so reading a day's head count never walks its records. A record counts
+as present once it exists for the day, and as inside while it has a check-in
+but no check-out yet.
+"""
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+PRESENT = "present"
+INSIDE = "inside"
+
+
+def is_inside(record: dict) -> bool:
+    return bool(record.get("checkin_time")) and not record.get("checkout_time")
+
+
+class Occupancy:
+    """Present / inside head counts per (office, building)"""
+
+    __slots__ = ("present", "inside")
+
+    def __init__(self):
+        self.present: Counter = Counter()
+        self.inside: Counter = Counter()
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "Occupancy":
+        occupancy = cls()
+        for record in records:
+            occupancy.add(record)
+        return occupancy
+
+    def add(self, record: dict, sign: int = 1):
+        key = (record.get("office") or "", record.get("building") or "")
+        self.present[key] += sign
+        if is_inside(record):
+            self.inside[key] += sign
+
+    def remove(self, record: dict):
+        self.add(record, -1)
+
+    def update(self, other: "Occupancy"):
+        """Add another occupancy's counts to this one"""
+        self.present.update(other.present)
+        self.inside.update(other.inside)
+
+    def copy(self) -> "Occupancy":
+        occupancy = Occupancy()
+        occupancy.present = self.present.copy()
+        occupancy.inside = self.inside.copy()
+        return occupancy
+
+    def counts(self, mode: str = PRESENT) -> dict:
+        """Totals by office and by office/building for "present" or "inside" """
+        counter = self.inside if mode == INSIDE else self.present
+        by_office: Dict[str, int] = {}
+        by_building: Dict[str, Dict[str, int]] = {}
+        for (office, building), count in sorted(counter.items()):
+            if count <= 0:
+                continue
+            by_office[office] = by_office.get(office, 0) + count
+            by_building.setdefault(office, {})[building] = count
+        return {
+            "total_people": sum(by_office.values()),
+            "count_by_office": by_office,
+            "count_by_building": by_building,
+        }
+
+
+def merge_occupancy(base: Optional[Occupancy], replaced: Iterable[dict], live: Occupancy) -> Occupancy:
+    """Stored occupancy with the replaced stored records swapped for the live counts"""
+    occupancy = base.copy() if base is not None else Occupancy()
+    for record in replaced:
+        occupancy.remove(record)
+    occupancy.update(live)
+    return occupancy
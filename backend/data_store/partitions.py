@@ -0,0 +1,246 @@
+"""
+Date-partitioned attendance storage.
+
+Instead of one attendance_multi_day.json, each day is its own file under
+data/attendance/ ({"date": ..., "attendance_records": [...]}). A small
+manifest.json lists the partitions and the latest date:
+
+    {"format": 1, "latest_date": "2025-12-31",
+     "partitions": {"2025-12-31": {"file": "2025-12-31.json", "records": 94, "bytes": 15034}}}
+
+With ATTENDANCE_STORAGE=partitioned, only the manifest is read up front.
+A partition is parsed the first time one of its days is requested and kept
+in a bounded LRU of hot days (ATTENDANCE_PARTITION_CACHE, 64 by default).
+Before a handler runs, prepare() parses the requested day (or the latest one)
+in a worker thread if it is cold.
+Days before latest_date are closed: a cached closed day is reused for as long
+as its manifest entry is unchanged, without touching its file again. Only the
+open (latest) day is re-validated against its file's stat signature.
+
+Convert the existing JSON files with:
+
+    python -m backend.data_store.partitions [--data-dir data] [--output data/attendance]
+"""
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import os
+import threading
+
+from backend.data_store.cache import DATA_DIR, DatasetCache, dataset_cache
+from backend.data_store.day_index import (
+    AttendanceDay, DayIndex, MULTI_DAY_FILE, SINGLE_DAY_FILE, normalize_attendance_data,
+)
+from backend.data_store.repository import (
+    AttendanceRepository, EMPLOYEES_FILE, JsonAttendanceRepository, PROJECTS_FILE,
+)
+
+PARTITIONS_DIR = "attendance"
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+
+
+class Manifest:
+    """Parsed manifest.json: partition entries by date and the sorted dates"""
+
+    def __init__(self, data: dict):
+        self.partitions: Dict[str, dict] = (data or {}).get("partitions") or {}
+        self.dates: List[str] = sorted(self.partitions)
+        latest = (data or {}).get("latest_date")
+        self.latest_date = latest if latest in self.partitions else (self.dates[-1] if self.dates else None)
+
+    def range(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        lo = bisect_left(self.dates, start) if start else 0
+        hi = bisect_right(self.dates, end) if end else len(self.dates)
+        return self.dates[lo:hi]
+
+
+def encode_day(date: str, records: List[dict]) -> str:
+    return json.dumps({"date": date, "attendance_records": records}, ensure_ascii=False)
+
+
+class PartitionWriter:
+    """Writes day partitions into a directory, then the manifest that publishes them"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.partitions: Dict[str, dict] = {}
+
+    def write_day(self, date: str, encoded: str, records: int):
+        """Write one day's encoded partition (see encode_day)"""
+        filename = f"{date}.json"
+        data = encoded.encode("utf-8")
+        tmp_path = self.directory / f"{filename}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.directory / filename)
+        self.partitions[date] = {"file": filename, "records": records, "bytes": len(data)}
+
+    def close(self, latest_date: Optional[str] = None):
+        """Replace the manifest; readers switch to the new partitions all at once"""
+        manifest = {
+            "format": FORMAT_VERSION,
+            "latest_date": latest_date or (max(self.partitions) if self.partitions else None),
+            "partitions": dict(sorted(self.partitions.items())),
+        }
+        tmp_path = self.directory / f"{MANIFEST_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+            f.write("\n")
+        os.replace(tmp_path, self.directory / MANIFEST_FILE)
+
+
+class PartitionedAttendanceRepository(JsonAttendanceRepository):
+    """Master data from the JSON files in DATA_DIR, attendance from lazily loaded day partitions"""
+
+    name = "partitioned"
+
+    def __init__(self, directory: Path, cache_size: int = 64):
+        self.directory = Path(directory)
+        self.files = DatasetCache(self.directory)
+        self.cache_size = cache_size
+        # date -> (manifest entry, file signature for the open day, day)
+        self._days: "OrderedDict[str, Tuple[dict, Optional[tuple], AttendanceDay]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.loads = 0
+
+    def manifest(self) -> Manifest:
+        if not self.files.exists(MANIFEST_FILE):
+            return Manifest({})
+        return self.files.get_derived(MANIFEST_FILE, "manifest", Manifest)
+
+    def _signature(self, filename: str) -> Optional[tuple]:
+        try:
+            st = os.stat(self.directory / filename)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self, date: str, entry: dict) -> AttendanceDay:
+        with open(self.directory / entry["file"], "r", encoding="utf-8") as f:
+            file_date, records = normalize_attendance_data(json.load(f))
+        self.loads += 1
+        return AttendanceDay(file_date or date, records)
+
+    def get_day(self, date: str) -> Optional[AttendanceDay]:
+        manifest = self.manifest()
+        entry = manifest.partitions.get(date)
+        if entry is None:
+            return None
+        # Closed days are immutable; only the open day can change in place
+        signature = self._signature(entry["file"]) if date == manifest.latest_date else None
+        with self._lock:
+            cached = self._days.get(date)
+            if cached is not None and cached[0] == entry and cached[1] == signature:
+                self._days.move_to_end(date)
+                return cached[2]
+        day = self._load(date, entry)
+        with self._lock:
+            self._days[date] = (entry, signature, day)
+            self._days.move_to_end(date)
+            while len(self._days) > self.cache_size:
+                self._days.popitem(last=False)
+        return day
+
+    def get_latest_day(self) -> Optional[AttendanceDay]:
+        latest = self.latest_date()
+        return self.get_day(latest) if latest else None
+
+    def get_dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        return self.manifest().range(start, end)
+
+    def get_days(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[AttendanceDay]:
+        # One partition at a time, not a whole-history index
+        return AttendanceRepository.get_days(self, start, end)
+
+    def latest_date(self) -> Optional[str]:
+        return self.manifest().latest_date
+
+    async def aget_day(self, date: str) -> Optional[AttendanceDay]:
+        """Like get_day, but a cold partition is parsed in a worker thread"""
+        if self._is_cached(date) or date not in self.manifest().partitions:
+            return self.get_day(date)
+        # Concurrent requests for the same cold day share one load
+        future = self._inflight.get(date)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(None, self.get_day, date)
+            self._inflight[date] = future
+            future.add_done_callback(lambda _: self._inflight.pop(date, None))
+        # A cancelled waiter must not cancel the load the others are waiting for
+        return await asyncio.shield(future)
+
+    async def prepare(self, date: Optional[str] = None):
+        loads = [dataset_cache.aget(f) for f in (EMPLOYEES_FILE, PROJECTS_FILE) if dataset_cache.exists(f)]
+        if self.files.exists(MANIFEST_FILE):
+            loads.append(self.files.aget_derived(MANIFEST_FILE, "manifest", Manifest))
+        await asyncio.gather(*loads)
+        # The requested day, or the latest one that most requests read
+        date = date or self.latest_date()
+        if date is not None:
+            await self.aget_day(date)
+
+    def _is_cached(self, date: str) -> bool:
+        manifest = self.manifest()
+        cached = self._days.get(date)
+        if cached is None or cached[0] != manifest.partitions.get(date):
+            return False
+        return date != manifest.latest_date or cached[1] == self._signature(cached[0]["file"])
+
+    def _open_day_fingerprint(self) -> str:
+        manifest = self.manifest()
+        latest = manifest.latest_date
+        return self.files.fingerprint((MANIFEST_FILE, manifest.partitions[latest]["file"]) if latest else (MANIFEST_FILE,))
+
+    def version(self) -> str:
+        return (f"partitioned:{dataset_cache.fingerprint((EMPLOYEES_FILE, PROJECTS_FILE))}"
+                f"|{self._open_day_fingerprint()}")
+
+    def day_version(self, date: str) -> str:
+        manifest = self.manifest()
+        entry = manifest.partitions.get(date)
+        if entry is not None and date == manifest.latest_date:
+            entry = {**entry, "stat": self._signature(entry["file"])}
+        return (f"partitioned:{dataset_cache.fingerprint((EMPLOYEES_FILE, PROJECTS_FILE))}"
+                f"|{date}:{json.dumps(entry, sort_keys=True)}")
+
+    def stats(self) -> dict:
+        return {"cached_days": len(self._days), "cache_size": self.cache_size, "loads": self.loads}
+
+
+def convert_json(data_dir: Path, directory: Path) -> dict:
+    """Write day partitions and the manifest from the JSON files in data_dir; returns counts"""
+    files = DatasetCache(data_dir)
+    if files.exists(MULTI_DAY_FILE):
+        index = DayIndex.from_multi_day(files.get(MULTI_DAY_FILE))
+    elif files.exists(SINGLE_DAY_FILE):
+        index = DayIndex.from_single_day(files.get(SINGLE_DAY_FILE))
+    else:
+        index = DayIndex([])
+
+    writer = PartitionWriter(directory)
+    records = 0
+    for day in index.range():
+        writer.write_day(day.date, encode_day(day.date, day.records), len(day.records))
+        records += len(day.records)
+    writer.close(index.latest_date)
+    return {"days": len(index), "records": records}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split the attendance JSON into per-day partitions with a manifest")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Directory with the JSON data files")
+    parser.add_argument("--output", default=str(DATA_DIR / PARTITIONS_DIR), help="Partition directory to write")
+    args = parser.parse_args()
+
+    counts = convert_json(Path(args.data_dir), Path(args.output))
+    print(f"Wrote {counts['records']} attendance records as {counts['days']} day partitions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
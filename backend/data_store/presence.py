@@ -0,0 +1,144 @@
+"""
+Per-employee presence bitsets.
+
+Each employee's attendance history is one integer used as a bitset: bit i is
+set when the employee has a record on day origin + i. Counting office days
+in any window, or checking a weekly/monthly mandate, is then an AND with a
+window mask and a popcount. Finding streaks is a few shift-and-AND steps.
+None of these touch the records again.
+
+The index is refreshed when the repository version changes. Only dates whose
+day_version moved are re-read.
+"""
+from datetime import date as date_cls
+from typing import Dict, List, Optional
+import threading
+
+from backend.data_store.employees import popcount
+from backend.data_store.repository import AttendanceRepository
+
+
+def longest_run(bits: int) -> int:
+    """Length of the longest run of consecutive set bits"""
+    length = 0
+    while bits:
+        bits &= bits >> 1
+        length += 1
+    return length
+
+
+def trailing_run(bits: int, width: int) -> int:
+    """Length of the run of set bits ending at bit width - 1 (the last day of a window)"""
+    top = 1 << (width - 1)
+    length = 0
+    while length < width and bits & (top >> length):
+        length += 1
+    return length
+
+
+class PresenceState:
+    """Immutable snapshot of the bitsets, with the date tokens they were built from"""
+
+    def __init__(self, version: str, origin: Optional[int], bits: Dict[str, int], tokens: Dict[str, str]):
+        self.version = version
+        # Ordinal of the day stored in bit 0
+        self.origin = origin
+        self.bits = bits
+        self.tokens = tokens
+
+    def window(self, start: str, end: str) -> "PresenceWindow":
+        return PresenceWindow(self, date_cls.fromisoformat(start).toordinal(), date_cls.fromisoformat(end).toordinal())
+
+
+class PresenceWindow:
+    """Bitset view of [start, end]: bit 0 is start, bit width - 1 is end"""
+
+    def __init__(self, state: PresenceState, start: int, end: int):
+        self.state = state
+        self.start = start
+        self.width = end - start + 1
+
+    def bits_of(self, employee_id: str) -> int:
+        """Presence bits of an employee shifted so that bit 0 is the window start"""
+        bits = self.state.bits.get(employee_id, 0)
+        if not bits:
+            return 0
+        shift = self.start - self.state.origin
+        bits = bits >> shift if shift >= 0 else bits << -shift
+        return bits & ((1 << self.width) - 1)
+
+    def mask(self, first: int, last: int) -> int:
+        """Mask for window days first..last (ordinals, inclusive)"""
+        return ((1 << (last - first + 1)) - 1) << (first - self.start)
+
+
+class PresenceIndex:
+    """Bitset snapshots for a repository, refreshed incrementally when its version changes"""
+
+    def __init__(self):
+        self._state = PresenceState("", None, {}, {})
+        self._lock = threading.Lock()
+
+    def current(self, repository: AttendanceRepository) -> PresenceState:
+        version = repository.version()
+        state = self._state
+        if state.version == version:
+            return state
+        with self._lock:
+            if self._state.version != version:
+                self._state = self._rebuild(self._state, repository, version)
+            return self._state
+
+    def _rebuild(self, old: PresenceState, repository: AttendanceRepository, version: str) -> PresenceState:
+        dates = repository.get_dates()
+        tokens = {d: repository.day_version(d) for d in dates}
+        origin = date_cls.fromisoformat(dates[0]).toordinal() if dates else None
+
+        if old.origin is None or origin != old.origin:
+            bits: Dict[str, int] = {}
+            changed: List[str] = dates
+            removed: List[str] = []
+        else:
+            bits = dict(old.bits)
+            changed = [d for d in dates if old.tokens.get(d) != tokens[d]]
+            removed = [d for d in old.tokens if d not in tokens]
+
+        for date in removed + changed:
+            # Clear the day's bit for everyone before setting it from the new records
+            clear = ~(1 << (date_cls.fromisoformat(date).toordinal() - origin))
+            for employee_id in bits:
+                bits[employee_id] &= clear
+        for date in changed:
+            day = repository.get_day(date)
+            if day is None:
+                continue
+            bit = 1 << (date_cls.fromisoformat(date).toordinal() - origin)
+            for record in day.records:
+                employee_id = record.get("employee_id")
+                if employee_id:
+                    bits[employee_id] = bits.get(employee_id, 0) | bit
+        return PresenceState(version, origin, bits, tokens)
+
+
+presence_index = PresenceIndex()
+
+
+def calendar_periods(start: str, end: str, granularity: str = "week") -> List[tuple]:
+    """
+    (first, last) ordinal pairs covering [start, end], split at ISO week (Monday)
+    or month boundaries; the first and last periods may be partial.
+    """
+    first = date_cls.fromisoformat(start).toordinal()
+    last = date_cls.fromisoformat(end).toordinal()
+    periods = []
+    while first <= last:
+        day = date_cls.fromordinal(first)
+        if granularity == "month":
+            next_month = date_cls(day.year + (day.month == 12), day.month % 12 + 1, 1)
+            period_end = next_month.toordinal() - 1
+        else:
+            period_end = first + (6 - day.weekday())
+        period_end = min(period_end, last)
+        periods.append((first, period_end))
+        first = period_end + 1
+    return periods
@@ -0,0 +1,140 @@
+"""
+Pre-sorted row orders for paging through a day's attendance records.
+
+A day is sorted once per sort key, on first use, into a row order and the
+matching (value, employee_id, row) keys. The order is kept on the day
+partition, so it goes away with the partition when the data changes. To serve
+a page:
+- bisect the keys to the position just after the cursor;
+- walk the order from there, skipping rows that fail the filter mask, until
+  the page is full.
+No request sorts the records again.
+"""
+from bisect import bisect_left, bisect_right
+from operator import and_
+from typing import List, Optional, Tuple
+import base64
+import binascii
+import json
+
+from backend.data_store.columnar import office_codes
+from backend.data_store.day_index import AttendanceDay
+from backend.data_store.employees import EmployeeDirectory
+
+SORT_KEYS = ("employee_id", "name", "checkin", "checkout", "hours")
+ASC = "asc"
+DESC = "desc"
+
+
+class RowOrder:
+    """Rows of a day sorted by one key, with the sort keys for bisecting"""
+
+    __slots__ = ("rows", "keys", "employees")
+
+    def __init__(self, rows: List[int], keys: List[tuple], employees):
+        self.rows = rows
+        self.keys = keys
+        # Master data the order was built against (only names depend on it)
+        self.employees = employees
+
+
+def _sort_values(day: AttendanceDay, sort: str, employee_lookup: dict) -> list:
+    columns = day.columns
+    if sort == "checkin":
+        return columns.checkin
+    if sort == "checkout":
+        # Missing checkouts (still inside) sort after every checkout time
+        return columns.checkout
+    if sort == "hours":
+        return columns.duration
+    if sort == "name":
+        return [employee_lookup.get(r.get("employee_id"), {}).get("name", "").casefold() for r in day.records]
+    return [r.get("employee_id") or "" for r in day.records]
+
+
+def row_order(day: AttendanceDay, sort: str, employees: List[dict], employee_lookup: dict) -> RowOrder:
+    """The day's rows sorted ascending by a sort key, built once per day (and master data for names)"""
+    token = employees if sort == "name" else None
+    order = day.orders.get(sort)
+    if order is None or order.employees is not token:
+        values = _sort_values(day, sort, employee_lookup)
+        keys = sorted(
+            (value, record.get("employee_id") or "", row)
+            for row, (value, record) in enumerate(zip(values, day.records))
+        )
+        order = RowOrder([key[2] for key in keys], keys, token)
+        day.orders[sort] = order
+    return order
+
+
+def filter_mask(day: AttendanceDay, directory: EmployeeDirectory, office: Optional[str] = None,
+                project_id: Optional[str] = None, gender: Optional[str] = None,
+                late_only: bool = False) -> Optional[bytes]:
+    """Row mask for the filters (None when there are none), built from whole columns"""
+    columns = day.columns
+    masks = []
+    if office is not None:
+        code = office_codes.lookup(office)
+        masks.append(bytes(c == code for c in columns.office))
+    if project_id is not None or gender is not None:
+        members = directory.select(project_id=project_id, gender=gender)
+        masks.append(columns.mask_for(directory.code_table(members)))
+    if late_only:
+        masks.append(columns.late_stay)
+    if not masks:
+        return None
+    mask = masks[0]
+    for other in masks[1:]:
+        mask = bytes(map(and_, mask, other))
+    return mask
+
+
+def page_rows(order: RowOrder, mask: Optional[bytes], direction: str, after: Optional[tuple],
+              limit: Optional[int]) -> Tuple[List[int], Optional[tuple]]:
+    """
+    Up to limit rows that pass the mask, following the cursor key in the given
+    direction, and the key to resume from (None on the last page).
+    """
+    if direction == ASC:
+        start = bisect_right(order.keys, after) if after else 0
+        positions = range(start, len(order.rows))
+    else:
+        start = bisect_left(order.keys, after) if after else len(order.rows)
+        positions = range(start - 1, -1, -1)
+
+    rows = []
+    for position in positions:
+        row = order.rows[position]
+        if mask is not None and not mask[row]:
+            continue
+        if limit is not None and len(rows) == limit:
+            # Another match exists: resume after the last row returned
+            return rows, order.keys[last]
+        rows.append(row)
+        last = position
+    return rows, None
+
+
+def match_count(day: AttendanceDay, mask: Optional[bytes]) -> int:
+    return day.columns.size if mask is None else sum(mask)
+
+
+def encode_cursor(sort: str, direction: str, key: tuple) -> str:
+    """Opaque cursor for the row after which the next page starts"""
+    payload = json.dumps([sort, direction, *key], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, direction: str) -> tuple:
+    """Sort key from a cursor; raises ValueError if it is malformed or was issued for another sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_direction, value, employee_id, row = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Malformed cursor")
+    if (cursor_sort, cursor_direction) != (sort, direction):
+        raise ValueError(f"Cursor was issued for sort={cursor_sort}&order={cursor_direction}")
+    value_type = str if sort in ("employee_id", "name") else int
+    if type(value) is not value_type or type(row) is not int or not isinstance(employee_id, str):
+        raise ValueError("Malformed cursor")
+    return value, employee_id, row
@@ -0,0 +1,351 @@
+"""
+Storage-agnostic access to employees, projects and attendance.
+
+Routers talk to an AttendanceRepository instead of reading files directly. The
+JSON implementation serves the files in DATA_DIR through the dataset cache; the
+SQLite implementation (sqlite_repository.py) serves an indexed database built
+by import_json.py. Either one is wrapped by LiveOverlayRepository so days built
+from ingested events are layered on top of the stored history.
+
+The backend is chosen with the ATTENDANCE_STORAGE environment variable
+("json" by default, "sqlite", "binary" for the memory-mapped history in
+binary_history.py, "partitioned" for per-day files loaded on demand (see
+partitions.py), or "snapshot" for the JSON files served from a
+snapshot shared by all worker processes, see snapshot.py).
+
+Reads are synchronous. Before an async handler runs, the repository_ready
+dependency awaits prepare() with the request's date, which (re)loads stale
+data in a worker thread so the handler's reads are served from memory without
+blocking the event loop.
+"""
+from abc import ABC, abstractmethod
+from fastapi import HTTPException, Request
+from typing import Dict, Iterator, List, Optional, Tuple
+import asyncio
+import os
+import threading
+
+from backend.data_store.cache import dataset_cache, DATA_DIR
+from backend.data_store.day_index import AttendanceDay, DayIndex, MULTI_DAY_FILE, SINGLE_DAY_FILE
+from backend.data_store.employees import EmployeeDirectory, employee_directory
+from backend.data_store.live_state import LiveAttendance, live_attendance
+from backend.data_store.occupancy import Occupancy, merge_occupancy
+from backend.timing import LOAD, RESOLVE, stage, timed_stage
+
+EMPLOYEES_FILE = "employees.json"
+PROJECTS_FILE = "projects.json"
+
+
+class AttendanceRepository(ABC):
+    """Read interface shared by all storage backends"""
+
+    name = "abstract"
+
+    @abstractmethod
+    def get_employees(self) -> List[dict]:
+        """All employees, in master-data order"""
+
+    @abstractmethod
+    def get_projects(self) -> List[dict]:
+        """All projects, in master-data order"""
+
+    @abstractmethod
+    def get_day(self, date: str) -> Optional[AttendanceDay]:
+        """The day partition for a date, or None if there is no data for it"""
+
+    @abstractmethod
+    def get_dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """Sorted dates with attendance data, optionally limited to start <= date <= end"""
+
+    @abstractmethod
+    def latest_date(self) -> Optional[str]:
+        """Most recent date with attendance data"""
+
+    @abstractmethod
+    def version(self) -> str:
+        """Opaque string that changes whenever the stored data does"""
+
+    def day_version(self, date: str) -> str:
+        """Opaque string that changes whenever the data for one date (or master data) does"""
+        return self.version()
+
+    async def prepare(self, date: Optional[str] = None):
+        """
+        Load anything stale off the event loop so that the synchronous reads that
+        follow are cheap. date is the day the request asks for, if any.
+        """
+
+    def get_directory(self) -> EmployeeDirectory:
+        """Indexes over the current employee list, built once per master-data version"""
+        return employee_directory(self.get_employees())
+
+    def get_employee(self, employee_id: str) -> Optional[dict]:
+        return self.get_directory().get(employee_id)
+
+    def get_project(self, project_id: str) -> Optional[dict]:
+        return next((p for p in self.get_projects() if p.get("project_id") == project_id), None)
+
+    def get_project_employees(self, project_id: str) -> List[dict]:
+        directory = self.get_directory()
+        return directory.members(directory.select(project_id=project_id))
+
+    def get_latest_day(self) -> Optional[AttendanceDay]:
+        latest = self.latest_date()
+        return self.get_day(latest) if latest else None
+
+    def get_occupancy(self, date: str) -> Optional[Occupancy]:
+        """Occupancy counters for a date, or None if there is no data for it"""
+        day = self.get_day(date)
+        return day.occupancy if day is not None else None
+
+    def get_days(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[AttendanceDay]:
+        """Day partitions in date order, loaded one at a time"""
+        for date in self.get_dates(start, end):
+            day = self.get_day(date)
+            if day is not None:
+                yield day
+
+    def get_employee_attendance(self, employee_id: str, start: Optional[str] = None,
+                                end: Optional[str] = None) -> List[dict]:
+        """One employee's attendance records between start and end (inclusive)"""
+        records = []
+        for day in self.get_days(start, end):
+            row = day.row_of_employee(employee_id)
+            if row is not None:
+                records.append(day.records[row])
+        return records
+
+
+class JsonAttendanceRepository(AttendanceRepository):
+    """The JSON files in DATA_DIR, parsed once per file version by the dataset cache"""
+
+    name = "json"
+
+    def _require(self, filename: str):
+        if not dataset_cache.exists(filename):
+            raise HTTPException(status_code=404, detail=f"Data file {filename} not found")
+        return dataset_cache.get(filename)
+
+    def get_employees(self) -> List[dict]:
+        return self._require(EMPLOYEES_FILE).get("employees", [])
+
+    def get_projects(self) -> List[dict]:
+        return self._require(PROJECTS_FILE).get("projects", [])
+
+    async def prepare(self, date: Optional[str] = None):
+        # The file cache coalesces concurrent loads of the same file version
+        loads = [dataset_cache.aget(f) for f in (EMPLOYEES_FILE, PROJECTS_FILE) if dataset_cache.exists(f)]
+        if dataset_cache.exists(MULTI_DAY_FILE):
+            loads.append(dataset_cache.aget_derived(MULTI_DAY_FILE, "day_index", DayIndex.from_multi_day))
+        elif dataset_cache.exists(SINGLE_DAY_FILE):
+            loads.append(dataset_cache.aget_derived(SINGLE_DAY_FILE, "day_index", DayIndex.from_single_day))
+        await asyncio.gather(*loads)
+
+    def day_index(self) -> DayIndex:
+        """Day index for the attendance files, preferring the multi-day file"""
+        if dataset_cache.exists(MULTI_DAY_FILE):
+            return dataset_cache.get_derived(MULTI_DAY_FILE, "day_index", DayIndex.from_multi_day)
+        if dataset_cache.exists(SINGLE_DAY_FILE):
+            return dataset_cache.get_derived(SINGLE_DAY_FILE, "day_index", DayIndex.from_single_day)
+        return DayIndex([])
+
+    def get_day(self, date: str) -> Optional[AttendanceDay]:
+        return self.day_index().get(date)
+
+    def get_latest_day(self) -> Optional[AttendanceDay]:
+        # Also covers an undated single-day file
+        return self.day_index().latest()
+
+    def get_dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        return [day.date for day in self.day_index().range(start, end)]
+
+    def get_days(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[AttendanceDay]:
+        return iter(self.day_index().range(start, end))
+
+    def latest_date(self) -> Optional[str]:
+        return self.day_index().latest_date
+
+    def version(self) -> str:
+        return "json:" + dataset_cache.fingerprint()
+
+
+def merge_day(date: str, base: Optional[AttendanceDay], live_records: List[dict]) -> AttendanceDay:
+    """Stored records for a date with ingested records layered on top (live wins per employee)"""
+    live_ids = {r["employee_id"] for r in live_records}
+    records = [r for r in base.records if r.get("employee_id") not in live_ids] if base else []
+    return AttendanceDay(date, records + live_records)
+
+
+class LiveOverlayRepository(AttendanceRepository):
+    """Layers days built from ingested events over another repository"""
+
+    def __init__(self, base: AttendanceRepository, live: LiveAttendance):
+        self.base = base
+        self.live = live
+        self.name = base.name
+        # date -> (base day, live day version, merged day / merged occupancy)
+        self._merged: Dict[str, tuple] = {}
+        self._occupancy: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get_employees(self) -> List[dict]:
+        return self.base.get_employees()
+
+    def get_projects(self) -> List[dict]:
+        return self.base.get_projects()
+
+    def get_employee(self, employee_id: str) -> Optional[dict]:
+        return self.base.get_employee(employee_id)
+
+    def get_project(self, project_id: str) -> Optional[dict]:
+        return self.base.get_project(project_id)
+
+    def get_project_employees(self, project_id: str) -> List[dict]:
+        return self.base.get_project_employees(project_id)
+
+    async def prepare(self, date: Optional[str] = None):
+        if not self.live.replayed:
+            await asyncio.get_running_loop().run_in_executor(None, self.live.ensure_replayed)
+        await self.base.prepare(date)
+
+    def _live_dates(self) -> List[str]:
+        self.live.ensure_replayed()
+        return self.live.dates() if self.live.version else []
+
+    def get_day(self, date: str) -> Optional[AttendanceDay]:
+        base_day = self.base.get_day(date)
+        self.live.ensure_replayed()
+        version = self.live.day_version(date)
+        if not version:
+            return base_day
+        cached = self._merged.get(date)
+        if cached is None or cached[0] is not base_day or cached[1] != version:
+            with self._lock:
+                cached = (base_day, version, merge_day(date, base_day, self.live.records(date)))
+                self._merged[date] = cached
+        return cached[2]
+
+    def get_occupancy(self, date: str) -> Optional[Occupancy]:
+        self.live.ensure_replayed()
+        version = self.live.day_version(date)
+        if not version:
+            return self.base.get_occupancy(date)
+        # Stored counts minus the stored records the live ones replace, plus the
+        # live counts: no need to merge the day's records
+        base_day = self.base.get_day(date)
+        cached = self._occupancy.get(date)
+        if cached is None or cached[0] is not base_day or cached[1] != version:
+            with self._lock:
+                replaced = []
+                if base_day is not None:
+                    for employee_id in self.live.employee_ids(date):
+                        row = base_day.row_of_employee(employee_id)
+                        if row is not None:
+                            replaced.append(base_day.records[row])
+                occupancy = merge_occupancy(base_day.occupancy if base_day else None, replaced,
+                                            self.live.occupancy(date))
+                cached = (base_day, version, occupancy)
+                self._occupancy[date] = cached
+        return cached[2]
+
+    def get_latest_day(self) -> Optional[AttendanceDay]:
+        latest = self.latest_date()
+        if latest is None:
+            # Possibly an undated single-day file
+            return self.base.get_latest_day()
+        return self.get_day(latest)
+
+    def get_dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        dates = set(self.base.get_dates(start, end))
+        dates.update(d for d in self._live_dates() if (not start or d >= start) and (not end or d <= end))
+        return sorted(dates)
+
+    def latest_date(self) -> Optional[str]:
+        live_dates = self._live_dates()
+        base_latest = self.base.latest_date()
+        if live_dates and (base_latest is None or live_dates[-1] > base_latest):
+            return live_dates[-1]
+        return base_latest
+
+    def day_version(self, date: str) -> str:
+        self.live.ensure_replayed()
+        return f"{self.base.day_version(date)}|live:{self.live.day_version(date)}"
+
+    def version(self) -> str:
+        self.live.ensure_replayed()
+        return f"{self.base.version()}|live:{self.live.version}"
+
+
+def _create_repository() -> AttendanceRepository:
+    storage = os.environ.get("ATTENDANCE_STORAGE", "json").lower()
+    if storage == "sqlite":
+        from backend.data_store.sqlite_repository import SqliteAttendanceRepository
+        base = SqliteAttendanceRepository(os.environ.get("ATTENDANCE_DB", str(DATA_DIR / "attendance.db")))
+    elif storage == "binary":
+        from backend.data_store.binary_history import BINARY_FILE, BinaryAttendanceRepository
+        base = BinaryAttendanceRepository(os.environ.get("ATTENDANCE_BINARY", str(DATA_DIR / BINARY_FILE)))
+    elif storage == "partitioned":
+        from backend.data_store.partitions import PARTITIONS_DIR, PartitionedAttendanceRepository
+        base = PartitionedAttendanceRepository(os.environ.get("ATTENDANCE_PARTITIONS", str(DATA_DIR / PARTITIONS_DIR)),
+                                               int(os.environ.get("ATTENDANCE_PARTITION_CACHE", 64)))
+    elif storage == "snapshot":
+        from backend.data_store.snapshot import SnapshotAttendanceRepository
+        base = SnapshotAttendanceRepository()
+    elif storage == "json":
+        base = JsonAttendanceRepository()
+    else:
+        raise ValueError(f"Unknown ATTENDANCE_STORAGE backend: {storage}")
+    return LiveOverlayRepository(base, live_attendance)
+
+
+_repository: Optional[AttendanceRepository] = None
+_repository_lock = threading.Lock()
+
+
+def get_repository() -> AttendanceRepository:
+    """Process-wide repository for the configured storage backend"""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                _repository = _create_repository()
+    return _repository
+
+
+async def repository_ready(request: Request):
+    """Route dependency: load stale data in a worker thread before the handler reads it"""
+    with stage(LOAD):
+        await get_repository().prepare(request.query_params.get("date"))
+
+
+@timed_stage(RESOLVE)
+def resolve_day(date: Optional[str] = None) -> AttendanceDay:
+    """
+    Resolve the requested date (or the latest available day) to its partition.
+    Raises 404 for dates that are not in the attendance data.
+    """
+    repository = get_repository()
+    day = repository.get_day(date) if date else repository.get_latest_day()
+    if day is None:
+        if date:
+            raise HTTPException(status_code=404, detail=f"No attendance data for date {date}")
+        raise HTTPException(status_code=404, detail="No attendance data available")
+    return day
+
+
+@timed_stage(RESOLVE)
+def resolve_occupancy(date: Optional[str] = None) -> Tuple[Optional[str], Occupancy]:
+    """
+    Occupancy counters for the requested date (or the latest available day).
+    Raises 404 like resolve_day.
+    """
+    repository = get_repository()
+    target = date or repository.latest_date()
+    occupancy = repository.get_occupancy(target) if target else None
+    if occupancy is None:
+        if date:
+            raise HTTPException(status_code=404, detail=f"No attendance data for date {date}")
+        # An undated single-day file has no date to look up
+        day = resolve_day()
+        return day.date, day.occupancy
+    return target, occupancy
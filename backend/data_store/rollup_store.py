@@ -0,0 +1,347 @@
+"""
+Materialized aggregates for closed days.
+
+A day's reports stop changing once the day is over, yet they used to be
+recomputed from the raw records on every request. The RollupScheduler, started
+from the app lifespan, computes each closed day's aggregates once and
+persists them in data/rollups/ (ATTENDANCE_ROLLUPS). Each day is stored as
+its own <date>.json file, and manifest.json maps each date to the day_version
+it was computed from. A day's aggregates are:
+- late-stay entries and late-stay counts by gender;
+- distinct present employees, and WFO / WFH present counts;
+- per-project checked-out records, minutes worked and late-night counts;
+- per-office headcount of present employees.
+
+A day is closed once its date is before today. The job catches up on every
+closed day at startup, runs again shortly after each midnight, and is woken
+when a request finds a closed day without a current rollup. Rollups whose
+day_version no longer matches the repository (the day or master data
+changed) are ignored until they are rebuilt. The report routes then compute
+that day live, as they always do for today. Requests read the manifest and day
+files in a worker thread, never on the event loop.
+
+Build or refresh the rollups without starting the server with:
+
+    python -m backend.data_store.rollup_store [--output data/rollups]
+"""
+from collections import OrderedDict
+from datetime import date as date_cls, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+
+from backend.data_store.cache import DATA_DIR, DatasetCache
+from backend.data_store.columnar import MISSING, employee_codes, office_codes
+from backend.data_store.day_index import AttendanceDay
+from backend.data_store.employees import EmployeeDirectory
+from backend.data_store.repository import AttendanceRepository, get_repository
+
+ROLLUPS_DIR = "rollups"
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 2
+
+
+def late_stay_entry(record: dict, employee: dict) -> dict:
+    """One late-stay row: the attendance record enriched with employee info"""
+    return {
+        "employee_id": record.get("employee_id"),
+        "name": employee.get("name", ""),
+        "gender": employee.get("gender", ""),
+        "checkout_time": record.get("checkout_time"),
+        "project_id": employee.get("project_id", ""),
+        "office": record.get("office", "")
+    }
+
+
+def presence_counts(day: AttendanceDay, directory: EmployeeDirectory) -> Tuple[int, int, int]:
+    """Distinct present employees, and how many of the WFO / WFH employees are among them"""
+    present_codes = set(day.columns.employee)
+    present_codes.discard(employee_codes.lookup(None))
+    present_codes.discard(employee_codes.lookup(""))
+    wfo_present = sum(map(present_codes.__contains__, directory.codes(directory.select(mode="WFO"))))
+    wfh_present = sum(map(present_codes.__contains__, directory.codes(directory.select(mode="WFH"))))
+    return len(present_codes), wfo_present, wfh_present
+
+
+def aggregate_day(day: AttendanceDay, directory: EmployeeDirectory) -> dict:
+    """Every aggregate the day reports are served from, computed in one pass over the columns"""
+    columns = day.columns
+    employee_lookup = directory.by_id
+
+    late_stay = []
+    by_gender: Dict[str, int] = {}
+    for row in columns.late_rows:
+        record = day.records[row]
+        entry = late_stay_entry(record, employee_lookup.get(record.get("employee_id"), {}))
+        late_stay.append(entry)
+        by_gender[entry["gender"]] = by_gender.get(entry["gender"], 0) + 1
+
+    project_of = directory.by_code("project_id")
+    projects: Dict[str, List[int]] = {}
+    office_present = set()
+    for code, office, checkout, minutes, late in zip(columns.employee, columns.office, columns.checkout,
+                                                     columns.duration, columns.late_stay):
+        office_present.add((office, code))
+        project_id = project_of.get(code)
+        # Open sessions have no hours worked yet
+        if project_id is None or checkout == MISSING:
+            continue
+        totals = projects.get(project_id)
+        if totals is None:
+            totals = projects[project_id] = [0, 0, 0]
+        totals[0] += 1
+        totals[1] += minutes
+        totals[2] += late
+
+    offices: Dict[str, int] = {}
+    for office, _ in office_present:
+        name = office_codes.values[office] or ""
+        offices[name] = offices.get(name, 0) + 1
+
+    present, wfo_present, wfh_present = presence_counts(day, directory)
+    return {
+        "date": day.date,
+        "late_stay": {"employees": late_stay, "by_gender": by_gender},
+        "presence": {"present": present, "wfo": wfo_present, "wfh": wfh_present},
+        "projects": {
+            project_id: {"records": records, "minutes": minutes, "late": late}
+            for project_id, (records, minutes, late) in projects.items()
+        },
+        "offices": offices,
+    }
+
+
+class RollupStore:
+    """Per-day aggregate files plus the manifest of the day_version each was computed from"""
+
+    def __init__(self, directory: Path, cache_size: int = 128):
+        self.directory = Path(directory)
+        self.files = DatasetCache(self.directory)
+        self.cache_size = cache_size
+        # date -> (day_version, aggregates)
+        self._days: "OrderedDict[str, Tuple[str, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Days in the manifest as last read, for stats() without touching the disk
+        self.stored_days = 0
+
+    def _days_of(self, manifest: dict) -> Dict[str, str]:
+        # Rollups written in an older format are rebuilt
+        days = (manifest.get("days") or {}) if manifest.get("format") == FORMAT_VERSION else {}
+        self.stored_days = len(days)
+        return days
+
+    def manifest(self) -> Dict[str, str]:
+        """date -> day_version of the stored rollups"""
+        if not self.files.exists(MANIFEST_FILE):
+            return {}
+        return self._days_of(self.files.get(MANIFEST_FILE))
+
+    def _cached(self, date: str, version: str) -> Optional[dict]:
+        with self._lock:
+            cached = self._days.get(date)
+            if cached is not None and cached[0] == version:
+                self._days.move_to_end(date)
+                self.hits += 1
+                return cached[1]
+        return None
+
+    def get(self, date: str, version: str) -> Optional[dict]:
+        """The stored aggregates for a date, or None unless they were computed from this day_version"""
+        if self.manifest().get(date) != version:
+            self.misses += 1
+            return None
+        return self._cached(date, version) or self._read(date, version)
+
+    async def aget(self, date: str, version: str) -> Optional[dict]:
+        """Like get, but the manifest and the day file are (re)loaded in a worker thread"""
+        if not self.files.exists(MANIFEST_FILE):
+            self.misses += 1
+            return None
+        if self._days_of(await self.files.aget(MANIFEST_FILE)).get(date) != version:
+            self.misses += 1
+            return None
+        cached = self._cached(date, version)
+        if cached is not None:
+            return cached
+        return await asyncio.get_running_loop().run_in_executor(None, self._read, date, version)
+
+    def _read(self, date: str, version: str) -> Optional[dict]:
+        try:
+            with open(self.directory / f"{date}.json", "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if stored.get("version") != version:
+            self.misses += 1
+            return None
+        with self._lock:
+            self._days[date] = (version, stored)
+            while len(self._days) > self.cache_size:
+                self._days.popitem(last=False)
+        self.hits += 1
+        return stored
+
+    def put(self, rollups: List[dict]):
+        """Write day files (each with its "version"), then publish them in the manifest"""
+        if not rollups:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for rollup in rollups:
+            self._write(f"{rollup['date']}.json", rollup)
+        with self._lock:
+            days = dict(self.manifest())
+            days.update((rollup["date"], rollup["version"]) for rollup in rollups)
+            self._write(MANIFEST_FILE, {"format": FORMAT_VERSION, "days": dict(sorted(days.items()))})
+            self.files.invalidate(MANIFEST_FILE)
+            self.stored_days = len(days)
+
+    def _write(self, filename: str, data: dict):
+        # Unique temporary name: several worker processes may publish at once
+        tmp_path = self.directory / f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.directory / filename)
+
+    def stats(self) -> dict:
+        return {"days": self.stored_days, "cached_days": len(self._days), "hits": self.hits, "misses": self.misses}
+
+
+def closed_dates(repository: AttendanceRepository, today: Optional[str] = None) -> List[str]:
+    """Dates with attendance data before today"""
+    today = today or date_cls.today().isoformat()
+    return [d for d in repository.get_dates(end=today) if d < today]
+
+
+def materialize(repository: AttendanceRepository, store: RollupStore, today: Optional[str] = None,
+                batch: int = 32) -> int:
+    """Compute and store the aggregates of every closed day without a current rollup; returns how many"""
+    stored = store.manifest()
+    pending = []
+    written = 0
+    for date in closed_dates(repository, today):
+        version = repository.day_version(date)
+        if stored.get(date) == version:
+            continue
+        day = repository.get_day(date)
+        if day is None:
+            continue
+        rollup = aggregate_day(day, repository.get_directory())
+        rollup["version"] = version
+        pending.append(rollup)
+        # Publish as we go, so a long catch-up serves finished days early
+        if len(pending) >= batch:
+            store.put(pending)
+            written += len(pending)
+            pending = []
+    store.put(pending)
+    return written + len(pending)
+
+
+class RollupScheduler:
+    """Background task that materializes closed days at startup, after each midnight and on demand"""
+
+    def __init__(self, store: RollupStore, delay: float = 60.0):
+        self.store = store
+        # Seconds after midnight before the day that just closed is materialized
+        self.delay = delay
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.runs = 0
+        self.materialized = 0
+        self.last_run: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_duration = 0.0
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        """Ask for a catch-up run soon (called on the event loop)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _seconds_to_next_run(self) -> float:
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        return (midnight - now).total_seconds() + self.delay
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            started = time.perf_counter()
+            try:
+                repository = get_repository()
+                await repository.prepare()
+                self.materialized += await loop.run_in_executor(None, materialize, repository, self.store)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            self.runs += 1
+            self.last_run = datetime.now().isoformat(timespec="seconds")
+            self.last_duration = time.perf_counter() - started
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._seconds_to_next_run())
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            **self.store.stats(),
+            "runs": self.runs,
+            "materialized": self.materialized,
+            "last_run": self.last_run,
+            "last_duration_ms": round(self.last_duration * 1000, 1),
+            "last_error": self.last_error,
+        }
+
+
+rollup_store = RollupStore(os.environ.get("ATTENDANCE_ROLLUPS", str(DATA_DIR / ROLLUPS_DIR)))
+rollup_scheduler = RollupScheduler(rollup_store)
+
+
+async def closed_day_rollup(date: Optional[str] = None) -> Optional[dict]:
+    """
+    Stored aggregates for the requested date (or the latest day) when it is a
+    closed day with a current rollup; None means compute the day live.
+    """
+    repository = get_repository()
+    target = date or repository.latest_date()
+    if not target or target >= date_cls.today().isoformat():
+        return None
+    rollup = await rollup_store.aget(target, repository.day_version(target))
+    if rollup is None and repository.get_dates(target, target):
+        rollup_scheduler.wake()
+    return rollup
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize the aggregates of every closed day")
+    parser.add_argument("--output", default=str(rollup_store.directory), help="Rollup directory to write")
+    args = parser.parse_args()
+
+    store = RollupStore(Path(args.output))
+    written = materialize(get_repository(), store)
+    print(f"Materialized {written} day(s); {len(store.manifest())} closed day(s) stored in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
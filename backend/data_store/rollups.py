@@ -0,0 +1,222 @@
+"""
+Per-day rollups with prefix sums for date-range reports.
+
+Each dated day is reduced once to a handful of counters:
+- checked-out records, worked minutes and late stays, overall and per project,
+  office and gender (open sessions have no hours yet and are left out);
+- distinct employees present, overall and per work mode.
+
+For every counter, the running totals over the sorted dates are kept in a
+cumulative array. The total over any date range is then two bisects and one
+subtraction, whatever the number of records in between. When the data changes
+only the days whose day_version moved are re-rolled, and the cumulative arrays
+are rebuilt from the first changed date onwards.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date as date_cls
+from fastapi import HTTPException
+from typing import Dict, List, Optional, Tuple
+import threading
+
+from backend.data_store.columnar import MISSING
+from backend.data_store.day_index import AttendanceDay
+from backend.data_store.employees import EmployeeDirectory
+from backend.data_store.repository import AttendanceRepository, get_repository
+from backend.timing import RESOLVE, timed_stage
+
+RECORDS = "records"
+MINUTES = "minutes"
+LATE = "late"
+PRESENT = "present"
+
+PROJECT = "project"
+OFFICE = "office"
+GENDER = "gender"
+MODE = "mode"
+
+
+def rollup_day(day: AttendanceDay, directory: EmployeeDirectory) -> Counter:
+    """Counters for one day, keyed by (metric,) or (metric, dimension, value)"""
+    employee_lookup = directory.by_id
+    modes = directory.modes
+    counts = Counter()
+    columns = day.columns
+    present = set()
+    for record, checkout, minutes, late in zip(day.records, columns.checkout, columns.duration, columns.late_stay):
+        employee_id = record.get("employee_id")
+        if checkout != MISSING:
+            employee = employee_lookup.get(employee_id, {})
+            groups = (
+                (PROJECT, employee.get("project_id", "")),
+                (OFFICE, record.get("office", "")),
+                (GENDER, employee.get("gender", "")),
+            )
+            counts[(RECORDS,)] += 1
+            counts[(MINUTES,)] += minutes
+            counts[(LATE,)] += late
+            for dimension, value in groups:
+                counts[(RECORDS, dimension, value)] += 1
+                counts[(MINUTES, dimension, value)] += minutes
+                counts[(LATE, dimension, value)] += late
+        if employee_id and employee_id not in present:
+            present.add(employee_id)
+            counts[(PRESENT,)] += 1
+            mode = modes.get(employee_id)
+            if mode is not None:
+                counts[(PRESENT, MODE, mode)] += 1
+    return counts
+
+
+class RollupState:
+    """Immutable snapshot: sorted dates, per-day counters and their prefix sums"""
+
+    def __init__(self, version: str, dates: List[str], tokens: List[str], days: List[Counter],
+                 prefix: Dict[tuple, array]):
+        self.version = version
+        self.dates = dates
+        self.tokens = tokens
+        self.days = days
+        # key -> cumulative totals, prefix[key][i] = sum over dates[:i]
+        self.prefix = prefix
+        # (metric, dimension) -> values seen for that dimension
+        self.groups: Dict[Tuple[str, str], List[str]] = {}
+        for key in prefix:
+            if len(key) == 3:
+                self.groups.setdefault(key[:2], []).append(key[2])
+
+    def span(self, start: Optional[str], end: Optional[str]) -> Tuple[int, int]:
+        """Index range [lo, hi) of dates with start <= date <= end"""
+        lo = bisect_left(self.dates, start) if start else 0
+        hi = bisect_right(self.dates, end) if end else len(self.dates)
+        return lo, max(lo, hi)
+
+
+class RollupSpan:
+    """Aggregates over a contiguous run of days of a rollup snapshot"""
+
+    def __init__(self, state: RollupState, lo: int, hi: int):
+        self.state = state
+        self.lo = lo
+        self.hi = hi
+
+    @property
+    def days(self) -> int:
+        return self.hi - self.lo
+
+    @property
+    def dates(self) -> List[str]:
+        return self.state.dates[self.lo:self.hi]
+
+    def total(self, *key) -> int:
+        prefix = self.state.prefix.get(key)
+        return prefix[self.hi] - prefix[self.lo] if prefix is not None else 0
+
+    def by(self, metric: str, dimension: str) -> Dict[str, int]:
+        """Totals of a metric per value of a dimension (values with a zero total omitted)"""
+        totals = {}
+        for value in sorted(self.state.groups.get((metric, dimension), [])):
+            total = self.total(metric, dimension, value)
+            if total:
+                totals[value] = total
+        return totals
+
+    def daily(self, *key) -> List[int]:
+        """Per-day values of a counter over the span"""
+        prefix = self.state.prefix.get(key)
+        if prefix is None:
+            return [0] * self.days
+        return [prefix[i + 1] - prefix[i] for i in range(self.lo, self.hi)]
+
+
+class DailyRollups:
+    """Rollup snapshots for a repository, refreshed incrementally when its version changes"""
+
+    def __init__(self):
+        self._state = RollupState("", [], [], [], {})
+        self._lock = threading.Lock()
+
+    def current(self, repository: AttendanceRepository) -> RollupState:
+        version = repository.version()
+        state = self._state
+        if state.version == version:
+            return state
+        with self._lock:
+            if self._state.version != version:
+                self._state = self._rebuild(self._state, repository, version)
+            return self._state
+
+    def _rebuild(self, old: RollupState, repository: AttendanceRepository, version: str) -> RollupState:
+        dates = repository.get_dates()
+        tokens = [repository.day_version(d) for d in dates]
+
+        # Everything before the first changed date keeps its rollups and prefix sums
+        first = 0
+        limit = min(len(dates), len(old.dates))
+        while first < limit and dates[first] == old.dates[first] and tokens[first] == old.tokens[first]:
+            first += 1
+
+        previous = {d: (t, counts) for d, t, counts in zip(old.dates, old.tokens, old.days)}
+        directory = None
+        days = old.days[:first]
+        for date, token in zip(dates[first:], tokens[first:]):
+            cached = previous.get(date)
+            if cached is not None and cached[0] == token:
+                days.append(cached[1])
+                continue
+            if directory is None:
+                directory = repository.get_directory()
+            day = repository.get_day(date)
+            days.append(rollup_day(day, directory) if day is not None else Counter())
+
+        keys = set(old.prefix)
+        for counts in days[first:]:
+            keys.update(counts)
+        prefix = {}
+        for key in keys:
+            column = old.prefix.get(key)
+            column = column[:first + 1] if column is not None else array("q", bytes(8 * (first + 1)))
+            running = column[-1]
+            for counts in days[first:]:
+                running += counts.get(key, 0)
+                column.append(running)
+            prefix[key] = column
+        return RollupState(version, dates, tokens, days, prefix)
+
+
+daily_rollups = DailyRollups()
+
+
+def parse_date_param(value: str, name: str) -> str:
+    """Normalize a YYYY-MM-DD query parameter, raising 400 if it is malformed"""
+    try:
+        return date_cls.fromisoformat(value).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} date {value}, expected YYYY-MM-DD")
+
+
+@timed_stage(RESOLVE)
+def resolve_range(start: Optional[str], end: Optional[str]) -> RollupSpan:
+    """
+    Rollups for start <= date <= end (either bound optional).
+    Raises 400 for malformed or inverted bounds and 404 when no day falls in the range.
+    """
+    start = parse_date_param(start, "start") if start else None
+    end = parse_date_param(end, "end") if end else None
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail=f"start {start} is after end {end}")
+    state = daily_rollups.current(get_repository())
+    lo, hi = state.span(start, end)
+    if lo == hi:
+        raise HTTPException(status_code=404, detail=f"No attendance data between {start or 'the first day'} and {end or 'the last day'}")
+    return RollupSpan(state, lo, hi)
+
+
+def range_requested(date: Optional[str], start: Optional[str], end: Optional[str]) -> bool:
+    """True for a start/end query; a single date cannot be combined with a range"""
+    if not (start or end):
+        return False
+    if date:
+        raise HTTPException(status_code=400, detail="Use either date or start/end, not both")
+    return True
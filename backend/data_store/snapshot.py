@@ -0,0 +1,622 @@
+"""
+Shared dataset snapshot for deployments with several worker processes.
+
+With ATTENDANCE_STORAGE=snapshot, the JSON files are not parsed by every
+worker. One process (whichever takes the build lock first, or the CLI below)
+encodes them into a compact, immutable snapshot file:
+- string dictionaries (employee ids, times, offices, buildings);
+- one packed column per field, holding dictionary codes;
+- the derived minute / duration / late-stay columns;
+- per-date row offsets.
+Each worker memory-maps the file read-only. Columns are served as views into
+the mapping without copying, and records are materialized from them on demand.
+By default the file lives in /dev/shm, so it is shared memory in practice.
+
+The employee, office and building columns hold codes that must match this
+process's interners (columnar.py). A worker interns the snapshot's
+dictionaries as soon as it attaches, before anything else (such as the
+employee directory) interns values, so the codes coincide and those columns
+are shared as well. The employee dictionary lists every master-data employee,
+and each generation's dictionaries start with the previous generation's
+values, so codes keep matching across regenerations. Only if a process has
+interned other values in between (for example offices of ingested events)
+are its columns remapped into per-process copies; stats() lists the remapped
+fields. Employees and projects are stored as JSON and decoded once per
+worker, since Python objects cannot be shared between processes.
+
+current.json in the snapshot directory names the live generation. When the
+JSON files change, the next request rebuilds the snapshot under the lock,
+writes it as a new generation and replaces current.json. Workers then attach
+to the new generation with a single reference swap; days already handed out
+keep reading the old mapping, which stays valid until it is released.
+
+Usage:
+    python -m backend.data_store.snapshot [--data-dir data] [--force] [--status] [--clear]
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from datetime import datetime
+from fastapi import HTTPException
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import argparse
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+
+from backend.data_store.cache import DATA_DIR, DatasetCache
+from backend.data_store.columnar import (
+    DayColumns, Interner, building_codes, employee_codes, office_codes, parse_minutes,
+    _duration, _is_late_arrival, _is_late_stay,
+)
+from backend.data_store.day_index import AttendanceDay, DayIndex, MULTI_DAY_FILE, SINGLE_DAY_FILE
+from backend.data_store.repository import AttendanceRepository, EMPLOYEES_FILE, PROJECTS_FILE
+
+MAGIC = b"ATTSNAP\0"
+FORMAT_VERSION = 1
+# magic, format version, generation, length of the JSON directory that follows
+HEADER = struct.Struct("<8sIQQ")
+POINTER_FILE = "current.json"
+LOCK_FILE = "build.lock"
+
+# Record fields stored as dictionary codes, in record key order after "date"
+FIELDS = ("employee_id", "checkin_time", "checkout_time", "building", "office")
+# Fields the columnar view reads with a default of "" when the key is missing
+DEFAULT_EMPTY = ("building", "office")
+# Fields whose codes are shared with the process interners
+PROCESS_CODED = (("employee_id", employee_codes, "I"), ("office", office_codes, "H"), ("building", building_codes, "H"))
+
+
+def default_snapshot_dir(data_dir: Path = DATA_DIR) -> Path:
+    """ATTENDANCE_SNAPSHOT_DIR, else a per-data-directory folder in /dev/shm (or data/snapshot)"""
+    configured = os.environ.get("ATTENDANCE_SNAPSHOT_DIR")
+    if configured:
+        return Path(configured)
+    shm = Path("/dev/shm")
+    if shm.is_dir():
+        digest = hashlib.sha1(str(Path(data_dir).resolve()).encode()).hexdigest()[:12]
+        return shm / f"attendance-snapshot-{digest}"
+    return Path(data_dir) / "snapshot"
+
+
+def _load_json(path: Path):
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _day_index(data_dir: Path) -> DayIndex:
+    data = _load_json(data_dir / MULTI_DAY_FILE)
+    if data is not None:
+        return DayIndex.from_multi_day(data)
+    data = _load_json(data_dir / SINGLE_DAY_FILE)
+    if data is not None:
+        return DayIndex.from_single_day(data)
+    return DayIndex([])
+
+
+def _overrides(date: Optional[str], record: dict) -> Optional[dict]:
+    """What decoding the packed fields would get wrong about a record: keys to set and keys to drop"""
+    set_keys = {k: v for k, v in record.items() if k not in FIELDS and k != "date"}
+    drop = [k for k in FIELDS if k not in record]
+    if "date" not in record:
+        drop.append("date")
+    elif record["date"] != date:
+        set_keys["date"] = record["date"]
+    for field in FIELDS:
+        value = record.get(field)
+        if isinstance(value, (dict, list)):
+            set_keys[field] = value
+    if not set_keys and not drop:
+        return None
+    return {"set": set_keys, "drop": drop}
+
+
+def write_snapshot(path: Path, data_dir: Path, generation: int, source: str,
+                   previous: Optional[Dict[str, list]] = None) -> dict:
+    """
+    Encode the JSON files in data_dir into a snapshot file at path; returns its
+    directory. previous holds the dictionaries of the generation it replaces.
+    """
+    index = _day_index(data_dir)
+    days = index.range()
+    latest = index.latest()
+    undated = latest is not None and latest.date is None
+    if undated:
+        days.append(latest)
+
+    dictionaries = {field: Interner() for field in FIELDS}
+    # Stable codes: the previous generation's values keep their codes, and every
+    # master-data employee has one before the attendance records are encoded
+    for field, _, _ in PROCESS_CODED:
+        for value in (previous or {}).get(field, []):
+            dictionaries[field].intern(value)
+    employees_data = _load_json(data_dir / EMPLOYEES_FILE)
+    for employee in (employees_data or {}).get("employees", []):
+        if employee.get("employee_id"):
+            dictionaries["employee_id"].intern(employee["employee_id"])
+    codes = {field: [] for field in FIELDS}
+    checkin, checkout, duration = array("H"), array("H"), array("H")
+    late_stay, late_arrival = bytearray(), bytearray()
+    starts, extras = [0], {}
+    row = 0
+    for day in days:
+        for record in day.records:
+            for field in FIELDS:
+                value = record.get(field, "" if field in DEFAULT_EMPTY else None)
+                if isinstance(value, (dict, list)):
+                    value = None
+                codes[field].append(dictionaries[field].intern(value))
+            minutes_in = parse_minutes(record.get("checkin_time"))
+            minutes_out = parse_minutes(record.get("checkout_time"))
+            checkin.append(minutes_in)
+            checkout.append(minutes_out)
+            duration.append(_duration(minutes_in, minutes_out))
+            late_stay.append(_is_late_stay(minutes_out))
+            late_arrival.append(_is_late_arrival(minutes_in))
+            override = _overrides(day.date, record)
+            if override is not None:
+                extras[str(row)] = override
+            row += 1
+        starts.append(row)
+
+    columns = {}
+    for field in FIELDS:
+        typecode = "H" if len(dictionaries[field]) <= 0xFFFF else "I"
+        columns[field] = array(typecode, codes[field])
+        codes[field] = None
+    columns.update(checkin_minutes=checkin, checkout_minutes=checkout, duration=duration,
+                   late_stay=late_stay, late_arrival=late_arrival)
+    master = {}
+    for name, filename, key in (("employees", EMPLOYEES_FILE, "employees"), ("projects", PROJECTS_FILE, "projects")):
+        data = employees_data if name == "employees" else _load_json(data_dir / filename)
+        master[name] = None if data is None else json.dumps(data.get(key, []), ensure_ascii=False).encode("utf-8")
+
+    # Section offsets are relative to the end of the directory, aligned to 8 bytes
+    sections, payload, offset = {}, [], 0
+    blobs = [(name, column, getattr(column, "typecode", "B")) for name, column in columns.items()]
+    blobs += [(name, blob, "B") for name, blob in master.items() if blob is not None]
+    for name, blob, typecode in blobs:
+        size = len(blob) * (blob.itemsize if isinstance(blob, array) else 1)
+        sections[name] = [offset, typecode, len(blob)]
+        padding = -size % 8
+        payload.append((blob, padding))
+        offset += size + padding
+
+    directory = {
+        "generation": generation,
+        "source": source,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "rows": row,
+        "dates": [day.date for day in days],
+        "starts": starts,
+        "latest_date": index.latest_date,
+        "undated": undated,
+        "dictionaries": {field: dictionaries[field].values for field in FIELDS},
+        "extras": extras,
+        "sections": sections,
+    }
+    meta = json.dumps(directory, ensure_ascii=False).encode("utf-8")
+    meta += b" " * (-(HEADER.size + len(meta)) % 8)
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, generation, len(meta)))
+        f.write(meta)
+        for blob, padding in payload:
+            f.write(blob)
+            f.write(b"\0" * padding)
+    os.replace(tmp_path, path)
+    return directory
+
+
+class SnapshotRecords(Sequence):
+    """A day's records, materialized as dicts from the snapshot columns on access"""
+
+    __slots__ = ("snapshot", "date", "start", "stop")
+
+    def __init__(self, snapshot: "Snapshot", date: Optional[str], start: int, stop: int):
+        self.snapshot = snapshot
+        self.date = date
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.snapshot.record(self.date, self.start + i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        return self.snapshot.record(self.date, self.start + index)
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.snapshot.iter_records(self.date, self.start, self.stop)
+
+
+class SnapshotDay(AttendanceDay):
+    """Day partition backed by a snapshot: columns are views into the mapping"""
+
+    __slots__ = ("_snapshot", "_start", "_stop")
+
+    def __init__(self, snapshot: "Snapshot", date: Optional[str], start: int, stop: int):
+        super().__init__(date, SnapshotRecords(snapshot, date, start, stop))
+        self._snapshot = snapshot
+        self._start = start
+        self._stop = stop
+
+    @property
+    def columns(self) -> DayColumns:
+        if self._columns is None:
+            self._columns = self._snapshot.day_columns(self._start, self._stop)
+        return self._columns
+
+
+class Snapshot:
+    """One attached snapshot generation"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, generation, meta_size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} attendance snapshot")
+        meta = json.loads(self._map[HEADER.size:HEADER.size + meta_size])
+        base = HEADER.size + meta_size
+
+        self.generation = generation
+        self.source = meta["source"]
+        self.created = meta["created"]
+        self.rows = meta["rows"]
+        self.size = len(self._map)
+        self.latest = meta["latest_date"]
+        self.undated = meta["undated"]
+        day_dates = meta["dates"]
+        starts = meta["starts"]
+        self._spans = {date: (starts[i], starts[i + 1]) for i, date in enumerate(day_dates)}
+        self.dates: List[str] = [d for d in day_dates if d is not None]
+        self.values: Dict[str, list] = meta["dictionaries"]
+        self.extras = {int(row): override for row, override in meta["extras"].items()}
+
+        buffer = memoryview(self._map)
+        self._sections = {}
+        for name, (offset, typecode, count) in meta["sections"].items():
+            view = buffer[base + offset:base + offset + count * array(typecode).itemsize]
+            self._sections[name] = view if typecode == "B" else view.cast(typecode)
+
+        self._days: Dict[Optional[str], SnapshotDay] = {}
+        self._remaps = None
+        self._employees = None
+        self._projects = None
+        self._lock = threading.Lock()
+
+    def day(self, date: Optional[str]) -> Optional[SnapshotDay]:
+        day = self._days.get(date)
+        if day is None:
+            span = self._spans.get(date)
+            if span is None:
+                return None
+            with self._lock:
+                day = self._days.get(date)
+                if day is None:
+                    day = self._days[date] = SnapshotDay(self, date, *span)
+        return day
+
+    def iter_records(self, date: Optional[str], start: int, stop: int) -> Iterator[dict]:
+        values = [self.values[field] for field in FIELDS]
+        columns = [self._sections[field][start:stop] for field in FIELDS]
+        extras = self.extras
+        row = start
+        for employee_id, checkin, checkout, building, office in zip(*columns):
+            record = {
+                "date": date,
+                "employee_id": values[0][employee_id],
+                "checkin_time": values[1][checkin],
+                "checkout_time": values[2][checkout],
+                "building": values[3][building],
+                "office": values[4][office],
+            }
+            if extras and row in extras:
+                override = extras[row]
+                record.update(override["set"])
+                for key in override["drop"]:
+                    record.pop(key, None)
+            row += 1
+            yield record
+
+    def record(self, date: Optional[str], row: int) -> dict:
+        return next(self.iter_records(date, row, row + 1))
+
+    def _process_codes(self) -> dict:
+        # Snapshot dictionary codes -> this process's interner codes; None where they coincide.
+        # Interning in dictionary order makes them coincide while the interners are a prefix of it.
+        if self._remaps is None:
+            with self._lock:
+                if self._remaps is None:
+                    remaps = {}
+                    for field, interner, typecode in PROCESS_CODED:
+                        codes = array(typecode, map(interner.intern, self.values[field]))
+                        identity = all(code == i for i, code in enumerate(codes))
+                        remaps[field] = None if identity else codes
+                    self._remaps = remaps
+        return self._remaps
+
+    def seed_interners(self):
+        """Intern the dictionaries into this process, ideally before any other value is interned"""
+        self._process_codes()
+
+    def day_columns(self, start: int, stop: int) -> DayColumns:
+        remaps = self._process_codes()
+
+        def coded(field):
+            view = self._sections[field][start:stop]
+            remap = remaps[field]
+            return view if remap is None else array(remap.typecode, map(remap.__getitem__, view))
+
+        return DayColumns.from_arrays(
+            coded("employee_id"),
+            self._sections["checkin_minutes"][start:stop],
+            self._sections["checkout_minutes"][start:stop],
+            coded("office"),
+            coded("building"),
+            self._sections["duration"][start:stop],
+            self._sections["late_stay"][start:stop],
+            self._sections["late_arrival"][start:stop],
+        )
+
+    def _master(self, name: str, filename: str) -> list:
+        view = self._sections.get(name)
+        if view is None:
+            raise HTTPException(status_code=404, detail=f"Data file {filename} not found")
+        return json.loads(bytes(view))
+
+    def employees(self) -> List[dict]:
+        if self._employees is None:
+            self._employees = self._master("employees", EMPLOYEES_FILE)
+        return self._employees
+
+    def projects(self) -> List[dict]:
+        if self._projects is None:
+            self._projects = self._master("projects", PROJECTS_FILE)
+        return self._projects
+
+    def stats(self) -> dict:
+        return {
+            "generation": self.generation,
+            "path": str(self.path),
+            "bytes": self.size,
+            "rows": self.rows,
+            "days": len(self.dates),
+            "created": self.created,
+            "remapped": [field for field, remap in (self._remaps or {}).items() if remap is not None],
+        }
+
+
+class SnapshotStore:
+    """Builds, publishes and locates snapshot generations for one data directory"""
+
+    def __init__(self, data_dir: Path = DATA_DIR, directory: Optional[Path] = None):
+        self.data_dir = Path(data_dir)
+        self.directory = Path(directory) if directory is not None else default_snapshot_dir(self.data_dir)
+        self.files = DatasetCache(self.data_dir)
+        self.builds = 0
+
+    @property
+    def pointer_path(self) -> Path:
+        return self.directory / POINTER_FILE
+
+    def source(self) -> str:
+        """Stat fingerprint of the JSON files a snapshot is built from"""
+        return self.files.fingerprint()
+
+    def pointer_signature(self):
+        try:
+            st = os.stat(self.pointer_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def read_pointer(self) -> Optional[dict]:
+        try:
+            with open(self.pointer_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def publish(self, force: bool = False) -> dict:
+        """
+        Make the current generation match the JSON files, building a new one if
+        they changed (or force is set). Concurrent callers in other processes
+        wait on the build lock and then reuse the generation that was built.
+        """
+        import fcntl
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / LOCK_FILE, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                source = self.source()
+                pointer = self.read_pointer()
+                if not force and pointer is not None and pointer["source"] == source \
+                        and (self.directory / pointer["file"]).exists():
+                    return pointer
+                generation = (pointer["generation"] if pointer else 0) + 1
+                filename = f"gen-{generation:06d}.snap"
+                previous = None
+                if pointer is not None:
+                    try:
+                        previous = Snapshot(self.directory / pointer["file"]).values
+                    except (OSError, ValueError):
+                        previous = None
+                directory = write_snapshot(self.directory / filename, self.data_dir, generation, source, previous)
+                pointer = {
+                    "generation": generation,
+                    "file": filename,
+                    "source": source,
+                    "created": directory["created"],
+                    "rows": directory["rows"],
+                }
+                tmp_path = self.pointer_path.with_name(POINTER_FILE + ".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(pointer, f, indent=2)
+                os.replace(tmp_path, self.pointer_path)
+                self.builds += 1
+                self._remove_old(generation)
+                return pointer
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _remove_old(self, generation: int):
+        # The previous generation is kept for workers that read the old pointer a moment ago;
+        # unlinking older ones is safe, as mappings outlive the file name
+        for path in self.directory.glob("gen-*.snap"):
+            try:
+                if int(path.stem[len("gen-"):]) < generation - 1:
+                    path.unlink()
+            except (ValueError, OSError):
+                continue
+
+    def attach(self, current: Optional[Snapshot] = None) -> Snapshot:
+        """
+        Map the generation named by the pointer, publishing one first if it is
+        missing or stale. Returns current if it already is that generation.
+        """
+        for _ in range(3):
+            pointer = self.read_pointer()
+            if pointer is None or pointer["source"] != self.source():
+                pointer = self.publish()
+            if current is not None and current.generation == pointer["generation"]:
+                return current
+            try:
+                return Snapshot(self.directory / pointer["file"])
+            except FileNotFoundError:
+                # Replaced and removed between reading the pointer and opening it
+                continue
+        raise RuntimeError(f"Could not attach to an attendance snapshot in {self.directory}")
+
+    def clear(self) -> int:
+        """Remove all generations and the pointer; returns the number of files removed"""
+        removed = 0
+        for path in [*self.directory.glob("gen-*.snap*"), self.pointer_path]:
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+class SnapshotAttendanceRepository(AttendanceRepository):
+    """The JSON dataset served from a shared, memory-mapped snapshot"""
+
+    name = "snapshot"
+
+    def __init__(self, store: Optional[SnapshotStore] = None):
+        self.store = store or SnapshotStore()
+        self._snapshot: Optional[Snapshot] = None
+        self._pointer_signature = None
+        self._lock = threading.Lock()
+        self.switches = 0
+
+    def _is_current(self) -> bool:
+        snapshot = self._snapshot
+        return (snapshot is not None and self.store.pointer_signature() == self._pointer_signature
+                and self.store.source() == snapshot.source)
+
+    def refresh(self) -> Snapshot:
+        """Attach to the newest generation, publishing one if the JSON files changed"""
+        with self._lock:
+            if not self._is_current():
+                # Read before attaching: a publish in between only costs one more check
+                signature = self.store.pointer_signature()
+                snapshot = self.store.attach(self._snapshot)
+                if snapshot is not self._snapshot:
+                    # Before the new generation is handed out, so its codes are interned first
+                    snapshot.seed_interners()
+                    # One reference swap: readers hold either the old snapshot or the new one
+                    self._snapshot = snapshot
+                    self.switches += 1
+                self._pointer_signature = signature
+            return self._snapshot
+
+    def snapshot(self) -> Snapshot:
+        snapshot = self._snapshot
+        return snapshot if snapshot is not None else self.refresh()
+
+    async def prepare(self, date: Optional[str] = None):
+        if not self._is_current():
+            await asyncio.get_running_loop().run_in_executor(None, self.refresh)
+
+    def get_employees(self) -> List[dict]:
+        return self.snapshot().employees()
+
+    def get_projects(self) -> List[dict]:
+        return self.snapshot().projects()
+
+    def get_day(self, date: str) -> Optional[AttendanceDay]:
+        return self.snapshot().day(date)
+
+    def get_latest_day(self) -> Optional[AttendanceDay]:
+        snapshot = self.snapshot()
+        if snapshot.latest is None and snapshot.undated:
+            return snapshot.day(None)
+        return snapshot.day(snapshot.latest) if snapshot.latest else None
+
+    def get_dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        dates = self.snapshot().dates
+        lo = bisect_left(dates, start) if start else 0
+        hi = bisect_right(dates, end) if end else len(dates)
+        return dates[lo:hi]
+
+    def latest_date(self) -> Optional[str]:
+        return self.snapshot().latest
+
+    def version(self) -> str:
+        # From the JSON files' stat signatures, like the JSON backend: the same in
+        # every worker, and changed as soon as the files are, before any rebuild
+        return "snapshot:" + self.store.source()
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "directory": str(self.store.directory),
+            "switches": self.switches,
+            **(snapshot.stats() if snapshot is not None else {"generation": None}),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect the shared attendance snapshot")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Directory with the JSON data files")
+    parser.add_argument("--snapshot-dir", help="Snapshot directory (default: ATTENDANCE_SNAPSHOT_DIR or /dev/shm)")
+    parser.add_argument("--force", action="store_true", help="Build a new generation even if the JSON files are unchanged")
+    parser.add_argument("--status", action="store_true", help="Only show the current generation")
+    parser.add_argument("--clear", action="store_true", help="Remove every generation and the pointer")
+    args = parser.parse_args()
+
+    store = SnapshotStore(Path(args.data_dir), Path(args.snapshot_dir) if args.snapshot_dir else None)
+    if args.clear:
+        print(f"Removed {store.clear()} files from {store.directory}")
+        return
+    pointer = store.read_pointer() if args.status else store.publish(force=args.force)
+    if pointer is None:
+        print(f"No snapshot in {store.directory}")
+        return
+    stale = " (stale: the JSON files changed since)" if pointer["source"] != store.source() else ""
+    size = (store.directory / pointer["file"]).stat().st_size
+    print(f"Generation {pointer['generation']}: {pointer['rows']} records, {size} bytes, "
+          f"built {pointer['created']} at {store.directory / pointer['file']}{stale}")
+
+
+if __name__ == "__main__":
+    main()
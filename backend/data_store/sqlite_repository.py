@@ -0,0 +1,245 @@
+"""
+SQLite storage backend.
+
+Attendance lives in one table indexed on (date) and (employee_id, date), and
+employees are indexed on (project_id). Only the days a request touches are
+read; recently used days are kept in a small LRU so the columnar view of a hot
+day is built once. Build the database with:
+
+    python -m backend.data_store.import_json --db data/attendance.db
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Optional
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+
+from backend.data_store.day_index import AttendanceDay
+from backend.data_store.repository import AttendanceRepository
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    position INTEGER NOT NULL,
+    employee_id TEXT PRIMARY KEY,
+    project_id TEXT,
+    gender TEXT,
+    office_location TEXT,
+    mode_of_work TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_employees_project ON employees (project_id);
+
+CREATE TABLE IF NOT EXISTS projects (
+    position INTEGER NOT NULL,
+    project_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS attendance (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    employee_id TEXT NOT NULL,
+    checkin_time TEXT,
+    checkout_time TEXT,
+    building TEXT,
+    office TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date);
+CREATE INDEX IF NOT EXISTS idx_attendance_employee_date ON attendance (employee_id, date);
+"""
+
+RECORD_COLUMNS = ("date", "employee_id", "checkin_time", "checkout_time", "building", "office")
+
+
+def _record(row) -> dict:
+    return dict(zip(RECORD_COLUMNS, row))
+
+
+def _date_range(start: Optional[str], end: Optional[str]):
+    """SQL condition and parameters for start <= date <= end (either bound optional)"""
+    clauses, params = [], []
+    if start:
+        clauses.append("date >= ?")
+        params.append(start)
+    if end:
+        clauses.append("date <= ?")
+        params.append(end)
+    return (" AND ".join(clauses) or "1 = 1"), params
+
+
+def create_schema(conn: sqlite3.Connection):
+    conn.executescript(SCHEMA)
+
+
+def insert_employees(conn: sqlite3.Connection, employees: Iterable[dict]):
+    conn.executemany(
+        "INSERT OR REPLACE INTO employees (position, employee_id, project_id, gender, office_location, mode_of_work, data) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            (i, e.get("employee_id"), e.get("project_id"), e.get("gender"), e.get("office_location"),
+             e.get("Mode_of_work"), json.dumps(e, ensure_ascii=False))
+            for i, e in enumerate(employees)
+            # employee_id is the key: entries without one are skipped
+            if e.get("employee_id")
+        ),
+    )
+
+
+def insert_projects(conn: sqlite3.Connection, projects: Iterable[dict]):
+    conn.executemany(
+        "INSERT OR REPLACE INTO projects (position, project_id, data) VALUES (?, ?, ?)",
+        ((i, p.get("project_id"), json.dumps(p, ensure_ascii=False))
+         for i, p in enumerate(projects) if p.get("project_id")),
+    )
+
+
+INSERT_RECORD_SQL = (
+    "INSERT INTO attendance (date, employee_id, checkin_time, checkout_time, building, office) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+def insert_records(conn: sqlite3.Connection, date: str, records: Iterable[dict]):
+    conn.executemany(
+        INSERT_RECORD_SQL,
+        (
+            (r.get("date") or date, r.get("employee_id"), r.get("checkin_time"), r.get("checkout_time"),
+             r.get("building"), r.get("office"))
+            for r in records
+        ),
+    )
+
+
+class SqliteAttendanceRepository(AttendanceRepository):
+    """Indexed SQLite database; days are queried on demand"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, day_cache_size: int = 64):
+        self.path = Path(path)
+        self.day_cache_size = day_cache_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._version = None
+        self._days: "OrderedDict[str, Optional[AttendanceDay]]" = OrderedDict()
+        self._employees = None
+        self._projects = None
+
+    def _conn(self) -> sqlite3.Connection:
+        # One read connection per thread, reopened when the database changes: a
+        # re-import replaces the file, and an open connection would keep reading the old one
+        version = self.version()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.version != version:
+            conn.close()
+            conn = None
+        if conn is None:
+            if not self.path.exists():
+                raise FileNotFoundError(f"SQLite database {self.path} not found; run backend.data_store.import_json first")
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+            self._local.version = version
+        return conn
+
+    def version(self) -> str:
+        parts = []
+        for suffix in ("", "-wal"):
+            try:
+                st = os.stat(f"{self.path}{suffix}")
+                parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+            except OSError:
+                parts.append("-")
+        return "sqlite:" + "|".join(parts)
+
+    def _check_version(self):
+        # Drop cached days and master data when the database file changes
+        version = self.version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._days.clear()
+                    self._employees = None
+                    self._projects = None
+                    self._version = version
+
+    async def prepare(self, date: Optional[str] = None):
+        # Master data is reloaded when the database changes; days are small indexed queries
+        if self._employees is None or self._projects is None or self.version() != self._version:
+            await asyncio.get_running_loop().run_in_executor(None, self._load_master_data)
+
+    def _load_master_data(self):
+        self.get_employees()
+        self.get_projects()
+
+    def get_employees(self) -> List[dict]:
+        self._check_version()
+        if self._employees is None:
+            rows = self._conn().execute("SELECT data FROM employees ORDER BY position").fetchall()
+            self._employees = [json.loads(data) for (data,) in rows]
+        return self._employees
+
+    def get_projects(self) -> List[dict]:
+        self._check_version()
+        if self._projects is None:
+            rows = self._conn().execute("SELECT data FROM projects ORDER BY position").fetchall()
+            self._projects = [json.loads(data) for (data,) in rows]
+        return self._projects
+
+    def get_employee(self, employee_id: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT data FROM employees WHERE employee_id = ?", (employee_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_project(self, project_id: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT data FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_project_employees(self, project_id: str) -> List[dict]:
+        rows = self._conn().execute(
+            "SELECT data FROM employees WHERE project_id = ? ORDER BY position", (project_id,)
+        ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def get_day(self, date: str) -> Optional[AttendanceDay]:
+        self._check_version()
+        with self._lock:
+            if date in self._days:
+                self._days.move_to_end(date)
+                return self._days[date]
+        rows = self._conn().execute(
+            "SELECT date, employee_id, checkin_time, checkout_time, building, office "
+            "FROM attendance WHERE date = ? ORDER BY id",
+            (date,),
+        ).fetchall()
+        if not rows:
+            # Misses are not cached: unknown dates would push real days out
+            return None
+        day = AttendanceDay(date, [_record(row) for row in rows])
+        with self._lock:
+            self._days[date] = day
+            while len(self._days) > self.day_cache_size:
+                self._days.popitem(last=False)
+        return day
+
+    def get_dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        condition, params = _date_range(start, end)
+        rows = self._conn().execute(
+            f"SELECT DISTINCT date FROM attendance WHERE {condition} ORDER BY date", params
+        ).fetchall()
+        return [date for (date,) in rows]
+
+    def latest_date(self) -> Optional[str]:
+        row = self._conn().execute("SELECT MAX(date) FROM attendance").fetchone()
+        return row[0] if row else None
+
+    def get_employee_attendance(self, employee_id: str, start: Optional[str] = None,
+                                end: Optional[str] = None) -> List[dict]:
+        condition, params = _date_range(start, end)
+        rows = self._conn().execute(
+            "SELECT date, employee_id, checkin_time, checkout_time, building, office FROM attendance "
+            f"WHERE employee_id = ? AND {condition} ORDER BY date, id",
+            [employee_id] + params,
+        ).fetchall()
+        return [_record(row) for row in rows]
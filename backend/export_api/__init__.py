@@ -0,0 +1,2 @@
+# Export API package
+
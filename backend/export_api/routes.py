@@ -0,0 +1,146 @@
+"""
+Export API Routes
+
+Rows are produced day by day by a generator pipeline:
+days -> enriched rows -> encoded chunks -> (gzip).
+Each stage holds at most one day and one chunk, so memory stays flat
+however long the date range is.
+"""
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Iterable, Iterator, Literal, Optional, Sequence
+import csv
+import io
+import json
+import zlib
+
+from backend.attendance_api.routes import iter_attendance_records
+from backend.data_store.repository import get_repository
+from backend.data_store.rollups import parse_date_param
+from backend.late_stay_api.routes import iter_late_stay
+from backend.timing import RESOLVE, TimedRoute, timed_stage
+
+router = APIRouter(route_class=TimedRoute)
+
+ATTENDANCE_FIELDS = (
+    "date", "employee_id", "name", "gender", "project_id",
+    "checkin_time", "checkout_time", "total_hours", "building", "office"
+)
+LATE_STAY_FIELDS = ("date", "employee_id", "name", "gender", "project_id", "checkout_time", "office")
+
+# Rows encoded per yielded chunk
+CHUNK_ROWS = 500
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def encode_csv(rows: Iterable[dict], fields: Sequence[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson(rows: Iterable[dict], fields: Sequence[str]) -> Iterator[bytes]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({f: row.get(f) for f in fields}, ensure_ascii=False))
+        if len(lines) == CHUNK_ROWS:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+@timed_stage(RESOLVE)
+def resolve_export_range(start: Optional[str], end: Optional[str]):
+    """Validate the range; return a generator over its days plus the first and last dates"""
+    start = parse_date_param(start, "start") if start else None
+    end = parse_date_param(end, "end") if end else None
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail=f"start {start} is after end {end}")
+    repository = get_repository()
+    # Errors must be raised before the response starts streaming
+    dates = repository.get_dates(start, end)
+    if not dates:
+        raise HTTPException(status_code=404, detail=f"No attendance data between {start or 'the first day'} and {end or 'the last day'}")
+    return repository.get_days(dates[0], dates[-1]), dates[0], dates[-1]
+
+
+def export_response(rows: Iterable[dict], fields: Sequence[str], name: str,
+                    export_format: str, gzip: bool) -> StreamingResponse:
+    encode = encode_csv if export_format == "csv" else encode_ndjson
+    chunks = encode(rows, fields)
+    filename = f"{name}.{export_format}"
+    media_type = MEDIA_TYPES[export_format]
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/attendance")
+async def export_attendance(
+    start: Optional[str] = Query(None, description="Range start date (inclusive), YYYY-MM-DD (default: first day)"),
+    end: Optional[str] = Query(None, description="Range end date (inclusive), YYYY-MM-DD (default: latest day)"),
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format", description="csv or ndjson"),
+    gzip: bool = Query(False, description="Gzip-compress the download")
+):
+    """
+    Export enriched attendance records for a date range as a streamed CSV or NDJSON file
+    """
+    days, first, last = resolve_export_range(start, end)
+    employee_lookup = get_repository().get_directory().by_id
+
+    def rows():
+        for day in days:
+            for record in iter_attendance_records(day, employee_lookup):
+                record["date"] = record.get("date") or day.date
+                yield record
+
+    return export_response(rows(), ATTENDANCE_FIELDS, f"attendance_{first}_{last}", export_format, gzip)
+
+
+@router.get("/late-stay")
+async def export_late_stay(
+    start: Optional[str] = Query(None, description="Range start date (inclusive), YYYY-MM-DD (default: first day)"),
+    end: Optional[str] = Query(None, description="Range end date (inclusive), YYYY-MM-DD (default: latest day)"),
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format", description="csv or ndjson"),
+    gzip: bool = Query(False, description="Gzip-compress the download")
+):
+    """
+    Export employees who stayed after 8:00 PM for a date range as a streamed CSV or NDJSON file
+    """
+    days, first, last = resolve_export_range(start, end)
+    employee_lookup = get_repository().get_directory().by_id
+
+    def rows():
+        for day in days:
+            for entry in iter_late_stay(day, employee_lookup):
+                entry["date"] = day.date
+                yield entry
+
+    return export_response(rows(), LATE_STAY_FIELDS, f"late_stay_{first}_{last}", export_format, gzip)
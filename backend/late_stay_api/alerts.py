@@ -0,0 +1,225 @@
+"""
+Push alerts for women still checked in after 8:00 PM (safety compliance).
+
+The monitor follows the live attendance state instead of rescanning the
+late-stay list. Each woman who is checked in gets one deadline (20:00 on her
+attendance date) in a min-heap, and a single timer task sleeps until the
+earliest deadline. When it fires, anyone still inside is alerted. A check-out
+after that sends a safe-exit event. Deadlines for people who already left are
+dropped lazily when they come up. After midnight, days that fell out of the
+horizon (today, plus last night for overnight stays) are forgotten, alerts
+included, and consoles get a fresh snapshot.
+
+Alerts are encoded once and fanned out to bounded per-subscriber queues. A
+console that falls behind gets its queue replaced by a single resync marker,
+so the producer never waits on a slow client.
+"""
+from datetime import date as date_cls, datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import heapq
+import itertools
+import json
+
+from backend.data_store.columnar import LATE_STAY_MINUTE, MINUTES_PER_DAY, parse_minutes
+from backend.data_store.live_state import LiveAttendance, live_attendance
+from backend.data_store.occupancy import is_inside
+from backend.data_store.repository import get_repository
+
+LATE_STAY = "late_stay"
+SAFE_EXIT = "safe_exit"
+SNAPSHOT = "snapshot"
+
+# Put on a subscriber queue in place of dropped alerts, or to end the stream
+RESYNC = object()
+CLOSED = object()
+
+
+def late_stay_deadline(day: str) -> datetime:
+    """20:00 local time on an attendance date"""
+    return datetime.fromisoformat(day) + timedelta(minutes=LATE_STAY_MINUTE)
+
+
+def format_sse(event: str, data: dict, event_id: Optional[int] = None) -> bytes:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class WomenLateStayMonitor:
+    """Deadline-driven late-stay alerts for women, fanned out to SSE subscribers"""
+
+    def __init__(self, live: LiveAttendance, queue_size: int = 256, horizon_days: int = 1):
+        self.live = live
+        self.queue_size = queue_size
+        # Only days this recent are monitored (today, plus yesterday for overnight stays)
+        self.horizon_days = horizon_days
+        self._deadlines: List[Tuple[datetime, int, Tuple[str, str]]] = []
+        self._seq = itertools.count()
+        self._inside: Dict[Tuple[str, str], dict] = {}
+        self._alerted: Dict[Tuple[str, str], dict] = {}
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._event_ids = itertools.count(1)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pruned_on: Optional[date_cls] = None
+        self.published = 0
+        self.dropped = 0
+
+    # Lifecycle
+
+    def start(self):
+        """Start the timer task on the running loop and pick up anyone already inside"""
+        self._deadlines.clear()
+        self._inside.clear()
+        self._alerted.clear()
+        self._wakeup = asyncio.Event()
+        self.on_records(self.live.open_records())
+        self.live.add_listener(self.on_records)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self.live.remove_listener(self.on_records)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for queue in list(self._subscribers):
+            self._replace_backlog(queue, CLOSED)
+
+    # State tracking
+
+    def _relevant(self, day: str) -> bool:
+        return day >= (date_cls.today() - timedelta(days=self.horizon_days)).isoformat()
+
+    def on_records(self, changed: List[Tuple[str, dict]]):
+        """Live-state listener: track women who are inside and close alerts on exit"""
+        repository = get_repository()
+        schedule = False
+        for day, record in changed:
+            if not day or not self._relevant(day):
+                continue
+            employee_id = record.get("employee_id")
+            employee = repository.get_employee(employee_id) or {}
+            if employee.get("gender") != "Female":
+                continue
+            key = (day, employee_id)
+            if is_inside(record):
+                if key not in self._inside:
+                    heapq.heappush(self._deadlines, (late_stay_deadline(day), next(self._seq), key))
+                    schedule = True
+                # Records arrive as copies: keep the latest
+                self._inside[key] = record
+            else:
+                self._inside.pop(key, None)
+                alert = self._alerted.pop(key, None)
+                checkout = record.get("checkout_time")
+                # Also report late exits whose deadline had not fired yet (backfilled events)
+                if alert is not None or LATE_STAY_MINUTE <= parse_minutes(checkout) < MINUTES_PER_DAY:
+                    self._publish(SAFE_EXIT, {**(alert or self._describe(day, record, employee)),
+                                              "checkout_time": checkout})
+        if schedule:
+            self._wakeup.set()
+
+    def _describe(self, day: str, record: dict, employee: dict) -> dict:
+        return {
+            "date": day,
+            "employee_id": record.get("employee_id"),
+            "name": employee.get("name", ""),
+            "project_id": employee.get("project_id", ""),
+            "checkin_time": record.get("checkin_time"),
+            "building": record.get("building", ""),
+            "office": record.get("office", ""),
+        }
+
+    def _fire_due(self, now: datetime):
+        repository = get_repository()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, _, key = heapq.heappop(self._deadlines)
+            record = self._inside.get(key)
+            # Left before the deadline, or already alerted: stale entry
+            if record is None or key in self._alerted:
+                continue
+            alert = self._describe(key[0], record, repository.get_employee(key[1]) or {})
+            self._alerted[key] = alert
+            self._publish(LATE_STAY, alert)
+
+    def _prune(self, today: date_cls):
+        """Forget women tracked or alerted for days before the horizon"""
+        cutoff = (today - timedelta(days=self.horizon_days)).isoformat()
+        removed = 0
+        for tracked in (self._inside, self._alerted):
+            for key in [key for key in tracked if key[0] < cutoff]:
+                del tracked[key]
+                removed += 1
+        self._deadlines = [entry for entry in self._deadlines if entry[2][0] >= cutoff]
+        heapq.heapify(self._deadlines)
+        self._pruned_on = today
+        if removed:
+            # Consoles drop the alerts that are no longer current
+            self._publish(SNAPSHOT, self.snapshot())
+
+    async def _run(self):
+        while True:
+            now = datetime.now()
+            if now.date() != self._pruned_on:
+                self._prune(now.date())
+            self._fire_due(now)
+            self._wakeup.clear()
+            # Wake at the next deadline, or at midnight to prune
+            midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            wake_at = min(self._deadlines[0][0], midnight) if self._deadlines else midnight
+            timeout = max((wake_at - datetime.now()).total_seconds(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    # Fan-out
+
+    def snapshot(self) -> dict:
+        """Women currently alerted as still inside after 8:00 PM"""
+        alerts = sorted(self._alerted.values(), key=lambda a: (a["date"], a["employee_id"]))
+        return {"women_late_stay_employees": alerts, "count": len(alerts)}
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def _replace_backlog(self, queue: asyncio.Queue, marker):
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(marker)
+
+    def _publish(self, event: str, data: dict):
+        message = format_sse(event, data, next(self._event_ids))
+        self.published += 1
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow console: drop its backlog, it resyncs from a snapshot instead
+                self.dropped += queue.qsize()
+                self._replace_backlog(queue, RESYNC)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "tracked": len(self._inside),
+            "alerted": len(self._alerted),
+            "pending_deadlines": len(self._deadlines),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+women_late_stay_monitor = WomenLateStayMonitor(live_attendance)
@@ -1,132 +1,164 @@
 """
 Late Stay API Routes
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional
-from datetime import datetime
-import json
-from pathlib import Path
+import asyncio
 
-router = APIRouter()
+from backend.data_store.repository import get_repository, resolve_day
+from backend.data_store.rollup_store import closed_day_rollup, late_stay_entry
+from backend.data_store.rollups import GENDER, LATE, OFFICE, PROJECT, range_requested, resolve_range
+from backend.late_stay_api.alerts import CLOSED, RESYNC, SNAPSHOT, format_sse, women_late_stay_monitor
+from backend.timing import TimedRoute
 
-# Get data directory path
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-DATA_DIR = BASE_DIR / "data"
+router = APIRouter(route_class=TimedRoute)
 
-def load_json_file(filename: str):
-    """Load JSON data file"""
-    filepath = DATA_DIR / filename
-    if not filepath.exists():
-        raise HTTPException(status_code=404, detail=f"Data file {filename} not found")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+def iter_late_stay(day, employee_lookup: dict):
+    """Late-stay entries of a resolved day, enriched with employee info"""
+    attendance_records = day.records
+    
+    # Only rows flagged by the late-stay column are visited
+    for row in day.columns.late_rows:
+        record = attendance_records[row]
+        yield late_stay_entry(record, employee_lookup.get(record.get("employee_id"), {}))
+
+def build_late_stay(day, employee_lookup: dict) -> dict:
+    """Late-stay report for a resolved day"""
+    late_stay_employees = list(iter_late_stay(day, employee_lookup))
+    
+    return {
+        "date": day.date,
+        "late_stay_employees": late_stay_employees,
+        "total_count": len(late_stay_employees),
+        "female_count": len([e for e in late_stay_employees if e["gender"] == "Female"])
+    }
+
+def late_stay_from_rollup(rollup: dict) -> dict:
+    """Late-stay report for a closed day, from its materialized aggregates"""
+    late_stay = rollup["late_stay"]
+    return {
+        "date": rollup["date"],
+        "late_stay_employees": late_stay["employees"],
+        "total_count": len(late_stay["employees"]),
+        "female_count": late_stay["by_gender"].get("Female", 0)
+    }
+
+def build_women_late_stay(late_stay_data: dict) -> dict:
+    """Narrow a late-stay report down to women employees"""
+    women_late_stay = [
+        emp for emp in late_stay_data["late_stay_employees"]
+        if emp["gender"] == "Female"
+    ]
+    
+    return {
+        "date": late_stay_data["date"],
+        "women_late_stay_employees": women_late_stay,
+        "count": len(women_late_stay)
+    }
 
-def is_after_8pm(time_str: str) -> bool:
-    """Check if time is after 8:00 PM"""
-    try:
-        time_obj = datetime.strptime(time_str, "%H:%M")
-        return time_obj >= datetime.strptime("20:00", "%H:%M")
-    except:
-        return False
+def build_late_stay_range(span) -> dict:
+    """Late-stay counts over a date range, from the daily rollups"""
+    return {
+        "start": span.dates[0],
+        "end": span.dates[-1],
+        "days": span.days,
+        "total_count": span.total(LATE),
+        "female_count": span.total(LATE, GENDER, "Female"),
+        "count_by_project": span.by(LATE, PROJECT),
+        "count_by_office": span.by(LATE, OFFICE),
+        "daily": [
+            {"date": d, "total_count": total, "female_count": female}
+            for d, total, female in zip(span.dates, span.daily(LATE), span.daily(LATE, GENDER, "Female"))
+        ]
+    }
+
+def build_women_late_stay_range(span) -> dict:
+    """Women late-stay counts over a date range, from the daily rollups"""
+    return {
+        "start": span.dates[0],
+        "end": span.dates[-1],
+        "days": span.days,
+        "count": span.total(LATE, GENDER, "Female"),
+        "daily": [
+            {"date": d, "count": count}
+            for d, count in zip(span.dates, span.daily(LATE, GENDER, "Female"))
+        ]
+    }
 
 @router.get("/after-8pm")
 async def get_late_stay_after_8pm(
-    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format")
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
+    start: Optional[str] = Query(None, description="Range start date (inclusive), YYYY-MM-DD"),
+    end: Optional[str] = Query(None, description="Range end date (inclusive), YYYY-MM-DD")
 ):
     """
     Get employees who stayed after 8:00 PM
     Supports both single-day attendance.json and multi-day attendance_multi_day.json
+    With start/end, returns counts for the range instead of the employee list
     """
-    employees_data = load_json_file("employees.json")
-    
-    # Try to load multi-day data first, fallback to single-day
-    attendance_records = []
-    file_date = None
+    if range_requested(date, start, end):
+        return build_late_stay_range(resolve_range(start, end))
     
-    try:
-        multi_day_data = load_json_file("attendance_multi_day.json")
-        if isinstance(multi_day_data, dict) and "days" in multi_day_data:
-            # Multi-day format
-            target_date = date or multi_day_data.get("latest_date")
-            if target_date:
-                # Find the day data
-                day_data = next((d for d in multi_day_data["days"] if d.get("date") == target_date), None)
-                if day_data:
-                    attendance_records = day_data.get("attendance_records", [])
-                    file_date = day_data.get("date")
-        elif isinstance(multi_day_data, list):
-            # If it's a list of days
-            target_date = date
-            if target_date:
-                day_data = next((d for d in multi_day_data if d.get("date") == target_date), None)
-                if day_data:
-                    attendance_records = day_data.get("attendance_records", [])
-                    file_date = day_data.get("date")
-    except:
-        # Fallback to single-day file
-        try:
-            attendance_data = load_json_file("attendance.json")
-            if isinstance(attendance_data, dict) and "attendance_records" in attendance_data:
-                attendance_records = attendance_data["attendance_records"]
-                file_date = attendance_data.get("date")
-            elif isinstance(attendance_data, list):
-                attendance_records = attendance_data
-        except:
-            attendance_records = []
+    # Closed days are served from their materialized aggregates
+    rollup = await closed_day_rollup(date)
+    if rollup is not None:
+        return late_stay_from_rollup(rollup)
     
-    # If no date specified and we have multi-day data, use latest
-    if not date and not file_date:
-        try:
-            multi_day_data = load_json_file("attendance_multi_day.json")
-            if isinstance(multi_day_data, dict) and "days" in multi_day_data:
-                latest_day = multi_day_data["days"][-1] if multi_day_data["days"] else None
-                if latest_day:
-                    attendance_records = latest_day.get("attendance_records", [])
-                    file_date = latest_day.get("date")
-        except:
-            pass
+    employee_lookup = get_repository().get_directory().by_id
     
-    # Create employee lookup
-    employee_lookup = {e["employee_id"]: e for e in employees_data["employees"]}
+    day = resolve_day(date)
     
-    late_stay_employees = []
-    
-    for record in attendance_records:
-        if is_after_8pm(record.get("checkout_time", "")):
-            employee = employee_lookup.get(record.get("employee_id"), {})
-            late_stay_employees.append({
-                "employee_id": record.get("employee_id"),
-                "name": employee.get("name", ""),
-                "gender": employee.get("gender", ""),
-                "checkout_time": record.get("checkout_time"),
-                "project_id": employee.get("project_id", ""),
-                "office": record.get("office", "")
-            })
-    
-    return {
-        "date": date or file_date,
-        "late_stay_employees": late_stay_employees,
-        "total_count": len(late_stay_employees),
-        "female_count": len([e for e in late_stay_employees if e["gender"] == "Female"])
-    }
+    return build_late_stay(day, employee_lookup)
 
 @router.get("/women-after-8pm")
 async def get_women_late_stay(
-    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format")
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
+    start: Optional[str] = Query(None, description="Range start date (inclusive), YYYY-MM-DD"),
+    end: Optional[str] = Query(None, description="Range end date (inclusive), YYYY-MM-DD")
 ):
     """
     Get women employees who stayed after 8:00 PM (safety compliance)
     """
-    late_stay_data = await get_late_stay_after_8pm(date)
+    if range_requested(date, start, end):
+        return build_women_late_stay_range(resolve_range(start, end))
     
-    women_late_stay = [
-        emp for emp in late_stay_data["late_stay_employees"]
-        if emp["gender"] == "Female"
-    ]
+    late_stay_data = await get_late_stay_after_8pm(date, start=None, end=None)
     
-    return {
-        "date": late_stay_data["date"],
-        "women_late_stay_employees": women_late_stay,
-        "count": len(women_late_stay)
-    }
+    return build_women_late_stay(late_stay_data)
+
+@router.get("/women-after-8pm/stream")
+async def stream_women_late_stay(request: Request):
+    """
+    Server-Sent Events for women still checked in after 8:00 PM.
+    Sends a snapshot on connect, then late_stay (still inside at 20:00, or
+    checked in after it) and safe_exit events as they happen.
+    """
+    queue = women_late_stay_monitor.subscribe()
+
+    async def events():
+        try:
+            yield format_sse(SNAPSHOT, women_late_stay_monitor.snapshot())
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # Keep proxies from closing an idle connection
+                    yield b": keep-alive\n\n"
+                    continue
+                if item is CLOSED:
+                    return
+                if item is RESYNC:
+                    yield format_sse(SNAPSHOT, women_late_stay_monitor.snapshot())
+                    continue
+                yield item
+        finally:
+            women_late_stay_monitor.unsubscribe(queue)
 
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
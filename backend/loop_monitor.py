@@ -0,0 +1,70 @@
+"""
+Event-loop lag monitor.
+
+A background task sleeps for a fixed interval and measures how late it wakes
+up. The extra delay is time the event loop spent blocked in synchronous code
+(a file parse, an index build, a heavy handler) during which no other request,
+/health included, could make progress. Wake-ups later than the stall threshold
+are counted as stalls, and their lag is summed into blocked_ms.
+"""
+from typing import Optional
+import asyncio
+import time
+
+
+class LoopLagMonitor:
+    """Samples event-loop scheduling lag on the running loop"""
+
+    def __init__(self, interval: float = 0.1, stall_threshold: float = 0.05):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self._task: Optional[asyncio.Task] = None
+        self.samples = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.stalls = 0
+        self.blocked = 0.0
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(time.perf_counter() - started - self.interval)
+
+    def record(self, lag: float):
+        lag = max(lag, 0.0)
+        self.samples += 1
+        self.last_lag = lag
+        self.total_lag += lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+        if lag >= self.stall_threshold:
+            self.stalls += 1
+            self.blocked += lag
+
+    def stats(self) -> dict:
+        return {
+            "interval_ms": round(self.interval * 1000, 1),
+            "samples": self.samples,
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "avg_lag_ms": round(self.total_lag / self.samples * 1000, 2) if self.samples else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "stalls": self.stalls,
+            "blocked_ms": round(self.blocked * 1000, 1),
+        }
+
+
+loop_lag_monitor = LoopLagMonitor()
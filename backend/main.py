@@ -1,20 +1,49 @@
 """
 Main FastAPI application entry point
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from pathlib import Path
 
+from backend.admin_api.routes import router as admin_router
 from backend.attendance_api.routes import router as attendance_router
 from backend.late_stay_api.routes import router as late_stay_router
 from backend.reports.routes import router as reports_router
+from backend.dashboard_api.routes import router as dashboard_router
+from backend.export_api.routes import router as export_router
+from backend.data_store.cache import dataset_cache
+from backend.data_store.event_log import event_log
+from backend.data_store.live_state import live_attendance
+from backend.data_store.repository import get_repository, repository_ready
+from backend.data_store.rollup_store import rollup_scheduler
+from backend.late_stay_api.alerts import women_late_stay_monitor
+from backend.loop_monitor import loop_lag_monitor
+from backend.metrics import MetricsMiddleware, render_metrics
+from backend.profiling import ProfilingMiddleware, profiling_token
+from backend.response_cache import ConditionalGetMiddleware, response_cache
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Rebuild ingested attendance state from the write-ahead log before serving
+    live_attendance.ensure_replayed()
+    women_late_stay_monitor.start()
+    loop_lag_monitor.start()
+    # Materializes closed days' aggregates in the background (catch-up now, then after each midnight)
+    rollup_scheduler.start()
+    yield
+    await rollup_scheduler.stop()
+    await loop_lag_monitor.stop()
+    await women_late_stay_monitor.stop()
+    event_log.close()
 
 app = FastAPI(
     title="Attendance & Late-Stay Copilot API",
     description="AI Copilot for Automated Attendance & Late-Stay Monitoring",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -25,9 +54,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(attendance_router, prefix="/api/attendance", tags=["Attendance"])
-app.include_router(late_stay_router, prefix="/api/late-stay", tags=["Late Stay"])
-app.include_router(reports_router, prefix="/api/reports", tags=["Reports"])
+# ETag / 304 and encoded-response caching for the read endpoints
+app.add_middleware(ConditionalGetMiddleware, prefixes=("/api/",))
+
+# Outermost, so cached and 304 responses are timed too
+app.add_middleware(MetricsMiddleware, router_app=app)
+
+# Opt-in cProfile hook; not installed at all unless PROFILING_TOKEN is set
+if profiling_token():
+    app.add_middleware(ProfilingMiddleware)
+
+# Data is (re)loaded in a worker thread before a handler runs, never on the event loop
+data_dependencies = [Depends(repository_ready)]
+
+app.include_router(attendance_router, prefix="/api/attendance", tags=["Attendance"], dependencies=data_dependencies)
+app.include_router(late_stay_router, prefix="/api/late-stay", tags=["Late Stay"], dependencies=data_dependencies)
+app.include_router(reports_router, prefix="/api/reports", tags=["Reports"], dependencies=data_dependencies)
+app.include_router(dashboard_router, prefix="/api/dashboard", tags=["Dashboard"], dependencies=data_dependencies)
+app.include_router(export_router, prefix="/api/export", tags=["Export"], dependencies=data_dependencies)
+app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 static_dir = BASE_DIR / "frontend" / "dashboard"
@@ -46,7 +91,23 @@ async def root():
 @app.get("/health")
 async def health():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "attendance-latestay-copilot"}
+    return {
+        "status": "healthy",
+        "service": "attendance-latestay-copilot",
+        "storage": get_repository().name,
+        "data_cache": dataset_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "live_attendance": live_attendance.stats(),
+        "women_late_stay_alerts": women_late_stay_monitor.stats(),
+        "daily_rollups": rollup_scheduler.stats(),
+        "event_loop": loop_lag_monitor.stats()
+    }
+
+# A plain def, so FastAPI runs it in the threadpool: the dataset gauges may have to (re)load data
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Request, cache, dataset and event-loop metrics in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,229 @@
+"""
+Request metrics in the Prometheus text exposition format.
+
+MetricsMiddleware times every HTTP request and records, per route template:
+- a request counter by method and status;
+- a latency histogram;
+- a histogram for each stage reported through backend.timing (load, resolve,
+  compute, serialize).
+render_metrics() serves these together with gauges for the data cache, the
+response cache, the dataset and the event loop, for /metrics.
+"""
+from bisect import bisect_left
+from collections import Counter
+from starlette.routing import Mount, compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, List, Optional, Sequence, Tuple
+import threading
+import time
+
+from backend.data_store.cache import DATASET_FILES, dataset_cache
+from backend.data_store.repository import get_repository
+from backend.loop_monitor import loop_lag_monitor
+from backend.response_cache import response_cache
+from backend.timing import SERIALIZE, begin_request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (the le="+Inf" bucket is the count)"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # Non-cumulative here; render() accumulates
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, **labels) -> List[str]:
+        lines = []
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            lines.append(f"{name}_bucket{_labels(**labels, le=_number(bound))} {running}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {self.count}")
+        lines.append(f"{name}_sum{_labels(**labels)} {self.sum!r}")
+        lines.append(f"{name}_count{_labels(**labels)} {self.count}")
+        return lines
+
+
+class RequestMetrics:
+    """Counters and histograms for handled requests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Counter = Counter()
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.stages: Dict[Tuple[str, str], Histogram] = {}
+        self.in_progress = 0
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stages: Dict[str, float]):
+        with self._lock:
+            self.requests[(method, route, str(status))] += 1
+            self.latency.setdefault((method, route), Histogram()).observe(seconds)
+            for name, stage_seconds in stages.items():
+                self.stages.setdefault((route, name), Histogram()).observe(stage_seconds)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Requests handled, by route template and status",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+            lines += [
+                "# HELP http_request_duration_seconds Request latency until the response body is sent",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), histogram in sorted(self.latency.items()):
+                lines += histogram.render("http_request_duration_seconds", method=method, route=route)
+            lines += [
+                "# HELP http_request_stage_seconds Time spent per request stage (load, resolve, compute, serialize)",
+                "# TYPE http_request_stage_seconds histogram",
+            ]
+            for (route, name), histogram in sorted(self.stages.items()):
+                lines += histogram.render("http_request_stage_seconds", route=route, stage=name)
+            lines += [
+                "# HELP http_requests_in_progress Requests currently being handled",
+                "# TYPE http_requests_in_progress gauge",
+                f"http_requests_in_progress {self.in_progress}",
+            ]
+            return lines
+
+
+request_metrics = RequestMetrics()
+
+
+class RouteTemplates:
+    """Maps request paths to their full route templates, e.g. /api/reports/work-balance/project/{project_id}"""
+
+    def __init__(self, app):
+        self.app = app
+        self._patterns = None
+
+    def _build(self) -> List[Tuple[object, str]]:
+        templates = set(self.app.openapi().get("paths", {}))
+        for route in self.app.routes:
+            if isinstance(route, Mount):
+                templates.add(route.path + "/{path:path}")
+            elif isinstance(getattr(route, "path", None), str):
+                templates.add(route.path)
+        # Literal templates first, so /api/x/summary wins over /api/x/{id}
+        ordered = sorted(templates, key=lambda t: ("{" in t, t))
+        return [(compile_path(template)[0], template) for template in ordered]
+
+    def template(self, path: str) -> str:
+        if self._patterns is None:
+            self._patterns = self._build()
+        for pattern, template in self._patterns:
+            if pattern.match(path):
+                return template
+        # Unknown paths share one label to keep cardinality bounded
+        return "unmatched"
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and records it in request_metrics"""
+
+    def __init__(self, app: ASGIApp, router_app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        # The application whose route templates label the requests
+        self.routes = RouteTemplates(router_app)
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = begin_request()
+        started = time.perf_counter()
+        status = 500
+        response_started: Optional[float] = None
+
+        async def send_wrapper(message: Message):
+            nonlocal status, response_started
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_started = time.perf_counter()
+            await send(message)
+
+        self.metrics.in_progress += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.in_progress -= 1
+            if timings.endpoint_done is not None and response_started is not None:
+                timings.add(SERIALIZE, max(response_started - timings.endpoint_done, 0.0))
+            self.metrics.observe(scope["method"], self.routes.template(scope["path"]), status,
+                                 time.perf_counter() - started, timings.stages)
+
+
+def _gauge(lines: List[str], name: str, help_text: str, value, metric_type: str = "gauge", **labels):
+    if not any(line.startswith(f"# TYPE {name} ") for line in lines):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+    lines.append(f"{name}{_labels(**labels)} {_number(value)}")
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+    lines = request_metrics.render()
+
+    cache = dataset_cache.stats()
+    _gauge(lines, "data_cache_hits_total", "Dataset cache lookups served from memory", cache["hits"], "counter")
+    _gauge(lines, "data_cache_misses_total", "Dataset files parsed for the first time", cache["misses"], "counter")
+    _gauge(lines, "data_cache_reloads_total", "Dataset files re-parsed after changing on disk", cache["reloads"], "counter")
+    _gauge(lines, "data_cache_coalesced_total", "Loads that awaited another request's parse", cache["coalesced"], "counter")
+    _gauge(lines, "data_cache_hit_ratio", "Share of dataset cache lookups served from memory", cache["hit_ratio"])
+
+    responses = response_cache.stats()
+    for key in ("hits", "misses", "not_modified", "evictions"):
+        if key in responses:
+            _gauge(lines, f"response_cache_{key}_total", f"Response cache {key.replace('_', ' ')}", responses[key], "counter")
+
+    for filename in DATASET_FILES:
+        try:
+            size = (dataset_cache.data_dir / filename).stat().st_size
+        except OSError:
+            continue
+        _gauge(lines, "dataset_file_bytes", "Size of a dataset file on disk", size, file=filename)
+    try:
+        repository = get_repository()
+        _gauge(lines, "dataset_days", "Dates with attendance data", len(repository.get_dates()))
+        _gauge(lines, "dataset_employees", "Employees in master data", len(repository.get_employees()))
+    except Exception:
+        # Missing data files must not break the metrics endpoint
+        pass
+
+    loop = loop_lag_monitor
+    _gauge(lines, "event_loop_lag_seconds", "Lag of the latest event-loop sample", loop.last_lag)
+    _gauge(lines, "event_loop_lag_max_seconds", "Largest event-loop lag seen", loop.max_lag)
+    _gauge(lines, "event_loop_stalls_total", "Event-loop samples late by at least the stall threshold", loop.stalls, "counter")
+    _gauge(lines, "event_loop_blocked_seconds_total", "Total lag of the stalled samples", loop.blocked, "counter")
+    return "\n".join(lines) + "\n"
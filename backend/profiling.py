@@ -0,0 +1,215 @@
+"""
+Opt-in per-request profiling.
+
+Profiling is enabled by setting the PROFILING_TOKEN environment variable.
+Without it the middleware is not installed at all, so ordinary requests pay
+nothing. With it, a request carrying "X-Profile: <token>" is run under
+cProfile, end to end and bypassing the response cache. Three files are stored
+under data/profiles, named by a profile id that is returned in the X-Profile-Id
+response header:
+- <id>.pstats for pstats / snakeviz;
+- <id>.collapsed.txt, collapsed stacks for flamegraph.pl / speedscope;
+- <id>.json with the request metadata.
+Only the newest PROFILING_KEEP profiles (50 by default) are kept.
+
+cProfile follows the event-loop thread: work that other requests do on the
+loop while the profiled one is in flight shows up as well, and work in worker
+threads does not. Profiled requests run one at a time.
+"""
+from datetime import datetime
+from pathlib import Path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, List, Optional
+import asyncio
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+
+from backend.data_store.cache import DATA_DIR
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+# Set on the ASGI scope of a profiled request
+PROFILE_SCOPE_KEY = "profiling"
+
+PROFILES_DIR = DATA_DIR / "profiles"
+DEFAULT_KEEP = 50
+# Collapsed stacks deeper than this are cut off
+MAX_STACK_DEPTH = 64
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{12}-[A-Za-z0-9_]+-[0-9a-f]{8}$")
+
+
+def profiling_token() -> Optional[str]:
+    """The admin token that enables profiling, or None when profiling is off"""
+    return os.environ.get("PROFILING_TOKEN") or None
+
+
+def check_token(supplied: Optional[str]) -> bool:
+    token = profiling_token()
+    return bool(token and supplied) and hmac.compare_digest(token.encode(), supplied.encode())
+
+
+def _label(func) -> str:
+    filename, line, name = func
+    if filename == "~":
+        # Built-ins, e.g. <method 'append' of 'list' objects>
+        return name
+    return f"{name} ({Path(filename).name}:{line})"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> List[str]:
+    """
+    Collapsed-stack lines ("root;caller;callee <microseconds>") from a profile.
+
+    cProfile only records caller -> callee edges, so each callee's time is
+    split between its call paths in proportion to the cumulative time of each
+    edge.
+    """
+    entries = stats.stats
+    callees: Dict[tuple, List[tuple]] = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, entry in entries.items() if not entry[4]]
+
+    totals: Dict[str, float] = {}
+
+    def walk(func, share: float, path: List[str], on_path: set):
+        _, _, own, cumulative, _ = entries[func]
+        if cumulative <= 0 or share <= 0:
+            return
+        fraction = min(share / cumulative, 1.0)
+        path.append(_label(func))
+        on_path.add(func)
+        if own * fraction > 0:
+            key = ";".join(path)
+            totals[key] = totals.get(key, 0.0) + own * fraction
+        if len(path) < MAX_STACK_DEPTH:
+            for callee, edge_cumulative in callees.get(func, ()):
+                if callee not in on_path:
+                    walk(callee, edge_cumulative * fraction, path, on_path)
+        on_path.discard(func)
+        path.pop()
+
+    for root in roots:
+        walk(root, entries[root][3], [], set())
+    return [f"{stack} {round(seconds * 1e6)}" for stack, seconds in sorted(totals.items()) if seconds >= 5e-7]
+
+
+class ProfileStore:
+    """Bounded directory of stored profiles; the oldest are deleted first"""
+
+    def __init__(self, directory: Path = PROFILES_DIR, keep: int = DEFAULT_KEEP):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def new_id(self, path: str) -> str:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:60] or "root"
+        return f"{datetime.now():%Y%m%dT%H%M%S%f}-{slug}-{uuid.uuid4().hex[:8]}"
+
+    def path(self, profile_id: str, suffix: str) -> Optional[Path]:
+        """Path of a stored file, or None for ids that are malformed or unknown"""
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}{suffix}"
+        return path if path.exists() else None
+
+    def save(self, profile_id: str, profiler: cProfile.Profile, meta: dict):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stats = pstats.Stats(profiler)
+        stats_path = self.directory / f"{profile_id}.pstats"
+        stats.dump_stats(str(stats_path))
+        with open(self.directory / f"{profile_id}.collapsed.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(collapsed_stacks(stats)) + "\n")
+        # Metadata last: a profile is listed only once all its files exist
+        tmp_path = self.directory / f"{profile_id}.json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.directory / f"{profile_id}.json")
+        self.rotate()
+
+    def rotate(self):
+        stored = self._meta_paths()
+        for meta_path in stored[:max(len(stored) - self.keep, 0)]:
+            profile_id = meta_path.name[:-len(".json")]
+            for suffix in (".json", ".pstats", ".collapsed.txt"):
+                try:
+                    (self.directory / f"{profile_id}{suffix}").unlink()
+                except OSError:
+                    pass
+
+    def _meta_paths(self) -> List[Path]:
+        # Ids start with a microsecond timestamp, so name order is age order
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("*.json"))
+
+    def list(self) -> List[dict]:
+        """Metadata of stored profiles, newest first"""
+        profiles = []
+        for meta_path in reversed(self._meta_paths()):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+
+profile_store = ProfileStore(keep=int(os.environ.get("PROFILING_KEEP", DEFAULT_KEEP)))
+
+
+class ProfilingMiddleware:
+    """Runs requests that carry a valid X-Profile token under cProfile and stores the result"""
+
+    def __init__(self, app: ASGIApp, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+        # cProfile cannot profile two overlapping requests on one thread
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        supplied = next((v.decode("latin-1") for k, v in scope["headers"] if k == PROFILE_HEADER.encode()), None)
+        if supplied is None or not check_token(supplied):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = self.store.new_id(scope["path"])
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (PROFILE_ID_HEADER.encode(), profile_id.encode())]}
+            await send(message)
+
+        scope[PROFILE_SCOPE_KEY] = True
+        async with self._lock:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+                meta = {
+                    "id": profile_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "created": datetime.now().isoformat(timespec="seconds"),
+                }
+                await asyncio.get_running_loop().run_in_executor(None, self.store.save, profile_id, profiler, meta)
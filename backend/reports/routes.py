@@ -1,272 +1,249 @@
 """
 Reports API Routes
 """
+from array import array
+from datetime import date as date_cls
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
-from datetime import datetime
-import json
-from pathlib import Path
+from typing import Dict, Literal, Optional
+import math
 
-router = APIRouter()
+from backend.data_store.columnar import MISSING, employee_codes, format_minutes
+from backend.data_store.employees import EmployeeDirectory
+from backend.data_store.repository import get_repository, resolve_day
+from backend.data_store.presence import calendar_periods, longest_run, popcount, presence_index, trailing_run
+from backend.data_store.rollup_store import closed_day_rollup, presence_counts
+from backend.data_store.rollups import (
+    LATE, MINUTES, MODE, PRESENT, PROJECT, RECORDS, parse_date_param, range_requested, resolve_range
+)
+from backend.reports.wellbeing import WINDOW_DAYS, build_at_risk_report
+from backend.timing import TimedRoute
 
-# Get data directory path
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-DATA_DIR = BASE_DIR / "data"
+router = APIRouter(route_class=TimedRoute)
 
-def load_json_file(filename: str):
-    """Load JSON data file"""
-    filepath = DATA_DIR / filename
-    if not filepath.exists():
-        raise HTTPException(status_code=404, detail=f"Data file {filename} not found")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def calculate_hours(checkin: str, checkout: str) -> float:
-    """Calculate total work hours as float"""
-    try:
-        checkin_time = datetime.strptime(checkin, "%H:%M")
-        checkout_time = datetime.strptime(checkout, "%H:%M")
-        
-        if checkout_time < checkin_time:
-            checkout_time = datetime.strptime(checkout, "%H:%M").replace(day=2)
-            checkin_time = datetime.strptime(checkin, "%H:%M").replace(day=1)
-        
-        diff = checkout_time - checkin_time
-        return diff.seconds / 3600.0
-    except:
-        return 0.0
-
-def is_after_8pm(time_str: str) -> bool:
-    """Check if time is after 8:00 PM"""
-    try:
-        time_obj = datetime.strptime(time_str, "%H:%M")
-        return time_obj >= datetime.strptime("20:00", "%H:%M")
-    except:
-        return False
-
-@router.get("/work-balance/project/{project_id}")
-async def get_work_balance_by_project(
-    project_id: str,
-    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format")
-):
-    """
-    Get work balance report for a project
-    """
-    employees_data = load_json_file("employees.json")
-    projects_data = load_json_file("projects.json")
-    
-    # Find project
-    project = next((p for p in projects_data["projects"] if p["project_id"] == project_id), None)
-    if not project:
-        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
-    
-    # Get employees in this project
-    project_employees = [e for e in employees_data["employees"] if e["project_id"] == project_id]
-    employee_ids = {e["employee_id"] for e in project_employees}
-    
-    # Try to load multi-day data first, fallback to single-day
-    attendance_records = []
-    file_date = None
-    
-    try:
-        multi_day_data = load_json_file("attendance_multi_day.json")
-        if isinstance(multi_day_data, dict) and "days" in multi_day_data:
-            # Multi-day format
-            target_date = date or multi_day_data.get("latest_date")
-            if target_date:
-                # Find the day data
-                day_data = next((d for d in multi_day_data["days"] if d.get("date") == target_date), None)
-                if day_data:
-                    attendance_records = day_data.get("attendance_records", [])
-                    file_date = day_data.get("date")
-        elif isinstance(multi_day_data, list):
-            # If it's a list of days
-            target_date = date
-            if target_date:
-                day_data = next((d for d in multi_day_data if d.get("date") == target_date), None)
-                if day_data:
-                    attendance_records = day_data.get("attendance_records", [])
-                    file_date = day_data.get("date")
-    except:
-        # Fallback to single-day file
-        try:
-            attendance_data = load_json_file("attendance.json")
-            if isinstance(attendance_data, dict) and "attendance_records" in attendance_data:
-                attendance_records = attendance_data["attendance_records"]
-                file_date = attendance_data.get("date")
-            elif isinstance(attendance_data, list):
-                attendance_records = attendance_data
-                file_date = None
-        except:
-            attendance_records = []
-            file_date = None
-    
-    # If no date specified and we have multi-day data, use latest
-    if not date and not file_date:
-        try:
-            multi_day_data = load_json_file("attendance_multi_day.json")
-            if isinstance(multi_day_data, dict) and "days" in multi_day_data:
-                latest_day = multi_day_data["days"][-1] if multi_day_data["days"] else None
-                if latest_day:
-                    attendance_records = latest_day.get("attendance_records", [])
-                    file_date = latest_day.get("date")
-        except:
-            pass
-    
-    # Get attendance records for project employees
-    project_attendance = [
-        r for r in attendance_records
-        if r.get("employee_id") in employee_ids
-    ]
-    
-    # Calculate statistics
-    total_hours = 0
-    late_night_count = 0
-    
-    for record in project_attendance:
-        hours = calculate_hours(record["checkin_time"], record["checkout_time"])
-        total_hours += hours
-        if is_after_8pm(record["checkout_time"]):
-            late_night_count += 1
-    
-    avg_hours = total_hours / len(project_attendance) if project_attendance else 0
-    late_night_frequency = "High" if late_night_count > len(project_attendance) * 0.3 else "Medium" if late_night_count > 0 else "Low"
+def summarize_work_balance(project: dict, total_employees: int, attendance_count: int,
+                           total_minutes: int, late_night_count: int) -> dict:
+    """Work balance statistics for one project from its attendance totals"""
+    avg_minutes = total_minutes / attendance_count if attendance_count else 0
+    avg_hours = avg_minutes / 60.0
+    late_night_frequency = "High" if late_night_count > attendance_count * 0.3 else "Medium" if late_night_count > 0 else "Low"
     
     # Generate recommendation
     recommendation = "Work hours are balanced"
     if avg_hours > 10 and late_night_count > 0:
         recommendation = "Introduce shift rotation and mandatory rest days"
-    elif late_night_count > len(project_attendance) * 0.5:
+    elif late_night_count > attendance_count * 0.5:
         recommendation = "High late-night work detected. Consider workload redistribution"
     
-    hours_str = f"{int(avg_hours)}h {int((avg_hours % 1) * 60)}m"
+    hours_str = format_minutes(int(avg_minutes))
     
     return {
-        "project_id": project_id,
+        "project_id": project["project_id"],
         "project_name": project["project_name"],
         "average_work_hours": hours_str,
-        "total_employees": len(project_employees),
+        "total_employees": total_employees,
         "late_night_frequency": late_night_frequency,
         "late_night_count": late_night_count,
         "requires_night_shift": project.get("requires_night_shift", False),
-        "recommendation": recommendation,
-        "date": date or file_date
+        "recommendation": recommendation
     }
 
-@router.get("/wfo-compliance")
-async def get_wfo_compliance(
-    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format")
+def build_work_balance(project: dict, day, directory: EmployeeDirectory) -> dict:
+    """Work balance statistics for one project on a resolved day"""
+    members = directory.select(project_id=project["project_id"])
+    
+    # Select the project's rows with a column mask and aggregate over it; open
+    # sessions (no check-out yet) would count as zero-hour days, so they are left out
+    columns = day.columns
+    project_mask = columns.checked_out(columns.mask_for(directory.code_table(members)))
+    
+    summary = summarize_work_balance(
+        project,
+        directory.count(members),
+        sum(project_mask),
+        columns.total_minutes(project_mask),
+        columns.late_stay_count(project_mask)
+    )
+    summary["date"] = day.date
+    return summary
+
+def work_balance_from_rollup(project: dict, rollup: dict, total_employees: int) -> dict:
+    """Work balance statistics for one project on a closed day, from its materialized aggregates"""
+    totals = rollup["projects"].get(project["project_id"], {})
+    summary = summarize_work_balance(
+        project,
+        total_employees,
+        totals.get("records", 0),
+        totals.get("minutes", 0),
+        totals.get("late", 0)
+    )
+    summary["date"] = rollup["date"]
+    return summary
+
+def build_work_balance_range(project: dict, span, total_employees: int) -> dict:
+    """Work balance statistics for one project over a date range, from the daily rollups"""
+    project_id = project["project_id"]
+    summary = summarize_work_balance(
+        project,
+        total_employees,
+        span.total(RECORDS, PROJECT, project_id),
+        span.total(MINUTES, PROJECT, project_id),
+        span.total(LATE, PROJECT, project_id)
+    )
+    summary.update({"start": span.dates[0], "end": span.dates[-1], "days": span.days})
+    return summary
+
+def select_projects(projects: list, project_type: Optional[str] = None,
+                    requires_night_shift: Optional[bool] = None) -> list:
+    """Projects matching the optional project_type / requires_night_shift filters"""
+    selected = []
+    for project in projects:
+        if project_type and str(project.get("project_type", "")).lower() != project_type.lower():
+            continue
+        if requires_night_shift is not None and bool(project.get("requires_night_shift", False)) != requires_night_shift:
+            continue
+        selected.append(project)
+    return selected
+
+def build_projects_work_balance(projects: list, day, employees: list) -> Dict[str, dict]:
+    """
+    Work balance statistics for several projects on a resolved day.
+    Employees and the day's rows are each visited once, whatever the number of projects.
+    """
+    slot_of = {p["project_id"]: i for i, p in enumerate(projects)}
+    headcount = [0] * len(projects)
+    
+    members = []
+    for emp in employees:
+        slot = slot_of.get(emp.get("project_id"))
+        if slot is not None:
+            headcount[slot] += 1
+            members.append((employee_codes.intern(emp.get("employee_id")), slot + 1))
+    
+    # Employee code -> project slot (0 means not in a selected project)
+    project_of = array("H", bytes(2 * len(employee_codes)))
+    for code, slot in members:
+        project_of[code] = slot
+    
+    attendance = [0] * (len(projects) + 1)
+    minutes = [0] * (len(projects) + 1)
+    late = [0] * (len(projects) + 1)
+    columns = day.columns
+    for code, checkout, duration, late_stay in zip(columns.employee, columns.checkout, columns.duration, columns.late_stay):
+        # Open sessions have no hours worked yet
+        if checkout == MISSING:
+            continue
+        slot = project_of[code] if code < len(project_of) else 0
+        attendance[slot] += 1
+        minutes[slot] += duration
+        late[slot] += late_stay
+    
+    report = {}
+    for i, project in enumerate(projects):
+        summary = summarize_work_balance(project, headcount[i], attendance[i + 1], minutes[i + 1], late[i + 1])
+        summary["date"] = day.date
+        report[project["project_id"]] = summary
+    return report
+
+def build_projects_work_balance_range(projects: list, span, directory: EmployeeDirectory) -> Dict[str, dict]:
+    """Work balance statistics for several projects over a date range, from the daily rollups"""
+    return {
+        p["project_id"]: build_work_balance_range(p, span, directory.count(directory.select(project_id=p["project_id"])))
+        for p in projects
+    }
+
+@router.get("/work-balance/projects")
+async def get_work_balance_for_projects(
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
+    start: Optional[str] = Query(None, description="Range start date (inclusive), YYYY-MM-DD"),
+    end: Optional[str] = Query(None, description="Range end date (inclusive), YYYY-MM-DD"),
+    project_type: Optional[str] = Query(None, description="Only projects of this type, e.g. Client or Internal"),
+    requires_night_shift: Optional[bool] = Query(None, description="Only projects that do (true) or do not (false) require night shifts")
 ):
     """
-    Get Work From Office compliance report with separate WFO and WFH compliance.
-    This endpoint calculates compliance separately for WFO and WFH employees based on their Mode_of_work.
+    Get work balance report for every project (optionally filtered), for one date or a start/end range
     """
-    try:
-        employees_data = load_json_file("employees.json")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error loading employees file: {str(e)}")
+    repository = get_repository()
+    projects = select_projects(repository.get_projects(), project_type, requires_night_shift)
     
-    # Try to load multi-day data first, fallback to single-day
-    attendance_records = []
-    file_date = None
+    if range_requested(date, start, end):
+        span = resolve_range(start, end)
+        report = build_projects_work_balance_range(projects, span, repository.get_directory())
+        return {
+            "start": span.dates[0],
+            "end": span.dates[-1],
+            "days": span.days,
+            "projects": list(report.values()),
+            "count": len(report)
+        }
     
-    try:
-        multi_day_data = load_json_file("attendance_multi_day.json")
-        if isinstance(multi_day_data, dict) and "days" in multi_day_data:
-            # Multi-day format
-            target_date = date or multi_day_data.get("latest_date")
-            if target_date:
-                # Find the day data
-                day_data = next((d for d in multi_day_data["days"] if d.get("date") == target_date), None)
-                if day_data:
-                    attendance_records = day_data.get("attendance_records", [])
-                    file_date = day_data.get("date")
-        elif isinstance(multi_day_data, list):
-            # If it's a list of days
-            target_date = date
-            if target_date:
-                day_data = next((d for d in multi_day_data if d.get("date") == target_date), None)
-                if day_data:
-                    attendance_records = day_data.get("attendance_records", [])
-                    file_date = day_data.get("date")
-    except:
-        # Fallback to single-day file
-        try:
-            attendance_data = load_json_file("attendance.json")
-            if isinstance(attendance_data, dict) and "attendance_records" in attendance_data:
-                attendance_records = attendance_data["attendance_records"]
-                file_date = attendance_data.get("date")
-            elif isinstance(attendance_data, list):
-                attendance_records = attendance_data
-                file_date = None
-        except:
-            attendance_records = []
-            file_date = None
-    
-    # If no date specified and we have multi-day data, use latest
-    if not date and not file_date:
-        try:
-            multi_day_data = load_json_file("attendance_multi_day.json")
-            if isinstance(multi_day_data, dict) and "days" in multi_day_data:
-                latest_day = multi_day_data["days"][-1] if multi_day_data["days"] else None
-                if latest_day:
-                    attendance_records = latest_day.get("attendance_records", [])
-                    file_date = latest_day.get("date")
-        except:
-            pass
-    
-    # Create employee lookup with mode of work - separate WFO and WFH employees
-    employee_lookup = {}
-    wfo_employees = []  # List of employee IDs who should work from office
-    wfh_employees = []  # List of employee IDs who should work from home
-    
-    for emp in employees_data.get("employees", []):
-        emp_id = emp.get("employee_id")
-        if not emp_id:
-            continue  # Skip employees without ID
-        
-        employee_lookup[emp_id] = emp
-        
-        # Get Mode_of_work field (case-insensitive, default to WFO if not specified)
-        mode = emp.get("Mode_of_work", "WFO")
-        if isinstance(mode, str):
-            mode = mode.upper().strip()
-        else:
-            mode = "WFO"  # Default to WFO if not a string
-        
-        # Categorize employees by work mode
-        if mode == "WFO":
-            wfo_employees.append(emp_id)
-        elif mode == "WFH":
-            wfh_employees.append(emp_id)
-        else:
-            # If mode is neither WFO nor WFH, default to WFO
-            wfo_employees.append(emp_id)
-    
-    # Get present employee IDs from attendance records
-    present_employee_ids = set()
-    for record in attendance_records:
-        emp_id = record.get("employee_id")
-        if emp_id:
-            present_employee_ids.add(emp_id)
-    
-    # Calculate WFO and WFH present counts
-    wfo_total = len(wfo_employees)
-    wfo_present = len([eid for eid in wfo_employees if eid in present_employee_ids])
+    # Closed days are served from their materialized aggregates
+    rollup = await closed_day_rollup(date)
+    if rollup is not None:
+        directory = repository.get_directory()
+        report = {
+            p["project_id"]: work_balance_from_rollup(p, rollup, directory.count(directory.select(project_id=p["project_id"])))
+            for p in projects
+        }
+        return {
+            "date": rollup["date"],
+            "projects": list(report.values()),
+            "count": len(report)
+        }
+    
+    day = resolve_day(date)
+    report = build_projects_work_balance(projects, day, repository.get_employees())
+    return {
+        "date": day.date,
+        "projects": list(report.values()),
+        "count": len(report)
+    }
+
+@router.get("/work-balance/project/{project_id}")
+async def get_work_balance_by_project(
+    project_id: str,
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
+    start: Optional[str] = Query(None, description="Range start date (inclusive), YYYY-MM-DD"),
+    end: Optional[str] = Query(None, description="Range end date (inclusive), YYYY-MM-DD")
+):
+    """
+    Get work balance report for a project, for one date or a start/end range
+    """
+    repository = get_repository()
+    
+    # Find project
+    project = repository.get_project(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+    
+    directory = repository.get_directory()
+    if range_requested(date, start, end):
+        return build_work_balance_range(project, resolve_range(start, end), directory.count(directory.select(project_id=project_id)))
+    
+    rollup = await closed_day_rollup(date)
+    if rollup is not None:
+        return work_balance_from_rollup(project, rollup, directory.count(directory.select(project_id=project_id)))
+    
+    day = resolve_day(date)
+    
+    return build_work_balance(project, day, directory)
+
+def summarize_wfo_compliance(date: str, directory: EmployeeDirectory, total_present: int,
+                              wfo_present: int, wfh_present: int) -> dict:
+    """WFO/WFH compliance for a day from its present counts"""
+    # Employees by Mode_of_work (anything other than WFH counts as WFO), from the mode index
+    wfo_total = directory.count(directory.select(mode="WFO") & directory.identified)
     wfo_absent = wfo_total - wfo_present
     
-    wfh_total = len(wfh_employees)
-    wfh_present = len([eid for eid in wfh_employees if eid in present_employee_ids])
+    wfh_total = directory.count(directory.select(mode="WFH") & directory.identified)
     wfh_absent = wfh_total - wfh_present
     
     # Calculate compliance as percentage of total present employees (so they sum to 100%)
-    total_present = len(present_employee_ids)
     wfo_compliance_pct = (wfo_present / total_present * 100) if total_present > 0 else 0.0
     wfh_compliance_pct = (wfh_present / total_present * 100) if total_present > 0 else 0.0
     
     # Overall compliance: Total employees present vs total employees
-    total_employees = len(employees_data.get("employees", []))
-    present_employees = len(present_employee_ids)
+    total_employees = len(directory)
+    present_employees = total_present
     absent_employees = total_employees - present_employees
     overall_compliance = (present_employees / total_employees * 100) if total_employees > 0 else 0.0
     
@@ -274,7 +251,7 @@ async def get_wfo_compliance(
     status = "Compliant" if overall_compliance >= 80 else "Non-Compliant"
     
     return {
-        "date": date or file_date,
+        "date": date,
         "total_employees": total_employees,
         "present_employees": present_employees,
         "absent_employees": absent_employees,
@@ -294,6 +271,199 @@ async def get_wfo_compliance(
         "status": status
     }
 
+def build_wfo_compliance(day, directory: EmployeeDirectory) -> dict:
+    """WFO/WFH compliance for a resolved day"""
+    return summarize_wfo_compliance(day.date, directory, *presence_counts(day, directory))
+
+def wfo_compliance_from_rollup(rollup: dict, directory: EmployeeDirectory) -> dict:
+    """WFO/WFH compliance for a closed day, from its materialized aggregates"""
+    presence = rollup["presence"]
+    return summarize_wfo_compliance(rollup["date"], directory, presence["present"], presence["wfo"], presence["wfh"])
+
+def build_wfo_compliance_range(span, directory: EmployeeDirectory) -> dict:
+    """
+    WFO/WFH compliance over a date range, from the daily rollups.
+    Counts are person-days: each employee counts once per day present.
+    """
+    days = span.days
+    total_employees = len(directory)
+    wfh_total = directory.count(directory.select(mode="WFH") & directory.identified)
+    wfo_total = directory.count(directory.select(mode="WFO") & directory.identified)
+    
+    present = span.total(PRESENT)
+    wfo_present = span.total(PRESENT, MODE, "WFO")
+    wfh_present = span.total(PRESENT, MODE, "WFH")
+    expected = total_employees * days
+    
+    overall_compliance = (present / expected * 100) if expected > 0 else 0.0
+    wfo_compliance_pct = (wfo_present / present * 100) if present > 0 else 0.0
+    wfh_compliance_pct = (wfh_present / present * 100) if present > 0 else 0.0
+    
+    return {
+        "start": span.dates[0],
+        "end": span.dates[-1],
+        "days": days,
+        "total_employees": total_employees,
+        "present_person_days": present,
+        "expected_person_days": expected,
+        "average_present_employees": round(present / days, 2),
+        "compliance_percentage": round(overall_compliance, 2),
+        "wfo_total": wfo_total,
+        "wfo_present_person_days": wfo_present,
+        "wfo_compliance_percentage": round(wfo_compliance_pct, 2),
+        "wfh_total": wfh_total,
+        "wfh_present_person_days": wfh_present,
+        "wfh_compliance_percentage": round(wfh_compliance_pct, 2),
+        "daily_present": [
+            {"date": d, "present_employees": n}
+            for d, n in zip(span.dates, span.daily(PRESENT))
+        ],
+        "status": "Compliant" if overall_compliance >= 80 else "Non-Compliant"
+    }
+
+@router.get("/wfo-compliance")
+async def get_wfo_compliance(
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
+    start: Optional[str] = Query(None, description="Range start date (inclusive), YYYY-MM-DD"),
+    end: Optional[str] = Query(None, description="Range end date (inclusive), YYYY-MM-DD")
+):
+    """
+    Get Work From Office compliance report with separate WFO and WFH compliance.
+    This endpoint calculates compliance separately for WFO and WFH employees based on their Mode_of_work.
+    """
+    try:
+        directory = get_repository().get_directory()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading employees: {str(e)}")
+    
+    if range_requested(date, start, end):
+        return build_wfo_compliance_range(resolve_range(start, end), directory)
+    
+    rollup = await closed_day_rollup(date)
+    if rollup is not None:
+        return wfo_compliance_from_rollup(rollup, directory)
+    
+    day = resolve_day(date)
+    
+    return build_wfo_compliance(day, directory)
+
+def build_wfo_period_compliance(window, directory: EmployeeDirectory, days_per_week: int, granularity: str,
+                                include_employees: bool = True) -> dict:
+    """
+    Office-days mandate ("days_per_week office days per week") over a period, from presence bitsets.
+    Each week or month must reach its share of the mandate, prorated for partial periods.
+    """
+    start = window.start
+    end = start + window.width - 1
+    periods = calendar_periods(date_cls.fromordinal(start).isoformat(), date_cls.fromordinal(end).isoformat(), granularity)
+    masks = [window.mask(first, last) for first, last in periods]
+    required = [math.ceil(days_per_week * (last - first + 1) / 7) for first, last in periods]
+    
+    compliant_by_period = [0] * len(periods)
+    wfo_employees = 0
+    fully_compliant = 0
+    wfo_office_days = 0
+    employee_rows = []
+    
+    modes = directory.modes
+    for emp in directory.employees:
+        emp_id = emp.get("employee_id")
+        if not emp_id:
+            continue
+        bits = window.bits_of(emp_id)
+        compliant = [popcount(bits & mask) >= need for mask, need in zip(masks, required)]
+        days_in_office = popcount(bits)
+        mode = modes[emp_id]
+        
+        # The mandate applies to WFO employees only
+        if mode == "WFO":
+            wfo_employees += 1
+            wfo_office_days += days_in_office
+            for i, ok in enumerate(compliant):
+                compliant_by_period[i] += ok
+            fully_compliant += all(compliant)
+        
+        if include_employees:
+            employee_rows.append({
+                "employee_id": emp_id,
+                "name": emp.get("name", ""),
+                "project_id": emp.get("project_id", ""),
+                "work_mode": mode,
+                "days_in_office": days_in_office,
+                "compliant_periods": sum(compliant),
+                "total_periods": len(periods),
+                "compliance_percentage": round(sum(compliant) / len(periods) * 100, 2),
+                "longest_streak": longest_run(bits),
+                "current_streak": trailing_run(bits, window.width)
+            })
+    
+    period_rows = []
+    for (first, last), need, compliant in zip(periods, required, compliant_by_period):
+        period_rows.append({
+            "start": date_cls.fromordinal(first).isoformat(),
+            "end": date_cls.fromordinal(last).isoformat(),
+            "required_days": need,
+            "compliant_employees": compliant,
+            "compliance_percentage": round(compliant / wfo_employees * 100, 2) if wfo_employees else 0.0
+        })
+    
+    employee_periods = wfo_employees * len(periods)
+    report = {
+        "start": date_cls.fromordinal(start).isoformat(),
+        "end": date_cls.fromordinal(end).isoformat(),
+        "days_per_week": days_per_week,
+        "granularity": granularity,
+        "wfo_employees": wfo_employees,
+        "fully_compliant_employees": fully_compliant,
+        "compliance_percentage": round(sum(compliant_by_period) / employee_periods * 100, 2) if employee_periods else 0.0,
+        "average_office_days_per_week": round(wfo_office_days / wfo_employees / (window.width / 7), 2) if wfo_employees else 0.0,
+        "periods": period_rows
+    }
+    if include_employees:
+        report["employees"] = employee_rows
+    return report
+
+@router.get("/wfo-compliance/period")
+async def get_wfo_period_compliance(
+    start: Optional[str] = Query(None, description="Period start date, YYYY-MM-DD (default: first day with data)"),
+    end: Optional[str] = Query(None, description="Period end date, YYYY-MM-DD (default: latest day with data)"),
+    days_per_week: int = Query(3, ge=1, le=7, description="Required office days per week"),
+    granularity: Literal["week", "month"] = Query("week", description="Check the mandate per ISO week or per calendar month"),
+    include_employees: bool = Query(True, description="Include the per-employee breakdown")
+):
+    """
+    Get "N office days per week" compliance for the whole organisation over a period
+    (weeks or months, days in office and streaks), computed from per-employee presence bitsets
+    """
+    repository = get_repository()
+    state = presence_index.current(repository)
+    if state.origin is None:
+        raise HTTPException(status_code=404, detail="No attendance data available")
+    
+    start = parse_date_param(start, "start") if start else date_cls.fromordinal(state.origin).isoformat()
+    end = parse_date_param(end, "end") if end else repository.latest_date()
+    if start > end:
+        raise HTTPException(status_code=400, detail=f"start {start} is after end {end}")
+    
+    return build_wfo_period_compliance(state.window(start, end), repository.get_directory(),
+                                       days_per_week, granularity, include_employees)
+
+@router.get("/wellbeing-recommendations/at-risk")
+async def get_wellbeing_at_risk(
+    date: Optional[str] = Query(None, description="Last day of the window, YYYY-MM-DD (default: latest day)"),
+    window_days: int = Query(WINDOW_DAYS, ge=7, le=366, description="Trailing window length in days"),
+    limit: Optional[int] = Query(None, ge=1, description="Return only the top N at-risk employees")
+):
+    """
+    Get the ranked list of employees at wellbeing risk, assessed for the whole workforce in one pass:
+    7-day and whole-window average hours, consecutive late-night streaks and weekend work
+    """
+    day = resolve_day(date)
+    
+    return build_at_risk_report(get_repository(), day.date, window_days, limit)
+
 @router.get("/wellbeing-recommendations")
 async def get_wellbeing_recommendations(
     employee_id: Optional[str] = Query(None, description="Employee ID (optional)"),
@@ -302,44 +472,21 @@ async def get_wellbeing_recommendations(
     """
     Get wellbeing recommendations based on work patterns
     """
-    employees_data = load_json_file("employees.json")
+    repository = get_repository()
     
-    attendance_records = []
-    try:
-        multi_day_data = load_json_file("attendance_multi_day.json")
-        if isinstance(multi_day_data, dict) and "days" in multi_day_data:
-            target_date = date or multi_day_data.get("latest_date")
-            if target_date:
-                day_data = next((d for d in multi_day_data["days"] if d.get("date") == target_date), None)
-                if day_data:
-                    attendance_records = day_data.get("attendance_records", [])
-        elif isinstance(multi_day_data, list):
-            target_date = date
-            if target_date:
-                day_data = next((d for d in multi_day_data if d.get("date") == target_date), None)
-                if day_data:
-                    attendance_records = day_data.get("attendance_records", [])
-    except:
-        try:
-            attendance_data = load_json_file("attendance.json")
-            if isinstance(attendance_data, dict) and "attendance_records" in attendance_data:
-                attendance_records = attendance_data["attendance_records"]
-            elif isinstance(attendance_data, list):
-                attendance_records = attendance_data
-        except:
-            attendance_records = []
+    day = resolve_day(date)
     
     recommendations = []
     
     if employee_id:
-        employee = next((e for e in employees_data.get("employees", []) if e.get("employee_id") == employee_id), None)
+        employee = repository.get_employee(employee_id)
         if not employee:
             raise HTTPException(status_code=404, detail=f"Employee {employee_id} not found")
         
-        records = [r for r in attendance_records if r.get("employee_id") == employee_id]
-        if records:
-            record = records[0]
-            hours = calculate_hours(record.get("checkin_time", "00:00"), record.get("checkout_time", "00:00"))
+        columns = day.columns
+        row = day.row_of_employee(employee_id)
+        if row is not None:
+            hours = columns.duration[row] / 60.0
             
             if hours > 10:
                 recommendations.append({
@@ -348,7 +495,7 @@ async def get_wellbeing_recommendations(
                     "priority": "high"
                 })
             
-            if is_after_8pm(record.get("checkout_time", "")):
+            if columns.late_stay[row]:
                 recommendations.append({
                     "type": "late_stay",
                     "message": "You stayed late today. Ensure you have safe transportation arranged.",
@@ -0,0 +1,227 @@
+"""
+Workforce-wide wellbeing assessment over a trailing window of days.
+
+All employees are assessed together: each day in the window is visited once,
+and its columns are accumulated into per-employee arrays:
+- worked minutes and days present over the last 7 days and over the whole
+  window (30 days unless window_days says otherwise), counting only checked-out
+  days: an open session has no hours yet, as in the work-balance report;
+- late nights and consecutive late-night streaks;
+- weekend days worked.
+
+The signals are then scored, and the employees at risk are ranked. Run
+nightly with:
+
+    python -m backend.reports.wellbeing [--date YYYY-MM-DD] [--output path]
+"""
+from array import array
+from datetime import date as date_cls, datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+import argparse
+import json
+import os
+
+from backend.data_store.cache import DATA_DIR
+from backend.data_store.columnar import MISSING, employee_codes
+from backend.data_store.repository import AttendanceRepository
+
+REPORTS_DIR = DATA_DIR / "reports"
+
+WINDOW_DAYS = 30
+SHORT_WINDOW_DAYS = 7
+
+# Scoring: a risk_score of AT_RISK_SCORE or more puts an employee on the at-risk list
+AT_RISK_SCORE = 2
+HIGH_RISK_SCORE = 5
+LONG_HOURS_7D = 10.0
+ELEVATED_HOURS_7D = 9.0
+LONG_HOURS_WINDOW = 10.0
+LATE_STREAK_DAYS = 3
+FREQUENT_LATE_NIGHTS = 8
+WEEKEND_DAYS = 2
+
+
+def _assess(hours_7d: float, hours_window: float, late_streak: int, longest_streak: int,
+            late_nights: int, weekend_days: int, window_days: int = WINDOW_DAYS):
+    """Risk score and recommendations for one employee's signals"""
+    score = 0
+    recommendations = []
+
+    if hours_7d > LONG_HOURS_7D:
+        score += 3
+        recommendations.append({
+            "type": "work_hours",
+            "message": f"Averaging {hours_7d:.1f} hours a day over the last week. Consider taking breaks and maintaining work-life balance.",
+            "priority": "high"
+        })
+    elif hours_7d > ELEVATED_HOURS_7D:
+        score += 1
+        recommendations.append({
+            "type": "work_hours",
+            "message": f"Averaging {hours_7d:.1f} hours a day over the last week. Keep an eye on workload.",
+            "priority": "low"
+        })
+    if hours_window > LONG_HOURS_WINDOW:
+        score += 2
+        recommendations.append({
+            "type": "sustained_hours",
+            "message": f"Long days have been sustained over the last {window_days} days ({hours_window:.1f} hours on average). Review workload distribution.",
+            "priority": "high"
+        })
+
+    if late_streak >= LATE_STREAK_DAYS:
+        score += 3
+        recommendations.append({
+            "type": "late_streak",
+            "message": f"Stayed late {late_streak} nights in a row. Plan a rest day and ensure safe transportation.",
+            "priority": "high"
+        })
+    elif longest_streak >= LATE_STREAK_DAYS:
+        score += 1
+        recommendations.append({
+            "type": "late_streak",
+            "message": f"Had a run of {longest_streak} late nights in a row in the last {window_days} days.",
+            "priority": "medium"
+        })
+    if late_nights >= FREQUENT_LATE_NIGHTS:
+        score += 1
+        recommendations.append({
+            "type": "late_stay",
+            "message": f"Stayed after 8 PM on {late_nights} of the last {window_days} days. Consider shift rotation.",
+            "priority": "medium"
+        })
+
+    if weekend_days >= WEEKEND_DAYS:
+        score += 2
+        recommendations.append({
+            "type": "weekend_work",
+            "message": f"Worked {weekend_days} weekend days in the last {window_days} days. Schedule compensatory time off.",
+            "priority": "medium"
+        })
+
+    return score, recommendations
+
+
+def assess_workforce(repository: AttendanceRepository, end: str, window_days: int = WINDOW_DAYS) -> List[dict]:
+    """Wellbeing signals, risk score and recommendations for every employee, window ending at end"""
+    end_day = date_cls.fromisoformat(end)
+    end_ordinal = end_day.toordinal()
+    start = (end_day - timedelta(days=window_days - 1)).isoformat()
+
+    employees = [e for e in repository.get_employees() if e.get("employee_id")]
+    codes = [employee_codes.intern(e["employee_id"]) for e in employees]
+    # Employee code -> slot in the accumulators (-1 for people not in master data)
+    slot_of = array("i", [-1]) * len(employee_codes)
+    for slot, code in enumerate(codes):
+        slot_of[code] = slot
+
+    n = len(employees)
+    minutes_7d, days_7d = array("q", bytes(8 * n)), array("i", bytes(4 * n))
+    minutes_window, days_window = array("q", bytes(8 * n)), array("i", bytes(4 * n))
+    late_nights, weekend_days = array("i", bytes(4 * n)), array("i", bytes(4 * n))
+    streak, longest_streak = array("i", bytes(4 * n)), array("i", bytes(4 * n))
+    last_late = array("i", [0]) * n
+
+    for day in repository.get_days(start, end):
+        day_ordinal = date_cls.fromisoformat(day.date).toordinal()
+        in_short_window = end_ordinal - day_ordinal < SHORT_WINDOW_DAYS
+        weekend = date_cls.fromordinal(day_ordinal).weekday() >= 5
+        columns = day.columns
+        for code, checkout, minutes, late in zip(columns.employee, columns.checkout, columns.duration, columns.late_stay):
+            slot = slot_of[code] if code < len(slot_of) else -1
+            if slot < 0:
+                continue
+            # Open sessions have no hours worked yet
+            if checkout != MISSING:
+                minutes_window[slot] += minutes
+                days_window[slot] += 1
+                if in_short_window:
+                    minutes_7d[slot] += minutes
+                    days_7d[slot] += 1
+            if weekend:
+                weekend_days[slot] += 1
+            if late:
+                late_nights[slot] += 1
+                # Consecutive calendar days with a late stay
+                streak[slot] = streak[slot] + 1 if last_late[slot] == day_ordinal - 1 else 1
+                last_late[slot] = day_ordinal
+                if streak[slot] > longest_streak[slot]:
+                    longest_streak[slot] = streak[slot]
+
+    assessments = []
+    for slot, employee in enumerate(employees):
+        hours_7d = minutes_7d[slot] / days_7d[slot] / 60.0 if days_7d[slot] else 0.0
+        hours_window = minutes_window[slot] / days_window[slot] / 60.0 if days_window[slot] else 0.0
+        # A streak is current only if it runs up to the last day of the window
+        current_streak = streak[slot] if last_late[slot] == end_ordinal else 0
+        score, recommendations = _assess(hours_7d, hours_window, current_streak, longest_streak[slot],
+                                         late_nights[slot], weekend_days[slot], window_days)
+        assessments.append({
+            "employee_id": employee["employee_id"],
+            "name": employee.get("name", ""),
+            "project_id": employee.get("project_id", ""),
+            "avg_hours_7d": round(hours_7d, 2),
+            "avg_hours_window": round(hours_window, 2),
+            "days_worked_7d": days_7d[slot],
+            "days_worked_window": days_window[slot],
+            "late_nights": late_nights[slot],
+            "late_streak": current_streak,
+            "longest_late_streak": longest_streak[slot],
+            "weekend_days": weekend_days[slot],
+            "risk_score": score,
+            "risk_level": "high" if score >= HIGH_RISK_SCORE else "medium" if score >= AT_RISK_SCORE else "low",
+            "recommendations": recommendations
+        })
+    return assessments
+
+
+def build_at_risk_report(repository: AttendanceRepository, end: str, window_days: int = WINDOW_DAYS,
+                         limit: Optional[int] = None) -> dict:
+    """Ranked list of at-risk employees (highest risk score first)"""
+    assessments = assess_workforce(repository, end, window_days)
+    at_risk = [a for a in assessments if a["risk_score"] >= AT_RISK_SCORE]
+    at_risk.sort(key=lambda a: (-a["risk_score"], -a["avg_hours_7d"], a["employee_id"]))
+    for rank, assessment in enumerate(at_risk, start=1):
+        assessment["rank"] = rank
+    return {
+        "date": end,
+        "window_days": window_days,
+        "employees_assessed": len(assessments),
+        "at_risk_count": len(at_risk),
+        "at_risk": at_risk[:limit] if limit else at_risk
+    }
+
+
+def write_report(report: dict, path: Path):
+    """Write a report as JSON, replacing any previous file atomically"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def main():
+    from backend.data_store.repository import get_repository
+
+    parser = argparse.ArgumentParser(description="Write the ranked wellbeing at-risk list")
+    parser.add_argument("--date", help="Last day of the window (default: latest day with data)")
+    parser.add_argument("--window", type=int, default=WINDOW_DAYS, help="Window length in days")
+    parser.add_argument("--output", help="Output file (default: data/reports/at_risk_<date>.json)")
+    args = parser.parse_args()
+
+    repository = get_repository()
+    end = args.date or repository.latest_date()
+    if not end:
+        parser.error("No attendance data available")
+
+    report = build_at_risk_report(repository, end, args.window)
+    report["generated_at"] = datetime.now().isoformat(timespec="seconds")
+    output = Path(args.output) if args.output else REPORTS_DIR / f"at_risk_{end}.json"
+    write_report(report, output)
+    print(f"Assessed {report['employees_assessed']} employees, {report['at_risk_count']} at risk -> {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Conditional GET and encoded-response cache for read endpoints.
+
+Every cacheable JSON response gets an ETag derived from the data version and
+the request (path + query). A matching If-None-Match is answered with 304 before
+the handler runs, and already-encoded response bodies are kept in a bounded LRU
+so repeated polls for the same (endpoint, params) skip compute and
+serialization.
+
+Requests for a single date are keyed on that day's version, so events ingested
+for today leave the cached responses (and ETags) of other days valid. Requests
+without a date, and those whose date ends a multi-day window, are keyed on the
+dataset version. Versions are computed in the threadpool: on a cold or changed
+dataset they may load files or replay the event log.
+"""
+from collections import OrderedDict
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from typing import Callable, Optional, Tuple
+import hashlib
+import threading
+
+from backend.data_store.repository import get_repository
+from backend.profiling import PROFILE_SCOPE_KEY
+
+
+class ResponseBytesLRU:
+    """Bounded LRU of encoded response bodies, each tagged with the data version it was built from"""
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[bytes, str, str]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple[str, str], version: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] != version:
+                # Built from older data
+                del self._entries[key]
+                self._bytes -= len(entry[0])
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: Tuple[str, str], version: str, body: bytes, media_type: str):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[0])
+            self._entries[key] = (body, media_type, version)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+        }
+
+
+response_cache = ResponseBytesLRU()
+
+# Endpoints whose date is the last day of a multi-day window rather than the only day read
+WINDOW_PATHS = ("/api/reports/wellbeing-recommendations/at-risk",)
+
+
+def data_version(date: Optional[str] = None) -> str:
+    """Version of the data behind a response: the day's for a single date, else the dataset's"""
+    repository = get_repository()
+    return repository.day_version(date) if date else repository.version()
+
+
+def make_etag(version: str, path: str, query: str) -> str:
+    digest = hashlib.sha1(f"{version}\n{path}\n{query}".encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: W/"x" matches "x"
+    return "*" in candidates or any(tag.replace("W/", "", 1) == etag for tag in candidates)
+
+
+class ConditionalGetMiddleware(BaseHTTPMiddleware):
+    """ETag / If-None-Match handling and byte caching for GET requests under the given path prefixes"""
+
+    def __init__(self, app, prefixes: Tuple[str, ...] = ("/api/",),
+                 cache: ResponseBytesLRU = response_cache,
+                 version: Callable[[Optional[str]], str] = data_version):
+        super().__init__(app)
+        self.prefixes = prefixes
+        self.cache = cache
+        self.version = version
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        if request.method != "GET" or not path.startswith(self.prefixes):
+            return await call_next(request)
+        # Event streams are never cached or answered with 304
+        if "text/event-stream" in request.headers.get("accept", ""):
+            return await call_next(request)
+        # Profiled requests must run the handler
+        if request.scope.get(PROFILE_SCOPE_KEY):
+            return await call_next(request)
+
+        # Sorted query string so parameter order does not split the cache
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        params = request.query_params
+        date = None
+        if not (params.get("start") or params.get("end")) and path not in WINDOW_PATHS:
+            date = params.get("date") or None
+        version = await run_in_threadpool(self.version, date)
+        etag = make_etag(version, path, query)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            self.cache.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        key = (path, query)
+        cached = self.cache.get(key, version)
+        if cached is not None:
+            body, media_type = cached
+            return Response(content=body, media_type=media_type, headers=headers)
+
+        response = await call_next(request)
+        media_type = response.headers.get("content-type", "")
+        # Only complete JSON bodies are cached; errors and streams pass through untouched
+        if response.status_code != 200 or not media_type.startswith("application/json"):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        # The body may have been computed against data that changed meanwhile
+        if await run_in_threadpool(self.version, date) == version:
+            self.cache.put(key, version, body, media_type)
+        response_headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+        response_headers.update(headers)
+        return Response(content=body, status_code=200, headers=response_headers)
@@ -0,0 +1,102 @@
+"""
+Per-request stage timings.
+
+The metrics middleware opens a RequestTimings for each request in a context
+variable. Code on the request path adds to it:
+- the repository_ready dependency times its work as "load";
+- resolve_day / resolve_range and friends time theirs as "resolve";
+- TimedRoute times the endpoint's own work as "compute" (excluding any
+  stages nested inside it) and notes when the endpoint returned. The time from
+  that point until the response starts is reported as "serialize".
+Outside a request (CLI tools, tests) every helper here is a no-op.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi.routing import APIRoute
+from typing import Callable, Dict, Optional
+import functools
+import time
+
+LOAD = "load"
+RESOLVE = "resolve"
+COMPUTE = "compute"
+SERIALIZE = "serialize"
+
+
+class RequestTimings:
+    """Seconds spent per stage while handling one request"""
+
+    __slots__ = ("stages", "active", "endpoint_done")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.active = set()
+        # perf_counter() when the endpoint returned, for the serialize stage
+        self.endpoint_done: Optional[float] = None
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def total(self) -> float:
+        return sum(self.stages.values())
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def begin_request() -> RequestTimings:
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as a stage of the current request (outermost block only when nested)"""
+    timings = _current.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+        timings.active.discard(name)
+
+
+def timed_stage(name: str):
+    """Decorator form of stage() for plain functions"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        timings = _current.get()
+        if timings is None:
+            return await endpoint(*args, **kwargs)
+        nested = timings.total()
+        started = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            done = time.perf_counter()
+            nested = timings.total() - nested
+            timings.add(COMPUTE, done - started - nested)
+            timings.endpoint_done = done
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that reports its endpoint's own time as the compute stage"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
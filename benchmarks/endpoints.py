@@ -0,0 +1,254 @@
+"""
+Endpoint benchmark suite.
+
+For each scale, a fixed-seed dataset is generated (and reused on later runs)
+with backend.data_store.generate. A fresh worker process is then started with
+ATTENDANCE_DATA_DIR pointing at it. The worker drives every read endpoint
+in-process through FastAPI's TestClient and reports, per endpoint:
+- p50/p95/p99 and mean latency;
+- throughput;
+- the cold first-request time.
+It also reports its peak RSS. Separate processes keep peak RSS and cache
+state per scale honest.
+
+The response cache is cleared before every request, so the numbers measure
+the data path rather than cached bytes; pass --response-cache to keep it.
+
+Usage:
+    python -m benchmarks.endpoints [--scales 1k-30d 10k-30d] [--output results.json]
+    python -m benchmarks.endpoints --compare baseline.json [--threshold 0.25]
+
+With --compare, the exit status is 1 when any endpoint's p95 regressed by more
+than the threshold against the baseline results file.
+"""
+from datetime import date as date_cls, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DATASETS_DIR = Path(tempfile.gettempdir()) / "attendance-bench"
+
+# name -> (employees, days)
+SCALES = {
+    "1k-30d": (1_000, 30),
+    "1k-365d": (1_000, 365),
+    "10k-30d": (10_000, 30),
+    "10k-365d": (10_000, 365),
+    "50k-30d": (50_000, 30),
+    "50k-365d": (50_000, 365),
+}
+SEED = 20240101
+LAST_DATE = "2025-12-31"
+PROJECTS = 20
+OFFICES = "Bengaluru,Hyderabad,Pune,Chennai"
+
+# Ignore p95 changes smaller than this, whatever the ratio (timer noise)
+MIN_REGRESSION_MS = 1.0
+
+
+def endpoints(latest: str, first: str) -> Dict[str, str]:
+    """Benchmarked requests by name; one per router endpoint, plus range and paged variants"""
+    week = max(first, _shift(latest, -6))
+    return {
+        "summary": f"/api/attendance/summary?employee_id=E1001&date={latest}",
+        "records": f"/api/attendance/records?date={latest}",
+        "records_page": f"/api/attendance/records?date={latest}&limit=100&sort=hours&order=desc",
+        "daily_count": f"/api/attendance/daily-count?date={latest}",
+        "after_8pm": f"/api/late-stay/after-8pm?date={latest}",
+        "after_8pm_range": f"/api/late-stay/after-8pm?start={first}&end={latest}",
+        "women_after_8pm": f"/api/late-stay/women-after-8pm?date={latest}",
+        "work_balance_project": f"/api/reports/work-balance/project/P101?date={latest}",
+        "work_balance_projects": f"/api/reports/work-balance/projects?date={latest}",
+        "work_balance_range": f"/api/reports/work-balance/project/P101?start={week}&end={latest}",
+        "wfo_compliance": f"/api/reports/wfo-compliance?date={latest}",
+        "wfo_compliance_period": f"/api/reports/wfo-compliance/period?start={first}&end={latest}",
+        "wellbeing": f"/api/reports/wellbeing-recommendations?employee_id=E1001&date={latest}",
+        "wellbeing_at_risk": f"/api/reports/wellbeing-recommendations/at-risk?date={latest}&limit=50",
+        "dashboard": f"/api/dashboard?date={latest}",
+    }
+
+
+def _shift(day: str, days: int) -> str:
+    return (date_cls.fromisoformat(day) + timedelta(days=days)).isoformat()
+
+
+def _percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def ensure_dataset(datasets_dir: Path, scale: str) -> Path:
+    """Generate the dataset for a scale unless it already exists; returns its directory"""
+    employees, days = SCALES[scale]
+    path = datasets_dir / f"{scale}-seed{SEED}"
+    if (path / "attendance_multi_day.json").exists():
+        return path
+    subprocess.run(
+        [sys.executable, "-m", "backend.data_store.generate", "--seed", str(SEED),
+         "--employees", str(employees), "--projects", str(PROJECTS), "--offices", OFFICES,
+         "--start", _shift(LAST_DATE, 1 - days), "--end", LAST_DATE, "--weekend-presence", "0.1",
+         "--workers", str(os.cpu_count() or 1), "--output-dir", str(path)],
+        cwd=BASE_DIR, check=True,
+    )
+    return path
+
+
+def run_worker(iterations: int, warmup: int, response_cache_enabled: bool) -> dict:
+    """Benchmark every endpoint against the dataset in ATTENDANCE_DATA_DIR (runs in the worker process)"""
+    import resource
+    from fastapi.testclient import TestClient
+    from backend.main import app
+    from backend.data_store.rollup_store import rollup_scheduler
+    from backend.response_cache import response_cache
+
+    results = {}
+    with TestClient(app) as client:
+        # Let the startup catch-up of closed days finish before anything is timed
+        while rollup_scheduler.runs == 0:
+            time.sleep(0.05)
+        dates = client.get("/api/late-stay/after-8pm").json()
+        latest = dates["date"]
+        first = _shift(latest, -29)
+        for name, url in endpoints(latest, first).items():
+            if not response_cache_enabled:
+                response_cache.clear()
+            started = time.perf_counter()
+            response = client.get(url)
+            cold = time.perf_counter() - started
+            if response.status_code != 200:
+                results[name] = {"url": url, "status": response.status_code, "error": response.text[:200]}
+                continue
+            for _ in range(warmup):
+                client.get(url)
+
+            timings = []
+            for _ in range(iterations):
+                if not response_cache_enabled:
+                    response_cache.clear()
+                started = time.perf_counter()
+                client.get(url)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            total = sum(timings)
+            results[name] = {
+                "url": url,
+                "status": 200,
+                "bytes": len(response.content),
+                "cold_ms": round(cold * 1000, 3),
+                "p50_ms": round(_percentile(timings, 50) * 1000, 3),
+                "p95_ms": round(_percentile(timings, 95) * 1000, 3),
+                "p99_ms": round(_percentile(timings, 99) * 1000, 3),
+                "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+                "throughput_rps": round(len(timings) / total, 1) if total else None,
+            }
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return {"peak_rss_mb": round(peak_mb, 1), "endpoints": results}
+
+
+def run_scale(scale: str, datasets_dir: Path, iterations: int, warmup: int, response_cache_enabled: bool) -> dict:
+    started = time.perf_counter()
+    data_dir = ensure_dataset(datasets_dir, scale)
+    dataset_seconds = time.perf_counter() - started
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "worker.json"
+        command = [sys.executable, "-m", "benchmarks.endpoints", "--worker", str(output),
+                   "--iterations", str(iterations), "--warmup", str(warmup)]
+        if response_cache_enabled:
+            command.append("--response-cache")
+        # The worker gets an empty event log, so ingested events never leak into the numbers
+        env = {**os.environ, "ATTENDANCE_DATA_DIR": str(data_dir), "ATTENDANCE_STORAGE": "json"}
+        subprocess.run(command, cwd=BASE_DIR, env=env, check=True)
+        with open(output, "r", encoding="utf-8") as f:
+            result = json.load(f)
+    employees, days = SCALES[scale]
+    return {"employees": employees, "days": days, "dataset_seconds": round(dataset_seconds, 2), **result}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Descriptions of endpoints whose p95 regressed by more than threshold against the baseline"""
+    regressions = []
+    for scale, current in results["scales"].items():
+        previous = baseline.get("scales", {}).get(scale)
+        if previous is None:
+            continue
+        for name, stats in current["endpoints"].items():
+            before = previous["endpoints"].get(name, {}).get("p95_ms")
+            after = stats.get("p95_ms")
+            if before is None or after is None:
+                continue
+            if after > before * (1 + threshold) and after - before >= MIN_REGRESSION_MS:
+                regressions.append(f"{scale} {name}: p95 {before:.2f} ms -> {after:.2f} ms (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the API endpoints on fixed-seed datasets")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=list(SCALES), help="Dataset scales to run")
+    parser.add_argument("--iterations", type=int, default=30, help="Timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed requests per endpoint after the cold one")
+    parser.add_argument("--datasets-dir", default=str(DEFAULT_DATASETS_DIR), help="Where generated datasets are kept")
+    parser.add_argument("--output", default="benchmark_results.json", help="Results file to write")
+    parser.add_argument("--compare", help="Baseline results file; exit 1 on p95 regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed p95 slowdown ratio for --compare")
+    parser.add_argument("--response-cache", action="store_true", help="Keep the response cache enabled")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        result = run_worker(args.iterations, args.warmup, args.response_cache)
+        with open(args.worker, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "response_cache": args.response_cache,
+        "scales": {},
+    }
+    for scale in args.scales:
+        print(f"[{scale}] running...", flush=True)
+        result = run_scale(scale, Path(args.datasets_dir), args.iterations, args.warmup, args.response_cache)
+        results["scales"][scale] = result
+        print(f"[{scale}] peak RSS {result['peak_rss_mb']} MB")
+        for name, stats in result["endpoints"].items():
+            if stats.get("status") != 200:
+                print(f"  {name:24} HTTP {stats.get('status')}")
+                continue
+            print(f"  {name:24} p50 {stats['p50_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms  "
+                  f"p99 {stats['p99_ms']:9.2f} ms  {stats['throughput_rps']:9.1f} req/s")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No p95 regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ let currentAttendanceData = null;
 let currentLateStayData = null;
 // Cache for WFO compliance (contains total employees)
 let currentWfoCompliance = null;
-// Cache for project reports (P101, P102, etc.)
+// Cache for project reports, keyed by project ID
 let currentProjectData = {};
 // Cache for compliance data for CSV export
 let currentComplianceData = null;
@@ -92,22 +92,19 @@ async function loadDashboard() {
     }
     
     try {
-        // Load all data in parallel
-        const [
-            attendanceData,
-            lateStayData,
-            womenLateStayData,
-            wfoCompliance,
-            projectP101,
-            projectP102
-        ] = await Promise.all([
-            fetch(`${API_BASE_URL}/attendance/records${date ? `?date=${date}` : ''}`).then(r => r.json()),
-            fetch(`${API_BASE_URL}/late-stay/after-8pm${date ? `?date=${date}` : ''}`).then(r => r.json()),
-            fetch(`${API_BASE_URL}/late-stay/women-after-8pm${date ? `?date=${date}` : ''}`).then(r => r.json()),
-            fetch(`${API_BASE_URL}/reports/wfo-compliance${date ? `?date=${date}` : ''}`).then(r => r.json()),
-            fetch(`${API_BASE_URL}/reports/work-balance/project/P101${date ? `?date=${date}` : ''}`).then(r => r.json()),
-            fetch(`${API_BASE_URL}/reports/work-balance/project/P102${date ? `?date=${date}` : ''}`).then(r => r.json())
-        ]);
+        // Load all dashboard sections in a single request
+        const response = await fetch(`${API_BASE_URL}/dashboard${date ? `?date=${date}` : ''}`);
+        if (!response.ok && response.status !== 404) {
+            throw new Error(`Dashboard request failed with status ${response.status}`);
+        }
+        // A date without attendance data (404) renders as an empty dashboard
+        const dashboardData = response.ok ? await response.json() : {};
+        const workBalance = dashboardData.work_balance || {};
+
+        let attendanceData = dashboardData.records || { date: date, attendance_records: [] };
+        const lateStayData = dashboardData.late_stay || {};
+        const womenLateStayData = dashboardData.women_late_stay || {};
+        const wfoCompliance = dashboardData.wfo_compliance || {};
 
         // Normalize API shapes: backend may return an array or an object
         if (Array.isArray(attendanceData)) {
@@ -122,7 +119,7 @@ async function loadDashboard() {
         currentLateStayData = lateStayData;
         currentWfoCompliance = wfoCompliance;
         // Cache project reports for quick dashboard questions
-        currentProjectData = { 'P101': projectP101, 'P102': projectP102 };
+        currentProjectData = workBalance;
         
         updateStats(attendanceData, lateStayData, womenLateStayData, wfoCompliance);
         
@@ -139,7 +136,7 @@ async function loadDashboard() {
             updateCharts(attendanceData, lateStayData);
         }
         if (activePageId === 'page-reports') {
-            updateProjectCards([projectP101, projectP102]);
+            updateProjectCards(Object.values(workBalance));
         }
         
     } catch (error) {
@@ -231,8 +228,8 @@ function updateAttendanceTable(data) {
         row.innerHTML = `
             <td>${record.employee_id}</td>
             <td>${record.name || '-'}</td>
-            <td>${record.checkin_time}</td>
-            <td>${record.checkout_time}</td>
+            <td>${record.checkin_time || '-'}</td>
+            <td>${record.checkout_time || '-'}</td>
             <td>${record.total_hours || '-'}</td>
             <td>${statusBadge}</td>
         `;
@@ -472,12 +469,12 @@ async function loadProjectReports() {
         const datePicker = document.getElementById('datePicker');
         const date = datePicker ? datePicker.value : null;
         
-        // Load project work balance and late stay data
-        const [projectP101, projectP102, lateStayData] = await Promise.all([
-            fetch(`${API_BASE_URL}/reports/work-balance/project/P101${date ? `?date=${date}` : ''}`).then(r => r.json()),
-            fetch(`${API_BASE_URL}/reports/work-balance/project/P102${date ? `?date=${date}` : ''}`).then(r => r.json()),
+        // Load work balance for all projects and late stay data
+        const [workBalance, lateStayData] = await Promise.all([
+            fetch(`${API_BASE_URL}/reports/work-balance/projects${date ? `?date=${date}` : ''}`).then(r => r.json()),
             fetch(`${API_BASE_URL}/late-stay/after-8pm${date ? `?date=${date}` : ''}`).then(r => r.json())
         ]);
+        const projects = workBalance.projects || [];
         
         // Add late stay statistics to each project
         const lateStayByProject = {};
@@ -496,26 +493,16 @@ async function loadProjectReports() {
         }
         
         // Add late stay data to projects
-        if (lateStayByProject['P101']) {
-            projectP101.late_stay_count = lateStayByProject['P101'].count;
-            projectP101.late_stay_employees = lateStayByProject['P101'].employees;
-        } else {
-            projectP101.late_stay_count = 0;
-            projectP101.late_stay_employees = [];
-        }
-        
-        if (lateStayByProject['P102']) {
-            projectP102.late_stay_count = lateStayByProject['P102'].count;
-            projectP102.late_stay_employees = lateStayByProject['P102'].employees;
-        } else {
-            projectP102.late_stay_count = 0;
-            projectP102.late_stay_employees = [];
-        }
-        
-        // Cache project data for CSV export
-        currentProjectData = { 'P101': projectP101, 'P102': projectP102 };
+        currentProjectData = {};
+        projects.forEach(project => {
+            const lateStay = lateStayByProject[project.project_id];
+            project.late_stay_count = lateStay ? lateStay.count : 0;
+            project.late_stay_employees = lateStay ? lateStay.employees : [];
+            // Cache project data for CSV export
+            currentProjectData[project.project_id] = project;
+        });
         
-        updateProjectCards([projectP101, projectP102]);
+        updateProjectCards(projects);
     } catch (error) {
         console.error('Error loading project reports:', error);
         showError('Failed to load project reports.');
@@ -1189,13 +1176,25 @@ function sendBotAnswer(text, forceScroll = false) {
 }
 
 function handleQuickQuestionClick(id) {
-    const question = ALL_CHAT_QUESTIONS.find(q => q.id === id);
+    // Project questions carry the project ID: project-<id>-average / project-<id>-recommendation
+    const projectQuestion = id.match(/^project-(.+)-(average|recommendation)$/);
+    const arg = projectQuestion ? projectQuestion[1] : null;
+    const key = projectQuestion ? `project-${projectQuestion[2]}` : id;
+    let question = ALL_CHAT_QUESTIONS.find(q => q.id === id);
+    if (!question && projectQuestion) {
+        question = {
+            id: id,
+            label: projectQuestion[2] === 'average'
+                ? `What is average work hours for project ${arg}?`
+                : `Recommendation for project ${arg}`
+        };
+    }
     if (!question) return;
     try { toggleChatPanel(true); } catch (e) { /* ignore if not available */ }
     addMessage('user', question.label, true);
 
     // handle questions using cached data
-    switch (id) {
+    switch (key) {
         case 'total-employees': {
             if (currentWfoCompliance && typeof currentWfoCompliance.total_employees === 'number') {
                 return setTimeout(() => sendBotAnswer(`Total employees: ${currentWfoCompliance.total_employees}`, true), 300);
@@ -1329,9 +1328,8 @@ function handleQuickQuestionClick(id) {
             }
             return setTimeout(() => sendBotAnswer('WFH compliance data not available — refresh dashboard.', true), 300);
         }
-        case 'project-P101-average':
-        case 'project-P102-average': {
-            const pid = id.split('-')[1];
+        case 'project-average': {
+            const pid = arg;
             const proj = currentProjectData[pid];
             if (proj && proj.average_work_hours) return setTimeout(() => sendBotAnswer(`${proj.project_name} average work hours: ${proj.average_work_hours}`, true), 300);
             return setTimeout(() => sendBotAnswer(`Project ${pid} data not available — refresh dashboard.`, true), 300);
@@ -1354,9 +1352,8 @@ function handleQuickQuestionClick(id) {
             const text = need.length ? need.join(', ') : 'No projects require night shift.';
             return setTimeout(() => sendBotAnswer(`Projects requiring night shift: ${text}`, true), 300);
         }
-        case 'project-P101-recommendation':
-        case 'project-P102-recommendation': {
-            const pid = id.split('-')[1];
+        case 'project-recommendation': {
+            const pid = arg;
             const proj = currentProjectData[pid];
             if (proj && proj.recommendation) return setTimeout(() => sendBotAnswer(`Recommendation for ${proj.project_name}: ${proj.recommendation}`, true), 300);
             return setTimeout(() => sendBotAnswer(`Recommendation for ${pid} not available — refresh dashboard.`, true), 300);
@@ -1377,6 +1374,8 @@ function handleSendMessage() {
 
     // Try to match to a known Q by simple keyword checks
     const low = v.toLowerCase();
+    const projectMatch = v.match(/\bP\d+\b/i);
+    const projectId = projectMatch ? projectMatch[0].toUpperCase() : null;
     let matched = null;
         if (low.includes('total') && low.includes('employee')) matched = 'total-employees';
         else if (low.includes('present')) matched = 'present-today';
@@ -1385,12 +1384,10 @@ function handleSendMessage() {
         else if (low.includes('who') && low.includes('late')) matched = 'list-late-stay';
         else if (low.includes('wfo') || (low.includes('compliance') && !low.includes('wfh'))) matched = 'wfo-compliance-percentage';
         else if (low.includes('wfh') && low.includes('compliance')) matched = 'wfh-compliance-percentage';
-        else if (low.includes('p101') && low.includes('average')) matched = 'project-P101-average';
-        else if (low.includes('p102') && low.includes('average')) matched = 'project-P102-average';
+        else if (projectId && low.includes('average')) matched = `project-${projectId}-average`;
         else if (low.includes('which') && low.includes('high')) matched = 'projects-high-late-night';
         else if (low.includes('require') && low.includes('night')) matched = 'projects-night-shift';
-        else if (low.includes('recommend') && low.includes('p101')) matched = 'project-P101-recommendation';
-        else if (low.includes('recommend') && low.includes('p102')) matched = 'project-P102-recommendation';
+        else if (projectId && low.includes('recommend')) matched = `project-${projectId}-recommendation`;
 
     if (matched) {
         return handleQuickQuestionClick(matched);
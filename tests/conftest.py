@@ -0,0 +1,44 @@
+"""
+Shared test setup.
+
+The app reads ATTENDANCE_DATA_DIR when backend modules are first imported, so
+it is pointed at a scratch copy of data/ here, before any test imports them.
+Tests never touch the checked-in dataset, the event log or data/rollups/.
+"""
+from pathlib import Path
+import os
+import shutil
+import tempfile
+
+import pytest
+
+REPO_DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DATASET_FILES = ("employees.json", "projects.json", "attendance.json", "attendance_multi_day.json")
+
+SCRATCH_DIR = Path(tempfile.mkdtemp(prefix="attendance-tests-"))
+for filename in DATASET_FILES:
+    shutil.copy(REPO_DATA_DIR / filename, SCRATCH_DIR / filename)
+os.environ["ATTENDANCE_DATA_DIR"] = str(SCRATCH_DIR)
+os.environ["ATTENDANCE_STORAGE"] = "json"
+os.environ["ATTENDANCE_ROLLUPS"] = str(SCRATCH_DIR / "rollups")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    from backend.data_store.event_log import event_log
+    event_log.close()
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def data_dir() -> Path:
+    return SCRATCH_DIR
+
+
+@pytest.fixture
+def client():
+    """TestClient without the lifespan (no background tasks), with an empty response cache"""
+    from fastapi.testclient import TestClient
+    from backend.main import app
+    from backend.response_cache import response_cache
+    response_cache.clear()
+    return TestClient(app)
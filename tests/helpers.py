@@ -0,0 +1,24 @@
+"""
+Shared test helpers.
+"""
+import asyncio
+import json
+
+
+class RecordingJson:
+    """json stand-in that records whether each load ran on the event loop thread"""
+
+    def __init__(self):
+        self.loads = []
+
+    def load(self, f):
+        try:
+            asyncio.get_running_loop()
+            on_loop = True
+        except RuntimeError:
+            on_loop = False
+        self.loads.append(on_loop)
+        return json.load(f)
+
+    def __getattr__(self, name):
+        return getattr(json, name)
@@ -0,0 +1,31 @@
+import asyncio
+import json
+from datetime import date
+
+from backend.data_store.event_log import EventLog
+from backend.data_store.live_state import LiveAttendance
+from backend.late_stay_api.alerts import WomenLateStayMonitor, late_stay_deadline
+
+
+def test_day_rollover_forgets_days_outside_the_horizon(tmp_path):
+    monitor = WomenLateStayMonitor(LiveAttendance(EventLog(tmp_path / "events.wal", fsync=False)))
+    for day in ("2026-01-03", "2026-01-04", "2026-01-05"):
+        key = (day, "E1001")
+        monitor._inside[key] = {"employee_id": "E1001", "checkin_time": "09:00", "checkout_time": None}
+        monitor._alerted[key] = {"date": day, "employee_id": "E1001"}
+        monitor._deadlines.append((late_stay_deadline(day), len(monitor._deadlines), key))
+
+    async def prune():
+        queue = monitor.subscribe()
+        monitor._prune(date(2026, 1, 5))
+        return queue.get_nowait()
+
+    message = asyncio.run(prune())
+
+    # Today, plus last night's overnight window
+    kept = [("2026-01-04", "E1001"), ("2026-01-05", "E1001")]
+    assert sorted(monitor._inside) == sorted(monitor._alerted) == kept
+    assert sorted(key for _, _, key in monitor._deadlines) == kept
+    event, _, data = message.decode().strip().split("\n")
+    assert event == "event: snapshot"
+    assert json.loads(data[len("data: "):])["count"] == 2
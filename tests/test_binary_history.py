@@ -0,0 +1,75 @@
+import json
+import shutil
+
+import pytest
+
+from backend.data_store.binary_history import BinaryAttendanceRepository, convert_json
+from backend.data_store.columnar import employee_codes
+
+FIELDS = ("employee_id", "checkin_time", "checkout_time", "office", "building")
+
+
+def test_round_trip_and_reload_after_rewrite(data_dir, tmp_path):
+    source = tmp_path / "json"
+    source.mkdir()
+    for filename in ("employees.json", "projects.json", "attendance_multi_day.json"):
+        shutil.copy(data_dir / filename, source / filename)
+    path = tmp_path / "attendance.bin"
+    convert_json(source, path)
+    repository = BinaryAttendanceRepository(str(path))
+
+    multi_day = json.loads((source / "attendance_multi_day.json").read_text(encoding="utf-8"))
+    assert repository.get_dates() == sorted(day["date"] for day in multi_day["days"])
+    for day in multi_day["days"][:3]:
+        # Records are stored sorted by employee id
+        decoded = repository.get_day(day["date"]).records
+        assert [tuple(r.get(f) for f in FIELDS) for r in decoded] == \
+            sorted(tuple(r.get(f) for f in FIELDS) for r in day["attendance_records"])
+    employees = json.loads((source / "employees.json").read_text(encoding="utf-8"))["employees"]
+    assert repository.get_employees() == employees
+
+    latest = repository.latest_date()
+    version = repository.version()
+    multi_day["days"] = [day for day in multi_day["days"] if day["date"] != latest]
+    (source / "attendance_multi_day.json").write_text(json.dumps(multi_day), encoding="utf-8")
+    convert_json(source, path)
+
+    assert repository.version() != version
+    assert repository.latest_date() < latest
+    assert repository.get_day(latest) is None
+
+
+def test_convert_refuses_an_undated_single_day_file(data_dir, tmp_path):
+    source = tmp_path / "json"
+    source.mkdir()
+    for filename in ("employees.json", "projects.json", "attendance.json"):
+        shutil.copy(data_dir / filename, source / filename)
+    data = json.loads((source / "attendance.json").read_text(encoding="utf-8"))
+    (source / "attendance.json").write_text(json.dumps(data["attendance_records"]), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="no \"date\""):
+        convert_json(source, tmp_path / "attendance.bin")
+    assert not (tmp_path / "attendance.bin").exists()
+
+
+def test_days_reuse_the_file_to_process_code_map(data_dir, tmp_path, monkeypatch):
+    source = tmp_path / "json"
+    source.mkdir()
+    for filename in ("employees.json", "projects.json", "attendance_multi_day.json"):
+        shutil.copy(data_dir / filename, source / filename)
+    path = tmp_path / "attendance.bin"
+    convert_json(source, path)
+    repository = BinaryAttendanceRepository(str(path))
+    first, second = repository.get_dates()[:2]
+    repository.get_day(first)
+
+    interned = []
+    original = employee_codes.intern
+    monkeypatch.setattr(employee_codes, "intern", lambda value: interned.append(value) or original(value))
+    day = repository.get_day(second)
+
+    # Only employees that first show up on the second day are interned
+    first_ids = {r["employee_id"] for r in repository.get_day(first).records}
+    assert sorted(interned) == sorted({r["employee_id"] for r in day.records} - first_ids)
+    assert [employee_codes.values[code] for code in day.columns.employee] == \
+        [r["employee_id"] for r in day.records]
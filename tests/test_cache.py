@@ -0,0 +1,58 @@
+import asyncio
+import json
+import threading
+import time
+
+from backend.data_store import cache
+from backend.data_store.cache import DatasetCache
+
+
+class SlowJson:
+    """json stand-in whose load is slow and records the threads it ran on"""
+
+    def __init__(self):
+        self.threads = []
+
+    def load(self, f):
+        self.threads.append(threading.get_ident())
+        time.sleep(0.05)
+        return json.load(f)
+
+    def __getattr__(self, name):
+        return getattr(json, name)
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_concurrent_loads_are_coalesced_off_the_event_loop(tmp_path, monkeypatch):
+    slow = SlowJson()
+    monkeypatch.setattr(cache, "json", slow)
+    _write(tmp_path / "data.json", {"value": 1})
+    files = DatasetCache(tmp_path)
+
+    async def load_concurrently():
+        results = await asyncio.gather(*(files.aget("data.json") for _ in range(5)))
+        return results, threading.get_ident()
+
+    results, loop_thread = asyncio.run(load_concurrently())
+    assert all(result is results[0] for result in results)
+    assert len(slow.threads) == 1 and slow.threads[0] != loop_thread
+    assert files.coalesced == 4
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    path = tmp_path / "data.json"
+    _write(path, {"value": 1})
+    files = DatasetCache(tmp_path)
+    assert files.get("data.json") == {"value": 1}
+    fingerprint = files.fingerprint(("data.json",))
+
+    # A different size, so the stat signature changes even within one mtime tick
+    _write(path, {"value": 22})
+
+    assert files.fingerprint(("data.json",)) != fingerprint
+    assert asyncio.run(files.aget("data.json")) == {"value": 22}
+    assert files.version("data.json") == 2
+    assert files.stats()["reloads"] == 1
@@ -0,0 +1,112 @@
+from datetime import datetime
+import json
+import os
+
+import pytest
+
+from backend.data_store import event_log as event_log_module
+from backend.data_store.event_log import EventLog
+
+
+def _failing_fsync(monkeypatch, failures: int):
+    """Make the next `failures` fsync calls raise, after the data was written"""
+    real_fsync = os.fsync
+    remaining = [failures]
+
+    def fsync(fd):
+        if remaining[0]:
+            remaining[0] -= 1
+            raise OSError(5, "Input/output error")
+        real_fsync(fd)
+
+    monkeypatch.setattr(event_log_module.os, "fsync", fsync)
+
+
+def test_failed_open_fails_the_batch_and_recovers(tmp_path):
+    path = tmp_path / "events.wal"
+    # A directory in place of the log file makes every open() fail
+    path.mkdir()
+    log = EventLog(path, fsync=False)
+    try:
+        future = log.append([{"employee_id": "E1001"}])
+        assert isinstance(future.exception(timeout=5), OSError)
+
+        # The writer is still alive and retries the open for the next batch
+        path.rmdir()
+        log.append([{"employee_id": "E1002"}]).result(timeout=5)
+    finally:
+        log.close()
+    assert [e["employee_id"] for e in log.replay()] == ["E1002"]
+    assert log.stats()["failed_commits"] == 1
+
+
+def test_ingest_returns_503_when_the_log_cannot_be_written(client, tmp_path, monkeypatch):
+    import backend.attendance_api.routes as attendance_routes
+    from backend.data_store.live_state import live_attendance
+    path = tmp_path / "events.wal"
+    path.mkdir()
+    log = EventLog(path, fsync=False)
+    live_attendance.ensure_replayed()
+    monkeypatch.setattr(live_attendance, "log", log)
+    monkeypatch.setattr(attendance_routes, "DATA_DIR", tmp_path)
+    try:
+        payload = {"employee_id": "E1001", "event_type": "entry", "timestamp": datetime.now().isoformat(timespec="seconds")}
+        response = client.post("/api/attendance/events", json=payload)
+    finally:
+        log.close()
+    assert response.status_code == 503
+    assert json.loads(response.text)["detail"] == "Attendance events could not be persisted"
+
+
+def test_failed_batch_is_rolled_back_before_the_next_one(tmp_path, monkeypatch):
+    path = tmp_path / "events.wal"
+    log = EventLog(path)
+    try:
+        log.append([{"employee_id": "E1000"}]).result(timeout=5)
+        _failing_fsync(monkeypatch, 1)
+        failed = log.append([{"employee_id": "E1001"}, {"employee_id": "E1002"}])
+        assert isinstance(failed.exception(timeout=5), OSError)
+        log.append([{"employee_id": "E1003"}]).result(timeout=5)
+    finally:
+        log.close()
+
+    # Nothing of the failed batch survives, and no line was torn or glued together
+    assert [e["employee_id"] for e in log.replay()] == ["E1000", "E1003"]
+    assert path.read_bytes().count(b"\n") == 2
+
+
+def test_torn_tail_is_cut_off_before_appending(tmp_path):
+    path = tmp_path / "events.wal"
+    path.write_bytes(b'{"employee_id":"E1000"}\n{"employee_id":"E10')
+    log = EventLog(path, fsync=False)
+    try:
+        log.append([{"employee_id": "E1001"}]).result(timeout=5)
+    finally:
+        log.close()
+    assert [e["employee_id"] for e in log.replay()] == ["E1000", "E1001"]
+
+
+def test_writer_stops_when_a_failed_batch_cannot_be_rolled_back(tmp_path, monkeypatch):
+    log = EventLog(tmp_path / "events.wal")
+    try:
+        # The batch's fsync fails, then so does the fsync of its rollback
+        _failing_fsync(monkeypatch, 2)
+        assert isinstance(log.append([{"employee_id": "E1001"}]).exception(timeout=5), OSError)
+        with pytest.raises(RuntimeError):
+            log.append([{"employee_id": "E1002"}]).result(timeout=5)
+    finally:
+        log.close()
+    assert log.stats()["stopped"]
+
+
+def test_ingest_returns_503_when_the_writer_has_stopped(client, tmp_path, monkeypatch):
+    import backend.attendance_api.routes as attendance_routes
+    from backend.data_store.live_state import live_attendance
+    log = EventLog(tmp_path / "events.wal")
+    log.broken = OSError("rollback failed")
+    live_attendance.ensure_replayed()
+    monkeypatch.setattr(live_attendance, "log", log)
+    monkeypatch.setattr(attendance_routes, "DATA_DIR", tmp_path)
+    payload = {"employee_id": "E1001", "event_type": "entry", "timestamp": datetime.now().isoformat(timespec="seconds")}
+    response = client.post("/api/attendance/events", json=payload)
+    assert response.status_code == 503
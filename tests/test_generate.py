@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+from backend.data_store.generate import main
+
+ARGS = ["--employees", "4", "--start", "2025-12-01", "--end", "2025-12-02"]
+
+
+def test_refuses_to_overwrite_bundled_master_data(data_dir):
+    before = (data_dir / "employees.json").read_bytes()
+
+    with pytest.raises(SystemExit) as exc:
+        main(ARGS)
+
+    assert exc.value.code == 2
+    assert (data_dir / "employees.json").read_bytes() == before
+
+
+def test_writes_master_data_to_another_directory(tmp_path):
+    main([*ARGS, "--output-dir", str(tmp_path)])
+
+    employees = json.loads((tmp_path / "employees.json").read_text(encoding="utf-8"))["employees"]
+    assert len(employees) == 4
+    assert (tmp_path / "attendance_multi_day.json").exists()
@@ -0,0 +1,90 @@
+import asyncio
+
+from backend.data_store.event_log import EventLog
+from backend.data_store.live_state import LiveAttendance
+from backend.data_store.occupancy import is_inside
+
+
+def _event(event_type: str, time: str, employee_id: str = "E1001") -> dict:
+    return {"employee_id": employee_id, "event_type": event_type, "timestamp": f"2026-01-05T{time}:00",
+            "office": "Bengaluru", "building": "Tower A"}
+
+
+def _live(tmp_path) -> LiveAttendance:
+    live = LiveAttendance(EventLog(tmp_path / "events.wal", fsync=False))
+    live.ensure_replayed()
+    return live
+
+
+def test_late_delivered_entry_keeps_the_checkout(tmp_path):
+    live = _live(tmp_path)
+    live.apply([_event("exit", "18:00")])
+    live.apply([_event("entry", "09:00")])
+
+    [record] = live.records("2026-01-05")
+    assert record["checkin_time"] == "09:00"
+    assert record["checkout_time"] == "18:00"
+    assert not is_inside(record)
+    assert live.open_records() == []
+
+
+def test_reentry_after_exit_reopens_the_record(tmp_path):
+    live = _live(tmp_path)
+    live.apply([_event("entry", "09:00"), _event("exit", "13:00"), _event("entry", "14:00")])
+
+    [record] = live.records("2026-01-05")
+    assert record["checkin_time"] == "09:00"
+    assert record["checkout_time"] is None
+    assert is_inside(record)
+
+
+def test_concurrent_ingests_apply_in_log_order(tmp_path):
+    live = _live(tmp_path)
+    # Conflicting entries and exits for one employee, from many concurrent requests
+    events = [_event("entry" if i % 2 else "exit", f"{8 + i // 6:02d}:{i % 6 * 10:02d}") for i in range(48)]
+    events.reverse()
+
+    async def ingest_all():
+        await asyncio.gather(*(live.ingest([event]) for event in events))
+
+    asyncio.run(ingest_all())
+    live.log.close()
+
+    replayed = LiveAttendance(live.log)
+    replayed.ensure_replayed()
+    assert replayed.records("2026-01-05") == live.records("2026-01-05")
+    assert replayed.version == live.version == len(events)
+
+
+def test_readers_in_threads_see_consistent_state_while_events_are_applied(tmp_path):
+    import threading
+    live = _live(tmp_path)
+    errors = []
+    done = threading.Event()
+
+    def read():
+        try:
+            while not done.is_set():
+                for date in live.dates():
+                    for record in live.records(date):
+                        # A record is never seen half-folded
+                        assert record["checkin_time"] is not None
+                live.open_records()
+                live.stats()
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    try:
+        for day in range(1, 29):
+            for i in range(60):
+                event = {"employee_id": f"E{i}", "event_type": "entry",
+                         "timestamp": f"2026-02-{day:02d}T09:{i % 60:02d}:00"}
+                live.apply([event])
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+    assert errors == []
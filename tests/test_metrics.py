@@ -0,0 +1,16 @@
+from backend.data_store import cache
+from tests.helpers import RecordingJson
+
+
+def test_cold_metrics_loads_data_off_the_event_loop(client, monkeypatch):
+    recorder = RecordingJson()
+    monkeypatch.setattr(cache, "json", recorder)
+    cache.dataset_cache.invalidate()
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert "dataset_days " in response.text
+    assert "dataset_employees " in response.text
+    assert recorder.loads, "a cold cache should have loaded the dataset"
+    assert not any(recorder.loads)
@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from backend.data_store import partitions
+from backend.data_store.partitions import PartitionedAttendanceRepository, convert_json, encode_day
+from tests.helpers import RecordingJson
+
+
+def test_days_load_lazily_and_open_day_rewrites_are_picked_up(data_dir, tmp_path):
+    convert_json(data_dir, tmp_path)
+    repository = PartitionedAttendanceRepository(tmp_path)
+    dates = repository.get_dates()
+    closed, latest = dates[0], repository.latest_date()
+    assert latest == dates[-1]
+    assert repository.loads == 0
+
+    records = list(repository.get_day(latest).records)
+    assert repository.get_day(closed) is not None
+    assert repository.get_day(latest) is not None
+    # Only the two requested partitions were read, each once
+    assert repository.loads == 2
+
+    closed_version, open_version = repository.day_version(closed), repository.day_version(latest)
+    (tmp_path / f"{latest}.json").write_text(encode_day(latest, records[:1]), encoding="utf-8")
+
+    assert repository.day_version(closed) == closed_version
+    assert repository.day_version(latest) != open_version
+    assert len(repository.get_day(latest).records) == 1
+    assert repository.get_day(closed) is not None
+    assert repository.loads == 3
+
+
+def test_manifest_replacement_publishes_new_days(data_dir, tmp_path):
+    convert_json(data_dir, tmp_path)
+    repository = PartitionedAttendanceRepository(tmp_path)
+    latest = repository.latest_date()
+    version = repository.version()
+
+    manifest_path = tmp_path / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    del manifest["partitions"][latest]
+    manifest["latest_date"] = max(manifest["partitions"])
+    manifest_path.write_text(json.dumps(manifest, indent=1) + "\n", encoding="utf-8")
+
+    assert repository.version() != version
+    assert repository.latest_date() < latest
+    assert repository.get_day(latest) is None
+
+
+def test_prepare_parses_a_cold_requested_day_off_the_event_loop(data_dir, tmp_path, monkeypatch):
+    convert_json(data_dir, tmp_path)
+    repository = PartitionedAttendanceRepository(tmp_path)
+    closed = repository.get_dates()[0]
+    recorder = RecordingJson()
+    monkeypatch.setattr(partitions, "json", recorder)
+
+    async def request():
+        await asyncio.gather(repository.prepare(closed), repository.prepare(closed))
+        # What the handler then reads on the loop is already cached
+        return repository.get_day(closed)
+
+    assert asyncio.run(request()).date == closed
+    assert recorder.loads == [False]
+    assert repository.loads == 1
+
+
+def test_routes_prepare_the_requested_date(client, monkeypatch):
+    from backend.data_store.repository import get_repository
+    repository = get_repository()
+    prepared = []
+    original = repository.prepare
+
+    async def prepare(date=None):
+        prepared.append(date)
+        await original(date)
+
+    monkeypatch.setattr(repository, "prepare", prepare)
+    day = repository.get_dates()[0]
+    assert client.get("/api/attendance/daily-count", params={"date": day}).status_code == 200
+    assert client.get("/api/attendance/daily-count").status_code == 200
+    assert prepared == [day, None]
@@ -0,0 +1,117 @@
+from datetime import datetime
+
+import pytest
+
+
+def _ingest(client, event_type: str):
+    payload = {"employee_id": "E1001", "event_type": event_type, "timestamp": datetime.now().isoformat(timespec="seconds")}
+    response = client.post("/api/attendance/events", json=payload)
+    assert response.status_code == 200, response.text
+
+
+def test_closed_day_etag_survives_ingest_for_today(client):
+    url = "/api/late-stay/after-8pm?date=2025-12-30"
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    _ingest(client, "entry")
+
+    again = client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+
+
+def test_today_and_undated_etags_change_on_ingest(client):
+    _ingest(client, "entry")
+    today = datetime.now().date().isoformat()
+    dated_url = f"/api/attendance/records?date={today}"
+    dated = client.get(dated_url)
+    assert dated.status_code == 200
+    undated = client.get("/api/reports/wfo-compliance/period")
+
+    _ingest(client, "exit")
+
+    changed = client.get(dated_url, headers={"If-None-Match": dated.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != dated.headers["etag"]
+    assert any(r["employee_id"] == "E1001" and r["checkout_time"] for r in changed.json()["attendance_records"])
+    assert client.get("/api/reports/wfo-compliance/period").headers["etag"] != undated.headers["etag"]
+
+
+def test_cached_body_is_per_day(client):
+    url = "/api/reports/wfo-compliance?date=2025-12-30"
+    body = client.get(url).content
+    _ingest(client, "entry")
+    assert client.get(url).content == body
+
+
+def test_repeated_polls_are_served_from_the_byte_cache(client):
+    from backend.response_cache import response_cache
+    first = client.get("/api/reports/work-balance/projects?date=2025-12-30&requires_night_shift=false")
+    assert first.status_code == 200
+    hits = response_cache.hits
+
+    # Same parameters in another order
+    again = client.get("/api/reports/work-balance/projects?requires_night_shift=false&date=2025-12-30")
+
+    assert response_cache.hits == hits + 1
+    assert again.content == first.content
+    assert again.headers["etag"] == first.headers["etag"]
+
+
+def test_versions_are_computed_off_the_event_loop():
+    import asyncio
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from backend.response_cache import ConditionalGetMiddleware, ResponseBytesLRU
+
+    on_loop = []
+
+    def version(date):
+        # A cold dataset is loaded (or the event log replayed) while computing versions
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return f"v1:{date}"
+
+    app = FastAPI()
+    app.add_middleware(ConditionalGetMiddleware, cache=ResponseBytesLRU(), version=version)
+
+    @app.get("/api/thing")
+    async def thing(date: str = None):
+        return {"date": date}
+
+    response = TestClient(app).get("/api/thing?date=2025-12-29")
+    assert response.status_code == 200
+    assert on_loop and not any(on_loop)
+
+
+@pytest.fixture
+def employees_file(data_dir):
+    """The scratch employees.json, put back as it was after the test"""
+    path = data_dir / "employees.json"
+    original = path.read_bytes()
+    yield path
+    path.write_bytes(original)
+
+
+def test_master_data_change_invalidates_closed_day_etags(client, employees_file):
+    url = "/api/reports/wfo-compliance?date=2025-12-30"
+    etag = client.get(url).headers["etag"]
+
+    # Same content, new stat signature: the data version still moves
+    employees_file.write_text(employees_file.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_errors_are_not_cached(client):
+    from backend.response_cache import response_cache
+    entries = response_cache.stats()["entries"]
+    assert client.get("/api/late-stay/after-8pm?date=1999-01-01").status_code == 404
+    assert response_cache.stats()["entries"] == entries
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from backend.data_store.partitions import PartitionedAttendanceRepository, convert_json, encode_day
+from backend.data_store.rollup_store import MANIFEST_FILE, RollupStore, materialize
+from tests.helpers import RecordingJson
+
+TODAY = "2026-01-01"
+
+
+def _repository(data_dir, tmp_path) -> PartitionedAttendanceRepository:
+    convert_json(data_dir, tmp_path / "attendance")
+    return PartitionedAttendanceRepository(tmp_path / "attendance")
+
+
+def test_closed_days_are_materialized_once(data_dir, tmp_path):
+    repository = _repository(data_dir, tmp_path)
+    store = RollupStore(tmp_path / "rollups")
+    dates = repository.get_dates()
+
+    assert materialize(repository, store, today=TODAY) == len(dates)
+    assert materialize(repository, store, today=TODAY) == 0
+
+    rollup = store.get(dates[0], repository.day_version(dates[0]))
+    assert rollup is not None and rollup["date"] == dates[0]
+    # Days from today on are left to the live path
+    assert materialize(repository, RollupStore(tmp_path / "partial"), today=dates[-1]) == len(dates) - 1
+
+
+def test_changed_day_is_ignored_until_rebuilt(data_dir, tmp_path):
+    repository = _repository(data_dir, tmp_path)
+    store = RollupStore(tmp_path / "rollups")
+    materialize(repository, store, today=TODAY)
+    date = repository.get_dates()[0]
+    before = store.get(date, repository.day_version(date))
+
+    # Re-publish the day with one record less
+    records = list(repository.get_day(date).records)[:-1]
+    (tmp_path / "attendance" / f"{date}.json").write_text(encode_day(date, records), encoding="utf-8")
+    manifest_path = tmp_path / "attendance" / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest["partitions"][date]["records"] = len(records)
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+
+    assert store.get(date, repository.day_version(date)) is None
+    assert materialize(repository, store, today=TODAY) == 1
+    after = store.get(date, repository.day_version(date))
+    assert after is not None
+    assert sum(p["records"] for p in after["projects"].values()) < sum(p["records"] for p in before["projects"].values())
+
+
+def test_rollups_in_an_older_format_are_rebuilt(data_dir, tmp_path):
+    repository = _repository(data_dir, tmp_path)
+    store = RollupStore(tmp_path / "rollups")
+    materialize(repository, store, today=TODAY)
+
+    manifest_path = tmp_path / "rollups" / MANIFEST_FILE
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest["format"] = 1
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+
+    assert store.manifest() == {}
+    assert materialize(repository, store, today=TODAY) == len(repository.get_dates())
+
+
+def test_requests_load_rollups_off_the_event_loop(data_dir, tmp_path, monkeypatch):
+    from backend.data_store import cache, rollup_store
+    repository = _repository(data_dir, tmp_path)
+    materialize(repository, RollupStore(tmp_path / "rollups"), today=TODAY)
+    date = repository.get_dates()[0]
+    version = repository.day_version(date)
+
+    recorder = RecordingJson()
+    monkeypatch.setattr(cache, "json", recorder)
+    monkeypatch.setattr(rollup_store, "json", recorder)
+    store = RollupStore(tmp_path / "rollups")
+
+    async def read_twice():
+        return await store.aget(date, version), await store.aget(date, version)
+
+    first, second = asyncio.run(read_twice())
+    assert first is not None and second is first
+    # The manifest and the day file, each parsed once, both in worker threads
+    assert recorder.loads == [False, False]
+    assert store.stats()["days"] == len(repository.get_dates())
+    assert len(recorder.loads) == 2
@@ -0,0 +1,90 @@
+import json
+import shutil
+
+from backend.data_store.snapshot import SnapshotAttendanceRepository, SnapshotStore
+
+FIELDS = ("employee_id", "checkin_time", "checkout_time")
+
+
+def _copy_dataset(data_dir, target):
+    target.mkdir()
+    for filename in ("employees.json", "projects.json", "attendance_multi_day.json"):
+        shutil.copy(data_dir / filename, target / filename)
+    return target
+
+
+def test_workers_share_a_generation_and_switch_when_the_json_changes(data_dir, tmp_path):
+    source = _copy_dataset(data_dir, tmp_path / "json")
+    store = SnapshotStore(source, tmp_path / "snapshot")
+    first, second = SnapshotAttendanceRepository(store), SnapshotAttendanceRepository(store)
+
+    multi_day = json.loads((source / "attendance_multi_day.json").read_text(encoding="utf-8"))
+    latest = max(day["date"] for day in multi_day["days"])
+    expected = next(day for day in multi_day["days"] if day["date"] == latest)["attendance_records"]
+    assert first.latest_date() == second.latest_date() == latest
+    assert [tuple(r.get(f) for f in FIELDS) for r in first.get_day(latest).records] == \
+        [tuple(r.get(f) for f in FIELDS) for r in expected]
+    assert store.builds == 1
+
+    version = first.version()
+    multi_day["days"] = [day for day in multi_day["days"] if day["date"] != latest]
+    (source / "attendance_multi_day.json").write_text(json.dumps(multi_day), encoding="utf-8")
+    assert first.version() != version
+
+    first.refresh()
+    second.refresh()
+    assert store.builds == 2
+    assert first.snapshot().generation == second.snapshot().generation == 2
+    assert first.latest_date() < latest
+    assert second.get_day(latest) is None
+
+
+def _fresh_interners(monkeypatch):
+    """Empty process interners, as in a newly started worker"""
+    from backend.data_store import snapshot
+    from backend.data_store.columnar import Interner
+    interners = {field: Interner() for field, _, _ in snapshot.PROCESS_CODED}
+    monkeypatch.setattr(snapshot, "PROCESS_CODED",
+                        tuple((field, interners[field], typecode) for field, _, typecode in snapshot.PROCESS_CODED))
+    return interners
+
+
+def test_code_columns_are_shared_across_generations(data_dir, tmp_path, monkeypatch):
+    interners = _fresh_interners(monkeypatch)
+    source = _copy_dataset(data_dir, tmp_path / "json")
+    repository = SnapshotAttendanceRepository(SnapshotStore(source, tmp_path / "snapshot"))
+    latest = repository.latest_date()
+
+    first = repository.refresh()
+    # The employee directory interns master data after the worker attached
+    for employee in repository.get_employees():
+        interners["employee_id"].intern(employee["employee_id"])
+    columns = repository.get_day(latest).columns
+    assert first.stats()["remapped"] == []
+    assert all(isinstance(column, memoryview) for column in (columns.employee, columns.office, columns.building))
+    assert [interners["employee_id"].values[code] for code in columns.employee] == \
+        [r["employee_id"] for r in repository.get_day(latest).records]
+
+    # A new office in a regenerated dataset
+    multi_day_path = source / "attendance_multi_day.json"
+    multi_day = json.loads(multi_day_path.read_text(encoding="utf-8"))
+    multi_day["days"][0]["attendance_records"][0]["office"] = "Pune"
+    multi_day_path.write_text(json.dumps(multi_day), encoding="utf-8")
+
+    second = repository.refresh()
+    assert second.generation == first.generation + 1
+    assert second.stats()["remapped"] == []
+    assert second.values["office"][:len(first.values["office"])] == first.values["office"]
+    assert isinstance(repository.get_day(latest).columns.office, memoryview)
+
+
+def test_codes_are_remapped_when_the_process_interned_other_values(data_dir, tmp_path, monkeypatch):
+    interners = _fresh_interners(monkeypatch)
+    interners["office"].intern("Somewhere else")
+    source = _copy_dataset(data_dir, tmp_path / "json")
+    repository = SnapshotAttendanceRepository(SnapshotStore(source, tmp_path / "snapshot"))
+    latest = repository.latest_date()
+
+    assert repository.refresh().stats()["remapped"] == ["office"]
+    day = repository.get_day(latest)
+    assert [interners["office"].values[code] for code in day.columns.office] == [r["office"] for r in day.records]
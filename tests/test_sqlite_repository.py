@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import shutil
+
+import pytest
+
+from backend.data_store.import_json import import_json
+from backend.data_store.sqlite_repository import SqliteAttendanceRepository
+
+
+def test_reimport_is_picked_up_by_open_connections(data_dir, tmp_path):
+    source = tmp_path / "json"
+    source.mkdir()
+    for filename in ("employees.json", "projects.json", "attendance_multi_day.json"):
+        shutil.copy(data_dir / filename, source / filename)
+    db_path = tmp_path / "attendance.db"
+    import_json(source, db_path)
+
+    repository = SqliteAttendanceRepository(str(db_path))
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        def read():
+            latest = repository.latest_date()
+            return latest, repository.get_day(latest) is not None
+
+        # Every pool thread opens its connection against the first import
+        latest, found = list(pool.map(lambda _: read(), range(4)))[-1]
+        assert found
+
+        # Re-import without the latest day; the import swaps in a new file
+        multi_day_path = source / "attendance_multi_day.json"
+        data = json.loads(multi_day_path.read_text(encoding="utf-8"))
+        data["days"] = [day for day in data["days"] if day["date"] != latest]
+        multi_day_path.write_text(json.dumps(data), encoding="utf-8")
+        import_json(source, db_path)
+
+        for new_latest, _ in pool.map(lambda _: read(), range(4)):
+            assert new_latest < latest
+        assert all(pool.map(lambda _: repository.get_day(latest) is None, range(4)))
+        assert latest not in repository.get_dates()
+    finally:
+        pool.shutdown()
+
+
+def _source(data_dir, tmp_path, *filenames):
+    source = tmp_path / "json"
+    source.mkdir()
+    for filename in ("employees.json", "projects.json") + filenames:
+        shutil.copy(data_dir / filename, source / filename)
+    return source
+
+
+def test_import_skips_employees_without_an_id(data_dir, tmp_path):
+    source = _source(data_dir, tmp_path, "attendance_multi_day.json")
+    employees_path = source / "employees.json"
+    data = json.loads(employees_path.read_text(encoding="utf-8"))
+    total = len(data["employees"])
+    data["employees"].append({"name": "No Id", "project_id": "P001"})
+    employees_path.write_text(json.dumps(data), encoding="utf-8")
+
+    counts = import_json(source, tmp_path / "attendance.db")
+    assert counts["employees"] == total
+
+
+def test_import_refuses_an_undated_single_day_file(data_dir, tmp_path):
+    source = _source(data_dir, tmp_path, "attendance.json")
+    attendance_path = source / "attendance.json"
+    data = json.loads(attendance_path.read_text(encoding="utf-8"))
+    attendance_path.write_text(json.dumps(data["attendance_records"]), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="no \"date\""):
+        import_json(source, tmp_path / "attendance.db")
+    assert not (tmp_path / "attendance.db").exists()
+
+
+def test_missing_days_are_not_cached(data_dir, tmp_path):
+    source = _source(data_dir, tmp_path, "attendance_multi_day.json")
+    db_path = tmp_path / "attendance.db"
+    import_json(source, db_path)
+
+    repository = SqliteAttendanceRepository(str(db_path), day_cache_size=1)
+    latest = repository.latest_date()
+    day = repository.get_day(latest)
+    assert repository.get_day("1999-01-01") is None
+    assert list(repository._days) == [latest]
+    assert repository.get_day(latest) is day
@@ -0,0 +1,52 @@
+from backend.data_store.day_index import AttendanceDay
+from backend.data_store.repository import get_repository
+from backend.reports.wellbeing import assess_workforce
+
+
+class FixtureRepository:
+    """Two employees over two days; W2 is still inside on the last day"""
+
+    def get_employees(self):
+        return [{"employee_id": "W1", "name": "One"}, {"employee_id": "W2", "name": "Two"}]
+
+    def get_days(self, start=None, end=None):
+        yield AttendanceDay("2026-01-05", [
+            {"employee_id": "W1", "checkin_time": "09:00", "checkout_time": "18:00"},
+            {"employee_id": "W2", "checkin_time": "09:00", "checkout_time": "19:00"},
+        ])
+        yield AttendanceDay("2026-01-06", [
+            {"employee_id": "W1", "checkin_time": "09:00", "checkout_time": "17:00"},
+            {"employee_id": "W2", "checkin_time": "10:00", "checkout_time": None},
+        ])
+
+
+def test_open_sessions_do_not_lower_average_hours():
+    assessments = {a["employee_id"]: a for a in assess_workforce(FixtureRepository(), "2026-01-06")}
+
+    assert assessments["W1"]["avg_hours_window"] == assessments["W1"]["avg_hours_7d"] == 8.5
+    # The open session on 2026-01-06 has no hours yet and is not averaged in
+    assert assessments["W2"]["avg_hours_window"] == assessments["W2"]["avg_hours_7d"] == 10.0
+    assert assessments["W2"]["days_worked_window"] == 1
+
+
+def test_window_average_follows_window_days():
+    repository = get_repository()
+    end = repository.latest_date()
+
+    week = {a["employee_id"]: a for a in assess_workforce(repository, end, window_days=7)}
+    month = {a["employee_id"]: a for a in assess_workforce(repository, end, window_days=30)}
+
+    for employee_id, assessment in week.items():
+        # Over a 7-day window, the window average is the 7-day average
+        assert assessment["avg_hours_window"] == assessment["avg_hours_7d"]
+        assert assessment["days_worked_window"] == assessment["days_worked_7d"]
+        assert month[employee_id]["days_worked_window"] >= assessment["days_worked_window"]
+
+
+def test_at_risk_report_uses_window_fields(client):
+    response = client.get("/api/reports/wellbeing-recommendations/at-risk?window_days=14")
+    assert response.status_code == 200
+    report = response.json()
+    assert report["window_days"] == 14
+    for assessment in report["at_risk"]:
+        assert {"avg_hours_window", "days_worked_window"} <= assessment.keys()
@@ -0,0 +1,41 @@
+from backend.data_store.day_index import AttendanceDay
+from backend.data_store.employees import EmployeeDirectory
+from backend.data_store.rollup_store import aggregate_day
+from backend.data_store.rollups import MINUTES, PROJECT, RECORDS, rollup_day
+from backend.reports.routes import build_projects_work_balance, build_work_balance
+
+EMPLOYEES = [
+    {"employee_id": "W1", "project_id": "PX", "gender": "Female"},
+    {"employee_id": "W2", "project_id": "PX", "gender": "Male"},
+]
+PROJECT_X = {"project_id": "PX", "project_name": "Project X"}
+
+
+def _day() -> AttendanceDay:
+    # W1 worked 10 hours; W2 has checked in but not out yet
+    return AttendanceDay("2026-01-05", [
+        {"employee_id": "W1", "checkin_time": "09:00", "checkout_time": "19:00", "office": "A"},
+        {"employee_id": "W2", "checkin_time": "10:00", "checkout_time": None, "office": "A"},
+    ])
+
+
+def test_open_sessions_do_not_lower_average_hours():
+    day = _day()
+    single = build_work_balance(PROJECT_X, day, EmployeeDirectory(EMPLOYEES))
+    several = build_projects_work_balance([PROJECT_X], day, EMPLOYEES)["PX"]
+
+    assert single["average_work_hours"] == several["average_work_hours"] == "10h 0m"
+    assert single["total_employees"] == several["total_employees"] == 2
+
+
+def test_rollups_leave_out_open_sessions():
+    day = _day()
+    directory = EmployeeDirectory(EMPLOYEES)
+
+    counts = rollup_day(day, directory)
+    assert counts[(RECORDS, PROJECT, "PX")] == 1
+    assert counts[(MINUTES, PROJECT, "PX")] == 600
+
+    stored = aggregate_day(day, directory)
+    assert stored["projects"]["PX"] == {"records": 1, "minutes": 600, "late": 0}
+    assert stored["presence"]["present"] == 2